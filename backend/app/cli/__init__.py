@@ -0,0 +1,3 @@
+"""
+Command-line entry points for offline maintenance tasks (run with ``python -m app.cli.<name>``).
+"""
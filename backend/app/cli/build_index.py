@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+"""
+Build the IVF approximate-nearest-neighbour index for a KB store.
+
+Usage (from ``backend/``)::
+
+    python -m app.cli.build_index
+    python -m app.cli.build_index --store ../HalalKB/kb_store --nlist 4096 --iterations 25
+
+The index is written next to the store artefacts as ``ivf_index.npz`` and tagged with the store version,
+so a rebuilt or converted KB never silently serves results from a stale index. Enable it with
+``HALAL_VECTOR_INDEX=ivf``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import get_settings
+from ..services.kb_store import KBStoreError, read_kb_store
+from ..services.vector_index import IVF_INDEX_NAME, IVFIndex
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build an IVF vector index next to a KB store.")
+    parser.add_argument("--store", type=Path, default=settings.kb_store_path)
+    parser.add_argument("--nlist", type=int, default=None, help="Number of buckets (default: 4 * sqrt(rows)).")
+    parser.add_argument("--iterations", type=int, default=20, help="Spherical k-means iterations.")
+    parser.add_argument("--sample-size", type=int, default=None, help="Rows used to train the centroids.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.store is None:
+        parser.error("--store is required when HALAL_KB_STORE_PATH is not set.")
+    try:
+        store = read_kb_store(args.store)
+    except KBStoreError as exc:
+        print(f"FAILED: {exc}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    index = IVFIndex.build(
+        store.embeddings,
+        nlist=args.nlist,
+        iterations=args.iterations,
+        sample_size=args.sample_size,
+        seed=args.seed,
+        kb_version=store.version,
+    )
+    build_seconds = time.perf_counter() - started
+
+    output = args.store / IVF_INDEX_NAME
+    temp_output = args.store / f".{IVF_INDEX_NAME}.tmp"
+    index.save(temp_output)
+    os.replace(temp_output, output)
+
+    summary = {
+        "output": str(output),
+        "kb_version": store.version,
+        "rows": index.size,
+        "nlist": index.nlist,
+        "build_seconds": round(build_seconds, 3),
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+"""
+Build or incrementally update the KB store from the phrase CSV.
+
+Usage (from ``backend/``)::
+
+    python -m app.cli.build_kb --csv ../data/halal_phrases.csv
+    python -m app.cli.build_kb --csv ../data/halal_phrases.csv --dtype float16 --batch-size 512
+    python -m app.cli.build_kb --csv ../data/halal_phrases.csv --full
+
+The CSV is normalised exactly as the API normalises queries. Each phrase is keyed by a hash of its
+normalised text, and phrases already present in the existing store keep their embeddings, so editing a
+few rows (or only their labels) re-embeds just those rows instead of the whole KB. The store manifest is
+written last, so a running API with ``HALAL_KB_WATCH_INTERVAL_SECONDS`` set picks up the new version once
+the build finishes. Rebuild the IVF index afterwards if one is used.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import get_settings
+from ..services.kb_builder import build_kb_store
+from ..services.kb_store import SUPPORTED_DTYPES, KBStoreError
+from ..services.knowledge_base import EMBEDDING_MODEL_NAME
+from ..services.vector_index import IVF_INDEX_NAME
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build a KB store from a phrase CSV, embedding only new phrases.")
+    parser.add_argument("--csv", type=Path, required=True, help="CSV with a text column and a label column.")
+    parser.add_argument("--output", type=Path, default=settings.kb_store_path)
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float32")
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    parser.add_argument("--full", action="store_true", help="Re-embed every phrase, ignoring the existing store.")
+    args = parser.parse_args(argv)
+
+    if args.output is None:
+        parser.error("--output is required when HALAL_KB_STORE_PATH is not set.")
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1.")
+
+    embedder = None
+
+    def encode(texts: List[str]):
+        nonlocal embedder
+        if embedder is None:
+            # Only load MiniLM when something actually needs embedding.
+            from sentence_transformers import SentenceTransformer
+
+            embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return embedder.encode(texts, batch_size=args.batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+    def progress(done: int, total: int) -> None:
+        print(f"[build_kb] embedded {done}/{total} phrases", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    try:
+        report = build_kb_store(
+            args.csv,
+            args.output,
+            encode,
+            batch_size=args.batch_size,
+            dtype=args.dtype,
+            full=args.full,
+            on_batch=progress,
+        )
+    except (KBStoreError, ValueError, FileNotFoundError) as exc:
+        print(f"FAILED: {exc}", file=sys.stderr)
+        return 1
+
+    summary = {"output": str(args.output), **report.as_dict(), "build_seconds": round(time.perf_counter() - started, 3)}
+    if (args.output / IVF_INDEX_NAME).exists():
+        summary["note"] = f"{IVF_INDEX_NAME} now refers to an older KB version; rerun 'python -m app.cli.build_index'."
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
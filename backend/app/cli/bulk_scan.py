@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+"""
+Analyse a whole catalogue of label images offline, writing one result record per image.
+
+Usage (from ``backend/``)::
+
+    python -m app.cli.bulk_scan --images ../catalogue --output scan.jsonl --workers 8
+    python -m app.cli.bulk_scan --manifest paths.txt --output scan_parts --format parquet
+    python -m app.cli.bulk_scan --from-ocr --previous scan.jsonl --output rescan.jsonl
+
+Image paths are streamed from a directory (walked recursively) or a manifest with one path per line, and
+handed to a process pool whose workers load the logo detector, OCR chain and KB once each. Records are
+written as they complete: JSONL is flushed line by line, Parquet is written as numbered part files in the
+output directory. The output doubles as the checkpoint, so rerunning an interrupted command skips every
+image it already recorded; ``--retry-errors`` queues failed images again and ``--restart`` starts over.
+When a path appears more than once, its last record wins.
+
+``--from-ocr`` re-classifies existing transcripts against the current KB without running detection or OCR.
+With ``--previous`` the images and their transcripts come from an earlier scan's output (logo verdicts are
+carried over unchanged); otherwise each image is hashed and its transcript looked up in the SQLite OCR
+cache (``HALAL_RESULT_CACHE_PATH``). Images without a transcript are recorded as errors.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..config import get_settings
+from ..services.analysis import AnalysisResult, analyse_image, cached_ocr_text, classify_ocr_text
+from ..services.knowledge_base import get_knowledge_base
+from ..services.logo_detector import get_logo_detector
+from ..services.ocr import get_ocr_chain
+from ..services.result_cache import image_digest
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+RECORD_FIELDS = ("path", "digest", "error", *(field.name for field in fields(AnalysisResult)))
+# Nested values are stored as JSON strings in Parquet so every part shares one flat schema.
+JSON_COLUMNS = ("ingredients", "ingredient_matches")
+PART_PREFIX = "part-"
+
+# (image path, that image's record from --previous, if any)
+Task = Tuple[str, Optional[Dict[str, Any]]]
+
+
+def _iter_directory(directory: Path) -> Iterator[str]:
+    # os.walk streams the tree instead of listing it up front; sorting keeps the order stable across runs.
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_SUFFIXES):
+                yield os.path.join(root, name)
+
+
+def _iter_manifest(manifest: Path) -> Iterator[str]:
+    # Relative entries are resolved against the manifest's folder; absolute ones are kept as they are.
+    with manifest.open(encoding="utf-8") as handle:
+        for line in handle:
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                yield str(manifest.parent / entry)
+
+
+class JsonlWriter:
+    def __init__(self, path: Path, sync_every: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _drop_partial_line(path)
+        self._handle = path.open("a", encoding="utf-8")
+        self._sync_every = sync_every
+        self._unsynced = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self._unsynced += 1
+        if self._unsynced >= self._sync_every:
+            self._sync()
+
+    def close(self) -> None:
+        self._sync()
+        self._handle.close()
+
+    def _sync(self) -> None:
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+
+
+class ParquetWriter:
+    """
+    Buffers records and writes each full buffer as the next ``part-NNNNN.parquet`` in ``directory``.
+    """
+
+    def __init__(self, directory: Path, rows_per_part: int) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self._directory = directory
+        self._rows_per_part = rows_per_part
+        self._buffer: List[Dict[str, Any]] = []
+        self._next_part = len(_parquet_parts(directory))
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(record)
+        if len(self._buffer) >= self._rows_per_part:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        import pandas as pd
+
+        rows = [
+            {
+                column: json.dumps(record.get(column), ensure_ascii=False)
+                if column in JSON_COLUMNS
+                else record.get(column)
+                for column in RECORD_FIELDS
+            }
+            for record in self._buffer
+        ]
+        target = self._directory / f"{PART_PREFIX}{self._next_part:05d}.parquet"
+        staging = target.with_suffix(".parquet.tmp")
+        pd.DataFrame(rows, columns=list(RECORD_FIELDS)).to_parquet(staging, index=False)
+        # Renamed into place only once complete, so a crash never leaves a truncated part behind.
+        os.replace(staging, target)
+        self._next_part += 1
+        self._buffer.clear()
+
+
+def _drop_partial_line(path: Path) -> None:
+    # A run killed mid-write can leave half a record at the end; cut it so appended lines stay valid.
+    if not path.exists():
+        return
+    with path.open("rb+") as handle:
+        size = handle.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            step = min(1 << 16, position)
+            handle.seek(position - step)
+            chunk = handle.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != size:
+            handle.truncate(position)
+
+
+def _parquet_parts(directory: Path) -> List[Path]:
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"{PART_PREFIX}*.parquet"))
+
+
+def _read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Records of an earlier run's output, in the order they were written (a directory is read as Parquet).
+    """
+
+    if path.is_dir():
+        import pandas as pd
+
+        for part in _parquet_parts(path):
+            frame = pd.read_parquet(part)
+            # Missing values come back as NaN; records use None like the JSONL output.
+            for row in frame.astype(object).where(frame.notna(), None).to_dict("records"):
+                for column in JSON_COLUMNS:
+                    if isinstance(row.get(column), str):
+                        row[column] = json.loads(row[column])
+                yield row
+        return
+    if not path.exists():
+        return
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _completed_paths(output: Path, retry_errors: bool) -> Set[str]:
+    failed: Dict[str, bool] = {}
+    for record in _read_records(output):
+        failed[record["path"]] = bool(record.get("error"))
+    return {path for path, error in failed.items() if not (retry_errors and error)}
+
+
+def _previous_tasks(previous: Path) -> Iterator[Task]:
+    # Two passes keep memory bounded by the number of paths rather than by the size of their transcripts.
+    latest: Dict[str, int] = {}
+    for position, record in enumerate(_read_records(previous)):
+        latest[record["path"]] = position
+    for position, record in enumerate(_read_records(previous)):
+        if latest[record["path"]] == position:
+            yield record["path"], record
+
+
+def _remove_output(output: Path) -> None:
+    if output.is_dir():
+        for part in _parquet_parts(output):
+            part.unlink()
+    elif output.exists():
+        output.unlink()
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(from_ocr: bool, confidence_threshold: float) -> None:
+    # Ctrl+C is handled by the parent, which stops submitting work and closes the output cleanly.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    settings = get_settings()
+    _worker.update(
+        settings=settings,
+        knowledge_base=get_knowledge_base(),
+        from_ocr=from_ocr,
+        confidence_threshold=confidence_threshold,
+    )
+    if not from_ocr:
+        get_logo_detector()
+        get_ocr_chain(settings).load()
+
+
+def _scan(task: Task) -> Dict[str, Any]:
+    path, previous = task
+    if previous is not None and previous.get("logo_detected") and not previous.get("error"):
+        return previous
+
+    record: Dict[str, Any] = {**dict.fromkeys(RECORD_FIELDS), "path": path}
+    try:
+        if _worker["from_ocr"]:
+            record["digest"], result = _reclassify(path, previous)
+        else:
+            data = Path(path).read_bytes()
+            record["digest"] = image_digest(data)
+            result = analyse_image(
+                data,
+                settings=_worker["settings"],
+                knowledge_base=_worker["knowledge_base"],
+                confidence_threshold=_worker["confidence_threshold"],
+                image_digest=record["digest"],
+            )
+    except Exception as exc:  # noqa: BLE001 - one unreadable label must not stop the scan.
+        record["error"] = f"{type(exc).__name__}: {exc}"
+        return record
+    record.update(asdict(result))
+    return record
+
+
+def _reclassify(path: str, previous: Optional[Dict[str, Any]]) -> Tuple[str, AnalysisResult]:
+    digest = previous.get("digest") if previous is not None else None
+    ocr_text = previous.get("ocr_text") if previous is not None else None
+    if not ocr_text:
+        if digest is None:
+            digest = image_digest(Path(path).read_bytes())
+        ocr_text = cached_ocr_text(digest, _worker["settings"])
+    if not ocr_text:
+        raise LookupError("No cached OCR text for this image.")
+    result = classify_ocr_text(ocr_text, settings=_worker["settings"], knowledge_base=_worker["knowledge_base"])
+    return digest, result
+
+
+def _parquet_available() -> bool:
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+        except ImportError:
+            continue
+        return True
+    return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse a catalogue of label images with a process pool.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--images", type=Path, help="Directory of label images, walked recursively.")
+    source.add_argument("--manifest", type=Path, help="Text file with one image path per line.")
+    parser.add_argument("--output", type=Path, required=True, help="JSONL file, or a directory for Parquet parts.")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--confidence-threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--from-ocr", action="store_true", help="Re-classify cached transcripts; skip detection and OCR."
+    )
+    parser.add_argument("--previous", type=Path, help="Earlier output supplying images and transcripts for --from-ocr.")
+    parser.add_argument(
+        "--flush-every", type=int, default=500, help="Records per Parquet part, or between fsyncs of the JSONL file."
+    )
+    parser.add_argument("--progress-every", type=int, default=100)
+    parser.add_argument("--retry-errors", action="store_true", help="Scan images whose last record is an error again.")
+    parser.add_argument("--restart", action="store_true", help="Discard existing output instead of resuming it.")
+    args = parser.parse_args(argv)
+
+    if args.previous is not None:
+        if not args.from_ocr:
+            parser.error("--previous is only used with --from-ocr.")
+        if args.images is not None or args.manifest is not None:
+            parser.error("--previous already lists the images; drop --images/--manifest.")
+        if not args.previous.exists():
+            parser.error(f"'{args.previous}' does not exist.")
+        if args.previous.resolve() == args.output.resolve():
+            parser.error("--previous and --output must be different.")
+    elif args.images is None and args.manifest is None:
+        parser.error("One of --images, --manifest or --from-ocr --previous is required.")
+    if args.from_ocr and args.previous is None and get_settings().result_cache_path is None:
+        parser.error("--from-ocr without --previous reads the OCR cache, which needs HALAL_RESULT_CACHE_PATH.")
+    if args.workers < 1 or args.flush_every < 1 or args.progress_every < 1:
+        parser.error("--workers, --flush-every and --progress-every must be at least 1.")
+    if args.format == "parquet" and not _parquet_available():
+        parser.error("--format parquet needs 'pip install pyarrow'.")
+    if args.format == "jsonl" and args.output.is_dir():
+        parser.error(f"'{args.output}' is a directory; use --format parquet or a file path.")
+
+    if args.restart:
+        _remove_output(args.output)
+    # Opening the writer first also trims a record left half-written by an interrupted run.
+    if args.format == "parquet":
+        writer: JsonlWriter | ParquetWriter = ParquetWriter(args.output, args.flush_every)
+    else:
+        writer = JsonlWriter(args.output, args.flush_every)
+    done = _completed_paths(args.output, args.retry_errors)
+    resumed = len(done)
+
+    if args.previous is not None:
+        tasks: Iterator[Task] = _previous_tasks(args.previous)
+    else:
+        paths = _iter_directory(args.images) if args.images is not None else _iter_manifest(args.manifest)
+        tasks = ((path, None) for path in paths)
+
+    statuses: Counter = Counter()
+    scanned = errors = 0
+    interrupted = failed = False
+    started = time.perf_counter()
+    # Submission is bounded so huge catalogues are streamed rather than queued in memory all at once.
+    max_in_flight = args.workers * 4
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.from_ocr, args.confidence_threshold)
+    )
+    try:
+        in_flight: Set[Future] = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                elif task[0] not in done:
+                    done.add(task[0])  # also drops duplicate paths within this run
+                    in_flight.add(executor.submit(_scan, task))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                writer.write(record)
+                scanned += 1
+                if record.get("error"):
+                    errors += 1
+                else:
+                    statuses[record["status"]] += 1
+                if scanned % args.progress_every == 0:
+                    rate = scanned / max(time.perf_counter() - started, 1e-9)
+                    print(
+                        f"[bulk_scan] {scanned} scanned ({errors} errors), {rate:.1f} images/s",
+                        file=sys.stderr,
+                        flush=True,
+                    )
+    except KeyboardInterrupt:
+        interrupted = True
+        print("[bulk_scan] interrupted; rerun the same command to resume.", file=sys.stderr, flush=True)
+    except BrokenProcessPool as exc:
+        # Usually a worker failing to load the models; everything recorded so far is kept.
+        failed = True
+        print(f"FAILED: {exc}", file=sys.stderr)
+    finally:
+        executor.shutdown(wait=not (interrupted or failed), cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "output": str(args.output),
+        "format": args.format,
+        "mode": "from-ocr" if args.from_ocr else "full",
+        "resumed_from": resumed,
+        "scanned": scanned,
+        "errors": errors,
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "images_per_second": round(scanned / elapsed, 3) if elapsed > 0 else None,
+        "interrupted": interrupted,
+    }
+    print(json.dumps(summary, indent=2))
+    if failed:
+        return 1
+    return 130 if interrupted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
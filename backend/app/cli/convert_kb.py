@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+"""
+Convert the pickled ``HalalKB`` artefacts into the memory-mapped KB store format.
+
+Usage (from ``backend/``)::
+
+    python -m app.cli.convert_kb
+    python -m app.cli.convert_kb --dtype float16 --output ../HalalKB/kb_store
+    python -m app.cli.convert_kb --verify ../HalalKB/kb_store
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from ..config import get_settings
+from ..services.kb_store import (
+    SUPPORTED_DTYPES,
+    KBStoreError,
+    load_legacy_kb,
+    read_manifest,
+    verify_kb_store,
+    write_kb_store,
+)
+from ..services.knowledge_base import EMBEDDING_MODEL_NAME
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Convert HalalKB pickle/tensor artefacts into a KB store.")
+    parser.add_argument("--dataframe", type=Path, default=settings.kb_dataframe_path)
+    parser.add_argument("--embeddings", type=Path, default=settings.kb_embeddings_path)
+    parser.add_argument("--output", type=Path, default=settings.kb_store_path)
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float32")
+    parser.add_argument("--verify", type=Path, metavar="STORE", help="Only verify an existing store's checksums.")
+    args = parser.parse_args(argv)
+
+    if args.verify is not None:
+        try:
+            verify_kb_store(args.verify)
+        except KBStoreError as exc:
+            print(f"FAILED: {exc}", file=sys.stderr)
+            return 1
+        manifest = read_manifest(args.verify)
+        print(f"OK: {args.verify} (version {manifest['version']}, {manifest['rows']} rows)")
+        return 0
+
+    if args.output is None:
+        parser.error("--output is required when HALAL_KB_STORE_PATH is not set.")
+
+    data_frame, embeddings = load_legacy_kb(args.dataframe, args.embeddings)
+    if "norm_text" not in data_frame.columns:
+        parser.error(f"'{args.dataframe}' is missing the 'norm_text' column exported by CV2.ipynb.")
+
+    manifest = write_kb_store(
+        args.output,
+        data_frame.reset_index(drop=True),
+        embeddings,
+        dtype=args.dtype,
+        embedding_model=EMBEDDING_MODEL_NAME,
+        extra={"source": {"dataframe": str(args.dataframe), "embeddings": str(args.embeddings)}},
+    )
+    print(json.dumps({key: manifest[key] for key in ("version", "rows", "dim", "dtype")}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+"""
+Pre-fork multi-worker server: load the KB and models once, then fork uvicorn workers that share them.
+
+Usage (from ``backend/``, POSIX only)::
+
+    python -m app.cli.serve --workers 8 --port 8000
+
+``uvicorn --workers`` spawns fresh interpreters, so every worker loads its own copy of MiniLM, the YOLO
+weights and the KB. Here the parent builds them before forking; workers inherit the pages copy-on-write
+(memory-mapped KB stores are shared through the page cache regardless) and all accept connections from
+one listening socket. The parent restarts workers that die and forwards SIGINT/SIGTERM for a graceful
+shutdown. Measure the effect with ``python benchmarks/memory.py --pid <parent pid>``.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional
+
+
+def _bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _limit_torch_threads(threads: int) -> None:
+    # N workers each running a cores-wide intra-op pool would oversubscribe the CPU.
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def _run_worker(sock: socket.socket, args: argparse.Namespace, torch_threads: int) -> None:
+    import uvicorn
+
+    from ..main import app
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _limit_torch_threads(torch_threads)
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket, args: argparse.Namespace, torch_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # Never return into the parent's supervision loop from a child.
+        try:
+            _run_worker(sock, args, torch_threads)
+        except BaseException:  # noqa: BLE001
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+    return pid
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing loaded models.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=5, help="Seconds to keep idle connections open.")
+    parser.add_argument(
+        "--torch-threads", type=int, default=None, help="Intra-op threads per worker (default: cores / workers)."
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        parser.error("Pre-fork serving needs os.fork(); use 'uvicorn app.main:app' on this platform.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    from ..main import app  # noqa: F401 - import once in the parent so workers inherit the loaded modules.
+    from ..services.knowledge_base import get_knowledge_base
+    from ..services.logo_detector import get_logo_detector
+
+    started = time.perf_counter()
+    get_knowledge_base()
+    get_logo_detector()
+    print(f"[serve] loaded KB and detector in {time.perf_counter() - started:.1f}s (pid {os.getpid()})", flush=True)
+
+    # Move everything allocated so far out of the collector's reach, so GC passes in the workers do not
+    # touch (and thereby copy) the inherited object pages.
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind_socket(args.host, args.port, args.backlog)
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // args.workers)
+    workers: Dict[int, int] = {}
+    stopping = False
+
+    def _stop(signum: int, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    for slot in range(args.workers):
+        workers[_spawn(sock, args, torch_threads)] = slot
+    print(f"[serve] {args.workers} workers on http://{args.host}:{args.port}", flush=True)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = workers.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"[serve] worker {pid} exited with status {status}; restarting", flush=True)
+        time.sleep(1.0)
+        workers[_spawn(sock, args, torch_threads)] = slot
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,7 @@ Application configuration helpers.
 
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
@@ -56,10 +56,41 @@ class Settings(BaseSettings):
         default=REPO_ROOT / "HalalKB" / "kb_embeddings.pt",
         description="Path to the knowledge base sentence-transformer embeddings (torch tensor).",
     )
+    kb_store_path: Optional[Path] = Field(
+        default=REPO_ROOT / "HalalKB" / "kb_store",
+        description="Directory of the memory-mapped KB store; the pickle/tensor pair is used when it is absent.",
+    )
+    kb_verify_checksums: bool = Field(
+        default=False, description="Verify KB store file checksums against its manifest at load time."
+    )
     yolo_weights_path: Path = Field(
         default=REPO_ROOT / "HalalLogoDetector" / "train_run_1" / "weights" / "best.pt",
         description="Path to the trained Halal logo detector weights.",
     )
+    kb_load_mode: Literal["eager", "background", "lazy"] = Field(
+        default="background",
+        description="When to load the KB and embedder: before serving, in a start-up thread, or on first use.",
+    )
+    detector_load_mode: Literal["eager", "background", "lazy"] = Field(
+        default="background", description="When to load the YOLO logo detector (see kb_load_mode)."
+    )
+    ocr_load_mode: Literal["eager", "background", "lazy"] = Field(
+        default="lazy", description="When to import and configure the OCR backends (see kb_load_mode)."
+    )
+    kb_watch_interval_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Poll the KB artefacts at this interval and hot-reload the KB when they change (off when unset).",
+    )
+    admin_token: Optional[str] = Field(
+        default=None,
+        description="Bearer token required by the /api/admin endpoints; they answer 404 while it is unset.",
+    )
+    metrics_enabled: bool = Field(
+        default=False,
+        description="Record per-stage latency histograms and outcome counters, served on /metrics and as "
+        "Server-Timing response headers.",
+    )
     semantic_threshold: float = Field(
         default=0.70,
         ge=0.0,
@@ -69,6 +100,155 @@ class Settings(BaseSettings):
     top_k_chat_results: int = Field(
         default=5, ge=1, description="Number of KB entries to surface for chatbot questions."
     )
+    chat_min_score: Optional[float] = Field(
+        default=None,
+        ge=-1.0,
+        le=1.0,
+        description="Optional minimum cosine similarity for semantic chatbot results.",
+    )
+    per_ingredient_matching: bool = Field(
+        default=True,
+        description="Classify each parsed ingredient individually instead of matching the joined list.",
+    )
+    sub_ingredient_matching: bool = Field(
+        default=True,
+        description="Look up bracketed sub-ingredients separately and resolve E-numbers from the KB's E-code "
+        "table; only leaves left unresolved are embedded.",
+    )
+    embedding_batch_size: int = Field(
+        default=64, ge=1, description="Maximum number of texts embedded per sentence-transformer forward pass."
+    )
+    lexical_index_enabled: bool = Field(
+        default=True,
+        description="Answer exact phrases, E-numbers and near-miss spellings without running the embedder.",
+    )
+    fuzzy_max_edit_distance: int = Field(
+        default=1, ge=0, le=2, description="Maximum edit distance accepted by the fuzzy lexical tier (0 disables it)."
+    )
+    fuzzy_min_length: int = Field(
+        default=5,
+        ge=1,
+        description="Shortest normalised query, and shortest word within it, that fuzzy lexical matching may correct.",
+    )
+    detector_image_size: int = Field(
+        default=640, ge=32, description="Input size of the logo detector; images are resized to it before inference."
+    )
+    detector_batch_size: int = Field(
+        default=16, ge=1, description="Maximum number of images passed to the logo detector in one forward pass."
+    )
+    max_batch_images: int = Field(
+        default=32, ge=1, description="Maximum number of images accepted by the batch analysis endpoint."
+    )
+    ocr_backends: str = Field(
+        default="gemini",
+        description="Comma-separated OCR backends tried in order until one returns text (gemini, tesseract, stub).",
+    )
+    ocr_gemini_timeout_seconds: Optional[float] = Field(
+        default=30.0, gt=0, description="Timeout for one Gemini OCR request (unset for no limit)."
+    )
+    ocr_tesseract_timeout_seconds: Optional[float] = Field(
+        default=15.0, gt=0, description="Timeout for one local Tesseract OCR run (unset for no limit)."
+    )
+    ocr_tesseract_lang: str = Field(default="eng", description="Tesseract language pack(s), e.g. 'eng+ara'.")
+    ocr_breaker_failure_threshold: int = Field(
+        default=3,
+        ge=0,
+        description="Consecutive failures or timeouts after which an OCR backend is skipped (0 never skips).",
+    )
+    ocr_breaker_reset_seconds: float = Field(
+        default=30.0, ge=0.0, description="How long a tripped OCR backend is skipped before it is tried again."
+    )
+    ocr_stub_text: str = Field(
+        default="Ingredients: water, sugar, salt.", description="Text returned for every image by the stub backend."
+    )
+    ocr_roi_mode: Literal["off", "heuristic", "yolo"] = Field(
+        default="off",
+        description="Crop OCR input to the ingredients panel found by a text-density heuristic or a YOLO model; "
+        "full-image OCR is used when no panel is found.",
+    )
+    ocr_roi_weights_path: Optional[Path] = Field(
+        default=None, description="YOLO weights with an ingredients-panel class, used when ocr_roi_mode is 'yolo'."
+    )
+    ocr_roi_class_name: str = Field(
+        default="ingredients", description="Class marking ingredients panels in multi-class ROI weights."
+    )
+    ocr_roi_confidence: float = Field(
+        default=0.25, ge=0.0, le=1.0, description="Minimum confidence of a YOLO ingredients-panel box."
+    )
+    ocr_roi_padding: float = Field(
+        default=0.05, ge=0.0, le=0.5, description="Margin added around the located panel, as a fraction of its size."
+    )
+    ocr_max_side: Optional[int] = Field(
+        default=None,
+        ge=64,
+        description="Downscale OCR input so its longer side is at most this many pixels (unset keeps full resolution).",
+    )
+    ocr_max_concurrency: int = Field(
+        default=4, ge=1, description="Maximum number of OCR calls in flight at once (per batch or per worker)."
+    )
+    ocr_queue_size: int = Field(
+        default=32, ge=0, description="OCR calls allowed to wait for a slot before requests are rejected with 503."
+    )
+    inference_workers: int = Field(
+        default=2,
+        ge=1,
+        description="Threads in the executor that runs CPU-bound detection and embedding work. With batching enabled "
+        "the batched stages wait on their own pool of batching_max_batch_size threads instead.",
+    )
+    inference_queue_size: int = Field(
+        default=32, ge=0, description="Inference calls allowed to wait for a worker before requests get 503."
+    )
+    batching_enabled: bool = Field(
+        default=False,
+        description="Coalesce concurrent embedder and logo-detector calls into shared forward passes.",
+    )
+    batching_max_wait_ms: float = Field(
+        default=5.0, ge=0.0, description="Longest time a queued item waits for its batch to fill."
+    )
+    batching_max_batch_size: int = Field(
+        default=32,
+        ge=1,
+        description="Maximum number of queued items dispatched in one forward pass; also the number of requests that "
+        "may wait on batched stages at once.",
+    )
+    result_cache_size: int = Field(
+        default=1024, ge=0, description="Number of analysis results kept in memory, keyed by image hash."
+    )
+    ocr_cache_size: int = Field(
+        default=4096, ge=0, description="Number of OCR transcripts kept in memory, keyed by image hash."
+    )
+    result_cache_path: Optional[Path] = Field(
+        default=None,
+        description="Optional SQLite file persisting analysis results and OCR transcripts across restarts.",
+    )
+    result_cache_max_rows: Optional[int] = Field(
+        default=100_000, ge=1, description="Rows kept per table in the SQLite cache; the oldest are pruned first."
+    )
+    result_cache_ttl_seconds: Optional[float] = Field(
+        default=None, gt=0, description="Optional age after which cached results and OCR transcripts expire."
+    )
+    vector_index: Literal["brute", "ivf"] = Field(
+        default="brute",
+        description="KB search backend: exact brute force, or an IVF index built by 'python -m app.cli.build_index'.",
+    )
+    ivf_nprobe: int = Field(
+        default=8, ge=1, description="IVF buckets scanned per query; higher trades latency for recall."
+    )
+    embedding_storage: Literal["float32", "float16", "int8"] = Field(
+        default="float32",
+        description="Precision of the resident KB matrix scanned by brute-force search. With a KB store, compressed "
+        "scans are rescored against the memory-mapped full-precision rows; a legacy pickle/tensor KB keeps only "
+        "the compressed matrix and is not rescored.",
+    )
+    rescore_candidates: int = Field(
+        default=64, ge=0, description="Compressed-scan candidates rescored at full precision (0 disables rescoring)."
+    )
+    embedding_cache_size: int = Field(
+        default=4096, ge=0, description="Number of query embeddings kept in the LRU cache (0 disables it)."
+    )
+    embedding_cache_ttl_seconds: Optional[float] = Field(
+        default=None, gt=0, description="Optional time-to-live for cached query embeddings."
+    )
 
     class Config:
         env_file = ".env"
@@ -79,6 +259,18 @@ class Settings(BaseSettings):
     def _expand_path(cls, value: Path) -> Path:  # noqa: N805
         return value.expanduser().resolve()
 
+    @validator("ocr_backends")
+    def _check_ocr_backends(cls, value: str) -> str:  # noqa: N805
+        names = [name.strip().lower() for name in value.split(",") if name.strip()]
+        unknown = sorted(set(names) - {"gemini", "tesseract", "stub"})
+        if not names or unknown or len(set(names)) != len(names):
+            raise ValueError("ocr_backends must list distinct backends from: gemini, tesseract, stub.")
+        return ",".join(names)
+
+    @validator("kb_store_path", "result_cache_path", "ocr_roi_weights_path")
+    def _expand_optional_path(cls, value: Optional[Path]) -> Optional[Path]:  # noqa: N805
+        return value.expanduser().resolve() if value is not None else None
+
 
 @lru_cache()
 def get_settings() -> Settings:
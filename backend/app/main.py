@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from .config import get_settings
-from .routers import analysis, chatbot
+from .routers import admin, analysis, chatbot
+from .services.concurrency import StageSaturatedError
+from .services.kb_reload import get_kb_reloader
 from .services.knowledge_base import get_knowledge_base
 from .services.logo_detector import get_logo_detector
+from .services.metrics import render_metrics, server_timing_header, set_metrics_enabled, start_request_timings
+from .services.ocr import load_ocr_backends
+from .services.readiness import readiness, warm_up
 
 settings = get_settings()
+set_metrics_enabled(settings.metrics_enabled)
 
 app = FastAPI(
     title="Halal Product Identifier",
@@ -26,11 +35,44 @@ app.add_middleware(
 )
 
 
+if settings.metrics_enabled:
+    # Only installed when metrics are on, so disabled deployments keep the plain middleware stack.
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        timings = start_request_timings()
+        response = await call_next(request)
+        if timings:
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
-    # Initialise heavy resources once.
-    get_knowledge_base()
-    get_logo_detector()
+    # Heavy resources load per their configured mode; background loads let the worker start serving at once.
+    warm_up(
+        {
+            "knowledge_base": get_knowledge_base,
+            "logo_detector": get_logo_detector,
+            "ocr": load_ocr_backends,
+        },
+        {
+            "knowledge_base": settings.kb_load_mode,
+            "logo_detector": settings.detector_load_mode,
+            "ocr": settings.ocr_load_mode,
+        },
+    )
+    if settings.kb_watch_interval_seconds:
+        get_kb_reloader().start_watching(settings.kb_watch_interval_seconds)
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    get_kb_reloader().stop_watching()
+
+
+@app.exception_handler(StageSaturatedError)
+async def stage_saturated_handler(request: Request, exc: StageSaturatedError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 
 @app.get("/healthz", tags=["health"])
@@ -38,8 +80,27 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/readyz", tags=["health"])
+async def readiness_check() -> JSONResponse:
+    ready, components = readiness()
+    failed = any(component["state"] == "failed" for component in components.values())
+    content: Dict[str, Any] = {
+        "status": "ready" if ready else ("failed" if failed else "loading"),
+        "components": components,
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    if not settings.metrics_enabled:
+        return PlainTextResponse("Metrics are disabled; set HALAL_METRICS_ENABLED=true.\n", status_code=404)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(analysis.router)
 app.include_router(chatbot.router)
+app.include_router(admin.router)
 
 
 __all__ = ["app"]
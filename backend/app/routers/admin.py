@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
+
+from ..config import get_settings
+from ..services.concurrency import run_inference
+from ..services.kb_reload import get_kb_reloader
+from ..services.knowledge_base import current_knowledge_base, get_knowledge_base
+from ..services.logo_detector import get_logo_detector
+from ..services.ocr import get_ocr_chain
+from ..services.result_cache import get_ocr_cache, get_result_cache
+
+
+def _require_admin_token(authorization: Optional[str] = Header(default=None)) -> None:
+    """
+    Admin endpoints exist only when ``HALAL_ADMIN_TOKEN`` is set, and then require it as a bearer token.
+    """
+
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, supplied = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip().encode(), expected.encode()):
+        raise HTTPException(
+            status_code=401, detail="Invalid or missing admin token.", headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(_require_admin_token)])
+
+
+@router.get("/stats")
+async def service_stats() -> Dict[str, Any]:
+    kb = await run_inference(get_knowledge_base)
+    detector = await run_inference(get_logo_detector)
+    batchers = {
+        name: batcher.stats().as_dict()
+        for name, batcher in (("embedder", kb.encode_batcher), ("detector", detector.batcher))
+        if batcher is not None
+    }
+    return {
+        "embedding_cache": kb.embedding_cache.stats().as_dict(),
+        "result_cache": get_result_cache().stats(),
+        "ocr_cache": get_ocr_cache().stats(),
+        "batching": batchers,
+        "ocr_backends": get_ocr_chain().stats(),
+    }
+
+
+@router.get("/kb")
+async def knowledge_base_status() -> Dict[str, Any]:
+    active = current_knowledge_base()
+    return {
+        "active_version": active.version if active is not None else None,
+        "reload": get_kb_reloader().status().as_dict(),
+    }
+
+
+@router.post("/kb/reload")
+async def reload_knowledge_base(wait: bool = False) -> JSONResponse:
+    """
+    Rebuild the KB from the artefacts on disk and swap it in without interrupting in-flight requests.
+
+    With ``wait=true`` the response is sent once the new KB is active (or the reload failed); otherwise
+    the reload continues in the background and ``GET /api/admin/kb`` reports its progress. Each worker
+    process reloads independently; with several workers prefer ``HALAL_KB_WATCH_INTERVAL_SECONDS``.
+    """
+
+    future = get_kb_reloader().request(trigger="admin")
+    if not wait:
+        return JSONResponse(status_code=202, content=get_kb_reloader().status().as_dict())
+
+    status = await asyncio.wrap_future(future)
+    if status.state == "failed":
+        raise HTTPException(status_code=500, detail=f"Knowledge base reload failed: {status.error}")
+    return JSONResponse(status_code=200, content=status.as_dict())
+
+
+__all__ = ["router"]
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
-from pathlib import Path
-import shutil
-import tempfile
+import json
+from typing import Any, AsyncIterator, List, Literal, Optional
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
 
-from ..schemas.analysis import AnalysisResultSchema
-from ..services.analysis import analyse_image
+from ..config import get_settings
+from ..schemas.analysis import (
+    AnalysisResultSchema,
+    BatchAnalysisItemSchema,
+    BatchAnalysisResponseSchema,
+    IngredientMatchSchema,
+)
+from ..services.analysis import (
+    AnalysisEvent,
+    AnalysisResult,
+    analyse_image_async,
+    analyse_image_stream,
+    analyse_images_async,
+)
+from ..services.concurrency import StageSaturatedError
+from ..services.knowledge_base import IngredientMatch
+from ..services.result_cache import image_digest
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
@@ -17,31 +32,149 @@ async def analyze_product(
     file: UploadFile = File(..., description="Product label image to analyse."),
     confidence_threshold: float = 0.5,
 ) -> AnalysisResultSchema:
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Filename is required.")
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Only image uploads are supported.")
-
-    suffix = Path(file.filename).suffix or ".png"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        temp_path = Path(tmp.name)
-        try:
-            shutil.copyfileobj(file.file, tmp)
-        finally:
-            file.file.close()
+    error = _validate_upload(file)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
+    data = await _read_upload(file)
     try:
-        result = analyse_image(temp_path, confidence_threshold=confidence_threshold)
+        result = await analyse_image_async(
+            data,
+            confidence_threshold=confidence_threshold,
+            image_digest=image_digest(data),
+        )
+    except StageSaturatedError:
+        raise
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    return _to_schema(result)
+
+
+@router.post("/analyze/stream")
+async def analyze_product_stream(
+    request: Request,
+    file: UploadFile = File(..., description="Product label image to analyse."),
+    confidence_threshold: float = 0.5,
+    stream_format: Optional[Literal["ndjson", "sse"]] = Query(default=None, alias="format"),
+) -> StreamingResponse:
+    """
+    Stream the analysis stage by stage: ``logo``, then ``ocr``, ``ingredients``, one ``ingredient`` event
+    per match and finally ``result`` (same body as ``/api/analyze``), or ``error`` with a ``status_code``.
+
+    Events are newline-delimited JSON objects (``{"event": ..., "data": ...}``) by default, or server-sent
+    events with ``format=sse`` or ``Accept: text/event-stream``.
+    """
+
+    error = _validate_upload(file)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    if stream_format is None:
+        stream_format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+
+    data = await _read_upload(file)
+    events = _stream_events(data, confidence_threshold, stream_format)
+    if stream_format == "sse":
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+    return StreamingResponse(events, media_type="application/x-ndjson")
+
+
+@router.post("/analyze/batch", response_model=BatchAnalysisResponseSchema)
+async def analyze_products(
+    files: List[UploadFile] = File(..., description="Product label images to analyse."),
+    confidence_threshold: float = 0.5,
+) -> BatchAnalysisResponseSchema:
+    settings = get_settings()
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one image is required.")
+    if len(files) > settings.max_batch_images:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.max_batch_images} images can be analysed per batch.",
+        )
+
+    items: List[BatchAnalysisItemSchema] = []
+    uploads: List[Optional[bytes]] = []
+    for file in files:
+        error = _validate_upload(file)
+        items.append(BatchAnalysisItemSchema(filename=file.filename or "", error=error))
+        uploads.append(None if error else await _read_upload(file))
+
+    valid = [(position, data) for position, data in enumerate(uploads) if data is not None]
+    outcomes = await analyse_images_async(
+        [data for _, data in valid],
+        confidence_threshold=confidence_threshold,
+        image_digests=[image_digest(data) for _, data in valid],
+    )
+
+    for (position, _), outcome in zip(valid, outcomes):
+        if isinstance(outcome, AnalysisResult):
+            items[position].result = _to_schema(outcome)
+        else:
+            items[position].error = str(outcome) or outcome.__class__.__name__
+
+    return BatchAnalysisResponseSchema(results=items)
+
+
+def _validate_upload(file: UploadFile) -> Optional[str]:
+    if not file.filename:
+        return "Filename is required."
+    if not file.content_type or not file.content_type.startswith("image/"):
+        return "Only image uploads are supported."
+    return None
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    try:
+        return await file.read()
     finally:
-        try:
-            temp_path.unlink(missing_ok=True)
-        except Exception:  # noqa: BLE001
-            pass
+        await file.close()
+
+
+async def _stream_events(data: bytes, confidence_threshold: float, stream_format: str) -> AsyncIterator[str]:
+    # The response has already started with a 200, so failures are reported as a final ``error`` event.
+    try:
+        async for event in analyse_image_stream(
+            data, confidence_threshold=confidence_threshold, image_digest=image_digest(data)
+        ):
+            yield _format_event(event.stage, _event_payload(event), stream_format)
+    except StageSaturatedError as exc:
+        yield _format_event("error", {"detail": str(exc), "status_code": 503}, stream_format)
+    except ValueError as exc:
+        yield _format_event("error", {"detail": str(exc), "status_code": 400}, stream_format)
+    except Exception as exc:  # noqa: BLE001
+        yield _format_event("error", {"detail": str(exc), "status_code": 500}, stream_format)
 
+
+def _event_payload(event: AnalysisEvent) -> Any:
+    if event.stage == "result":
+        return _to_schema(event.data).model_dump(mode="json")
+    if event.stage == "ingredient":
+        return _match_schema(event.data).model_dump(mode="json")
+    return event.data
+
+
+def _format_event(stage: str, payload: Any, stream_format: str) -> str:
+    if stream_format == "sse":
+        return f"event: {stage}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"event": stage, "data": payload}) + "\n"
+
+
+def _match_schema(match: IngredientMatch) -> IngredientMatchSchema:
+    return IngredientMatchSchema(
+        ingredient=match.ingredient,
+        status=match.status,
+        score=match.score,
+        matched_text=match.matched_text,
+        tier=match.tier,
+        components=[_match_schema(component) for component in match.components],
+    )
+
+
+def _to_schema(result: AnalysisResult) -> AnalysisResultSchema:
     return AnalysisResultSchema(
         logo_detected=result.logo_detected,
         status=result.status,
@@ -50,9 +183,10 @@ async def analyze_product(
         ingredients=result.ingredients,
         ingredients_block=result.ingredients_block,
         ocr_text=result.ocr_text or None,
+        tier=result.tier,
+        ingredient_matches=[_match_schema(match) for match in result.ingredient_matches],
+        kb_version=result.kb_version,
     )
 
 
 __all__ = ["router"]
-
-
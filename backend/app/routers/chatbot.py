@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 
 from ..schemas.analysis import ChatRequest, ChatResponseSchema, ChatResultSchema
 from ..services.chatbot import answer_question
+from ..services.concurrency import run_batched
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -13,13 +14,19 @@ async def chat_with_kb(payload: ChatRequest) -> ChatResponseSchema:
     if not payload.question.strip():
         raise HTTPException(status_code=400, detail="Question must not be empty.")
 
-    response = answer_question(payload.question)
+    response = await run_batched(answer_question, payload.question)
     return ChatResponseSchema(
         question=response.query,
         results=[
-            ChatResultSchema(score=result.score, status=result.status, matched_text=result.matched_text)
+            ChatResultSchema(
+                score=result.score,
+                status=result.status,
+                matched_text=result.matched_text,
+                tier=result.tier,
+            )
             for result in response.results
         ],
+        kb_version=response.kb_version,
     )
 
 
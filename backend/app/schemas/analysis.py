@@ -5,6 +5,18 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
+class IngredientMatchSchema(BaseModel):
+    ingredient: str = Field(..., description="Ingredient as parsed from the label.")
+    status: str = Field(..., description="Ingredient classification (halal, haram, mushbooh, doubtful, unknown).")
+    score: float = Field(..., ge=0.0, le=1.0, description="Cosine similarity of the best KB match.")
+    matched_text: str = Field(..., description="Original KB entry that matched the ingredient.")
+    tier: str = Field(default="semantic", description="Lookup tier that answered (exact, ecode, fuzzy, semantic).")
+    components: List[IngredientMatchSchema] = Field(
+        default_factory=list,
+        description="Matches of the sub-ingredients and E-numbers the ingredient was looked up as, if any.",
+    )
+
+
 class AnalysisResultSchema(BaseModel):
     logo_detected: bool = Field(
         ..., description="True when the halal logo was detected and the product is automatically halal."
@@ -17,6 +29,23 @@ class AnalysisResultSchema(BaseModel):
         default=None, description="Raw ingredients block extracted from the OCR text."
     )
     ocr_text: Optional[str] = Field(default=None, description="Full OCR transcript of the label (if collected).")
+    tier: Optional[str] = Field(
+        default=None, description="Lookup tier that produced the deciding KB match (exact, ecode, fuzzy, semantic)."
+    )
+    ingredient_matches: List[IngredientMatchSchema] = Field(
+        default_factory=list, description="Per-ingredient KB matches that produced the final verdict."
+    )
+    kb_version: Optional[str] = Field(default=None, description="Version of the knowledge base that was consulted.")
+
+
+class BatchAnalysisItemSchema(BaseModel):
+    filename: str = Field(..., description="Name of the uploaded image.")
+    result: Optional[AnalysisResultSchema] = Field(default=None, description="Analysis result when it succeeded.")
+    error: Optional[str] = Field(default=None, description="Reason the image could not be analysed.")
+
+
+class BatchAnalysisResponseSchema(BaseModel):
+    results: List[BatchAnalysisItemSchema] = Field(..., description="One entry per uploaded image, in upload order.")
 
 
 class ChatRequest(BaseModel):
@@ -27,18 +56,23 @@ class ChatResultSchema(BaseModel):
     score: float = Field(..., ge=0.0, le=1.0)
     status: str
     matched_text: str
+    tier: str = "semantic"
 
 
 class ChatResponseSchema(BaseModel):
     question: str
     results: List[ChatResultSchema]
+    kb_version: Optional[str] = None
 
 
 __all__ = [
     "AnalysisResultSchema",
+    "BatchAnalysisItemSchema",
+    "BatchAnalysisResponseSchema",
     "ChatRequest",
     "ChatResponseSchema",
     "ChatResultSchema",
+    "IngredientMatchSchema",
 ]
 
 
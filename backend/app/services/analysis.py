@@ -4,17 +4,30 @@ from __future__ import annotations
 Business logic for analysing product images and classifying halal status.
 """
 
-from dataclasses import dataclass
-from pathlib import Path
-from typing import List, Optional
-import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from ..config import Settings, get_settings
-from .knowledge_base import KnowledgeBase, get_knowledge_base
-from .logo_detector import get_logo_detector
-from .ocr import extract_text_from_image
+from PIL import Image
 
-INGREDIENTS_BLOCK_RE = re.compile(r"ingredients.*?\.", re.IGNORECASE | re.DOTALL)
+from ..config import Settings, get_settings
+from .concurrency import get_stage_limiter, run_batched, run_inference
+from .imaging import ImageSource, fit_to_max_side, load_image
+from .ingredient_parser import IngredientBlock, parse_ingredient_blocks
+from .knowledge_base import (
+    EMBEDDING_MODEL_NAME,
+    IngredientMatch,
+    KnowledgeBase,
+    SemanticMatchResult,
+    get_knowledge_base,
+    normalize_text_for_matching,
+)
+from .logo_detector import LogoDetector, get_logo_detector
+from .metrics import record_outcome, stage_timer
+from .ocr import OCRChain, OCRError, OCRResult, get_ocr_chain
+from .ocr_region import crop_to_ingredients, ocr_input_tag
+from .result_cache import ContentCache, get_ocr_cache, get_result_cache
 
 
 @dataclass
@@ -26,79 +39,706 @@ class AnalysisResult:
     status: str
     score: float
     matched_text: str
+    ingredient_matches: List[IngredientMatch] = field(default_factory=list)
+    tier: Optional[str] = None
+    kb_version: Optional[str] = None
+
+
+@dataclass
+class AnalysisEvent:
+    """
+    One step of a streamed analysis.
+
+    ``stage`` is ``logo`` (``{"logo_detected": bool}``), ``ocr`` (``{"ocr_text": str}``), ``ingredients``
+    (``{"ingredients_block": str, "ingredients": [...]}``), ``ingredient`` (an ``IngredientMatch``) or
+    ``result`` (the final ``AnalysisResult``, always the last event).
+    """
+
+    stage: str
+    data: Any
+
+
+def find_ingredient_block(full_text: str) -> Optional[IngredientBlock]:
+    """
+    The first ingredient statement in an OCR transcript (labels in several languages carry one each).
+    """
+
+    blocks = parse_ingredient_blocks(full_text)
+    return blocks[0] if blocks else None
 
 
 def find_ingredients_block(full_text: str) -> Optional[str]:
-    match = INGREDIENTS_BLOCK_RE.search(full_text)
-    if match:
-        return match.group(0).strip()
-    return None
+    block = find_ingredient_block(full_text)
+    return block.text if block is not None else None
 
 
 def parse_ingredients_list(block: str) -> List[str]:
     if not block:
         return []
+    blocks = parse_ingredient_blocks(block, implicit_header=True)
+    return blocks[0].declared_texts() if blocks else []
 
-    flat_text = block.replace("\n", " ")
-    cleaned_text = re.sub(r"^ingredients.*?(?::|\))\s*", "", flat_text, flags=re.IGNORECASE | re.DOTALL)
-    cleaned_text = cleaned_text.strip().removesuffix(".")
-
-    ingredients: List[str] = []
-    current = ""
-    depth = 0
-    for char in cleaned_text:
-        if char == "(":
-            depth += 1
-        elif char == ")":
-            depth = max(0, depth - 1)
-
-        if char == "," and depth == 0:
-            ingredients.append(current.strip())
-            current = ""
+
+def analyse_image(
+    image: ImageSource,
+    *,
+    settings: Settings | None = None,
+    knowledge_base: KnowledgeBase | None = None,
+    confidence_threshold: float = 0.5,
+    image_digest: Optional[str] = None,
+) -> AnalysisResult:
+    """
+    Analyse one image (a path, raw upload bytes or a decoded image).
+
+    The image is decoded once and shared by detection and OCR. When ``image_digest`` is given, results
+    and OCR text are served from and stored in the content-addressed caches.
+    """
+
+    settings = settings or get_settings()
+    knowledge_base = knowledge_base or get_knowledge_base()
+
+    detector = get_logo_detector()
+    ocr = get_ocr_chain(settings)
+    ocr_tag = _ocr_cache_tag(ocr, settings)
+    cache_key = _result_cache_key(image_digest, confidence_threshold, settings, knowledge_base, detector, ocr_tag)
+    cached = _cached_result(cache_key)
+    if cached is not None:
+        return cached
+
+    image = _decode(image, settings)
+    logo_detected = detector.detect(image, confidence_threshold=confidence_threshold)
+
+    if logo_detected:
+        return _remember_result(cache_key, _logo_result(knowledge_base.version))
+
+    ocr_text = _cached_ocr_text(image_digest, ocr_tag)
+    if ocr_text is None:
+        recognised = _recognise(ocr, image, settings)
+        ocr_text = recognised.text
+        if recognised.degraded:
+            cache_key = None
         else:
-            current += char
+            _remember_ocr_text(image_digest, ocr_tag, ocr_text)
+    ingredients_block, ingredients = _extract_ingredients(ocr_text)
+    match, ingredient_matches = _classify(knowledge_base, ingredients, settings)
+    result = _classified_result(
+        ocr_text, ingredients_block, ingredients, match, ingredient_matches, knowledge_base.version
+    )
+    return _remember_result(cache_key, result)
 
-    if current.strip():
-        ingredients.append(current.strip())
 
-    return [item for item in ingredients if item]
+def classify_ocr_text(
+    ocr_text: str,
+    *,
+    settings: Settings | None = None,
+    knowledge_base: KnowledgeBase | None = None,
+) -> AnalysisResult:
+    """
+    Classify an existing OCR transcript without touching the image, e.g. to re-check a catalogue after a
+    KB update. Raises ``ValueError`` like :func:`analyse_image` when the text has no ingredients block.
+    """
 
+    settings = settings or get_settings()
+    knowledge_base = knowledge_base or get_knowledge_base()
+    ingredients_block, ingredients = _extract_ingredients(ocr_text)
+    match, ingredient_matches = _classify(knowledge_base, ingredients, settings)
+    return _classified_result(
+        ocr_text, ingredients_block, ingredients, match, ingredient_matches, knowledge_base.version
+    )
 
-def analyse_image(
-    image_path: Path,
+
+def cached_ocr_text(image_digest: str, settings: Settings | None = None) -> Optional[str]:
+    """
+    The cached transcript of an image for the configured OCR chain and input preparation, if any.
+    """
+
+    settings = settings or get_settings()
+    return _cached_ocr_text(image_digest, _ocr_cache_tag(get_ocr_chain(settings), settings))
+
+
+async def analyse_image_async(
+    image: ImageSource,
     *,
     settings: Settings | None = None,
     knowledge_base: KnowledgeBase | None = None,
     confidence_threshold: float = 0.5,
+    image_digest: Optional[str] = None,
 ) -> AnalysisResult:
+    """
+    Event-loop friendly :func:`analyse_image`.
+
+    Detection and KB matching run on the bounded inference executor while OCR is awaited natively, and
+    each stage enforces its own concurrency limit (``StageSaturatedError`` when its queue is full).
+    """
+
+    result: Optional[AnalysisResult] = None
+    async for event in analyse_image_stream(
+        image,
+        settings=settings,
+        knowledge_base=knowledge_base,
+        confidence_threshold=confidence_threshold,
+        image_digest=image_digest,
+    ):
+        if event.stage == "result":
+            result = event.data
+    if result is None:
+        raise RuntimeError("Image was not analysed.")
+    return result
+
+
+async def analyse_image_stream(
+    image: ImageSource,
+    *,
+    settings: Settings | None = None,
+    knowledge_base: KnowledgeBase | None = None,
+    confidence_threshold: float = 0.5,
+    image_digest: Optional[str] = None,
+) -> AsyncIterator[AnalysisEvent]:
+    """
+    :func:`analyse_image_async` as a sequence of :class:`AnalysisEvent` objects, yielded as each stage ends.
+
+    The logo verdict arrives after detection alone, so clients can render it (or stop, when a logo was
+    found) without waiting for OCR. A cached result is yielded directly as the ``result`` event. Errors
+    propagate from the iterator exactly as they are raised by :func:`analyse_image_async`.
+    """
+
     settings = settings or get_settings()
-    knowledge_base = knowledge_base or get_knowledge_base()
+    # The first call may still be loading a model; wait for it off the event loop.
+    knowledge_base = knowledge_base or await run_inference(get_knowledge_base)
 
-    detector = get_logo_detector()
-    logo_detected = detector.detect(image_path, confidence_threshold=confidence_threshold)
+    detector = await run_inference(get_logo_detector)
+    ocr = get_ocr_chain(settings)
+    ocr_tag = _ocr_cache_tag(ocr, settings)
+    cache_key = _result_cache_key(image_digest, confidence_threshold, settings, knowledge_base, detector, ocr_tag)
+    cached = (await _cached_results_async([cache_key]))[0]
+    if cached is not None:
+        yield AnalysisEvent("result", cached)
+        return
+
+    image = await run_inference(_decode, image, settings)
+    logo_detected = await run_batched(detector.detect, image, confidence_threshold=confidence_threshold)
+    yield AnalysisEvent("logo", {"logo_detected": logo_detected})
 
     if logo_detected:
-        return AnalysisResult(
-            logo_detected=True,
-            ocr_text="",
-            ingredients_block=None,
-            ingredients=[],
-            status="halal",
-            score=1.0,
-            matched_text="Certified halal logo detected.",
+        result = _logo_result(knowledge_base.version)
+        _remember_result(cache_key, result, background=True)
+        yield AnalysisEvent("result", result)
+        return
+
+    ocr_text = (await _cache_get_many_async(get_ocr_cache(), [_ocr_cache_key(image_digest, ocr_tag)]))[0]
+    if ocr_text is None:
+        recognised = await _recognise_async(ocr, image, settings)
+        ocr_text = recognised.text
+        if recognised.degraded:
+            cache_key = None
+        else:
+            _remember_ocr_text(image_digest, ocr_tag, ocr_text, background=True)
+    yield AnalysisEvent("ocr", {"ocr_text": ocr_text})
+
+    ingredients_block, ingredients = _extract_ingredients(ocr_text)
+    yield AnalysisEvent("ingredients", {"ingredients_block": ingredients_block, "ingredients": ingredients})
+
+    match, ingredient_matches = await run_batched(_classify, knowledge_base, ingredients, settings)
+    for ingredient_match in ingredient_matches:
+        yield AnalysisEvent("ingredient", ingredient_match)
+    result = _classified_result(
+        ocr_text, ingredients_block, ingredients, match, ingredient_matches, knowledge_base.version
+    )
+    _remember_result(cache_key, result, background=True)
+    yield AnalysisEvent("result", result)
+
+
+def analyse_images(
+    images: Sequence[ImageSource],
+    *,
+    settings: Settings | None = None,
+    knowledge_base: KnowledgeBase | None = None,
+    confidence_threshold: float = 0.5,
+    image_digests: Optional[Sequence[Optional[str]]] = None,
+) -> List[AnalysisResult | Exception]:
+    """
+    Analyse several images at once, returning either a result or the raised exception for each image.
+
+    Logo detection runs as one batched forward pass, OCR fans out in parallel only for images without a
+    logo, and every resulting ingredient list is classified in a single embedding pass. Images with a
+    digest in ``image_digests`` are served from the result cache when possible.
+    """
+
+    settings = settings or get_settings()
+    knowledge_base = knowledge_base or get_knowledge_base()
+    detector = get_logo_detector()
+    ocr = get_ocr_chain(settings)
+    batch = _Batch.start(len(images), image_digests, confidence_threshold, settings, knowledge_base, detector, ocr)
+    batch.use_cached_results(_cached_result(cache_key) for cache_key in batch.cache_keys)
+    needs_text = _detect_batch(batch, images, detector, settings, knowledge_base)
+    to_recognise = batch.use_cached_ocr(
+        needs_text, [_cached_ocr_text(batch.digests[position], batch.ocr_tag) for position in needs_text]
+    )
+    if to_recognise:
+        with ThreadPoolExecutor(max_workers=min(settings.ocr_max_concurrency, len(to_recognise))) as pool:
+            futures = {
+                position: pool.submit(_recognise, ocr, batch.decoded[position], settings) for position in to_recognise
+            }
+            for position, future in futures.items():
+                try:
+                    batch.remember_ocr(position, future.result())
+                except Exception as exc:  # noqa: BLE001
+                    batch.outcomes[position] = exc
+    _classify_batch(batch, knowledge_base, settings)
+    batch.remember()
+    return batch.results()
+
+
+async def analyse_images_async(
+    images: Sequence[ImageSource],
+    *,
+    settings: Settings | None = None,
+    knowledge_base: KnowledgeBase | None = None,
+    confidence_threshold: float = 0.5,
+    image_digests: Optional[Sequence[Optional[str]]] = None,
+) -> List[AnalysisResult | Exception]:
+    """
+    Event-loop friendly :func:`analyse_images`.
+
+    Decoding with detection, and classification, each take one call on the inference executor; OCR is
+    awaited natively under the ``ocr`` stage limit, so a batch never holds an inference worker while it
+    waits on OCR. An image refused by a saturated OCR stage gets ``StageSaturatedError`` as its outcome.
+    SQLite cache reads run on worker threads and writes in the background, never on the event loop.
+    """
+
+    settings = settings or get_settings()
+    knowledge_base = knowledge_base or await run_inference(get_knowledge_base)
+    detector = await run_inference(get_logo_detector)
+    ocr = get_ocr_chain(settings)
+    batch = _Batch.start(len(images), image_digests, confidence_threshold, settings, knowledge_base, detector, ocr)
+    batch.use_cached_results(await _cached_results_async(batch.cache_keys))
+    needs_text = await run_batched(_detect_batch, batch, images, detector, settings, knowledge_base)
+    ocr_keys = [_ocr_cache_key(batch.digests[position], batch.ocr_tag) for position in needs_text]
+    to_recognise = batch.use_cached_ocr(needs_text, await _cache_get_many_async(get_ocr_cache(), ocr_keys))
+
+    # One batch should not claim the whole OCR queue for itself.
+    fan_out = asyncio.Semaphore(settings.ocr_max_concurrency)
+
+    async def recognise(position: int) -> OCRResult:
+        async with fan_out:
+            return await _recognise_async(ocr, batch.decoded[position], settings)
+
+    outcomes = await asyncio.gather(*(recognise(position) for position in to_recognise), return_exceptions=True)
+    for position, outcome in zip(to_recognise, outcomes):
+        if isinstance(outcome, Exception):
+            batch.outcomes[position] = outcome
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            batch.remember_ocr(position, outcome)
+    await run_batched(_classify_batch, batch, knowledge_base, settings)
+    batch.remember(background=True)
+    return batch.results()
+
+
+@dataclass
+class _Batch:
+    """
+    Per-image state of a batch analysis as it moves through the stages; ``outcomes`` holds a result or
+    exception once an image is done. The stages never touch the caches themselves: the caller looks entries
+    up before them and stores ``fresh_results`` / ``fresh_ocr`` afterwards with :meth:`remember`.
+    """
+
+    digests: List[Optional[str]]
+    cache_keys: List[Optional[str]]
+    confidence_threshold: float
+    ocr_tag: str
+    outcomes: List[AnalysisResult | Exception | None]
+    decoded: Dict[int, Image.Image] = field(default_factory=dict)
+    ocr_texts: Dict[int, str] = field(default_factory=dict)
+    fresh_results: List[int] = field(default_factory=list)
+    fresh_ocr: List[int] = field(default_factory=list)
+
+    @classmethod
+    def start(
+        cls,
+        size: int,
+        image_digests: Optional[Sequence[Optional[str]]],
+        confidence_threshold: float,
+        settings: Settings,
+        knowledge_base: KnowledgeBase,
+        detector: LogoDetector,
+        ocr: OCRChain,
+    ) -> _Batch:
+        digests = list(image_digests) if image_digests is not None else [None] * size
+        ocr_tag = _ocr_cache_tag(ocr, settings)
+        cache_keys = [
+            _result_cache_key(digest, confidence_threshold, settings, knowledge_base, detector, ocr_tag)
+            for digest in digests
+        ]
+        return cls(digests, cache_keys, confidence_threshold, ocr_tag, [None] * size)
+
+    def use_cached_results(self, cached: Iterable[Optional[AnalysisResult]]) -> None:
+        self.outcomes = list(cached)
+
+    def use_cached_ocr(self, positions: List[int], cached_texts: Sequence[Optional[str]]) -> List[int]:
+        """
+        Take the cached transcripts for ``positions``; returns the positions that still need OCR.
+        """
+
+        to_recognise: List[int] = []
+        for position, cached_text in zip(positions, cached_texts):
+            if cached_text is not None:
+                self.ocr_texts[position] = cached_text
+            else:
+                to_recognise.append(position)
+        return to_recognise
+
+    def finish(self, position: int, result: AnalysisResult) -> None:
+        self.outcomes[position] = result
+        self.fresh_results.append(position)
+
+    def remember_ocr(self, position: int, recognised: OCRResult) -> None:
+        self.ocr_texts[position] = recognised.text
+        if recognised.degraded:
+            self.cache_keys[position] = None
+        else:
+            self.fresh_ocr.append(position)
+
+    def remember(self, *, background: bool = False) -> None:
+        for position in self.fresh_ocr:
+            ocr_text = self.ocr_texts[position]
+            _remember_ocr_text(self.digests[position], self.ocr_tag, ocr_text, background=background)
+        for position in self.fresh_results:
+            _remember_result(self.cache_keys[position], self.outcomes[position], background=background)
+
+    def results(self) -> List[AnalysisResult | Exception]:
+        return [
+            outcome if outcome is not None else RuntimeError("Image was not analysed.") for outcome in self.outcomes
+        ]
+
+
+def _detect_batch(
+    batch: _Batch,
+    images: Sequence[ImageSource],
+    detector: LogoDetector,
+    settings: Settings,
+    knowledge_base: KnowledgeBase,
+) -> List[int]:
+    """
+    Decode the uncached images and run logo detection over them in one pass. Returns the positions without
+    a logo, which need a transcript.
+    """
+
+    for position, outcome in enumerate(batch.outcomes):
+        if outcome is not None:
+            continue
+        try:
+            batch.decoded[position] = _decode(images[position], settings)
+        except (ValueError, OSError) as exc:
+            batch.outcomes[position] = exc
+
+    needs_text: List[int] = []
+    for position, logo_detected in _detect_each(detector, batch.decoded, batch.confidence_threshold).items():
+        if isinstance(logo_detected, Exception):
+            batch.outcomes[position] = logo_detected
+        elif logo_detected:
+            batch.finish(position, _logo_result(knowledge_base.version))
+        else:
+            needs_text.append(position)
+    return needs_text
+
+
+def _classify_batch(batch: _Batch, knowledge_base: KnowledgeBase, settings: Settings) -> None:
+    """
+    Parse every transcript and classify all resulting ingredient lists in a single embedding pass.
+    """
+
+    parsed: Dict[int, Tuple[str, List[str]]] = {}
+    for position, ocr_text in batch.ocr_texts.items():
+        if batch.outcomes[position] is not None:
+            continue
+        try:
+            ingredients_block, ingredients = _extract_ingredients(ocr_text)
+            if not any(normalize_text_for_matching(ing) for ing in ingredients):
+                record_outcome("invalid")
+                raise ValueError("Failed to normalise ingredient list for matching.")
+            parsed[position] = (ingredients_block, ingredients)
+        except ValueError as exc:
+            batch.outcomes[position] = exc
+
+    if not parsed:
+        return
+    positions = list(parsed)
+    try:
+        if settings.per_ingredient_matching:
+            classifications = knowledge_base.classify_ingredient_lists(
+                [parsed[position][1] for position in positions],
+                semantic_threshold=settings.semantic_threshold,
+            )
+            verdicts = [(item.verdict, item.matches) for item in classifications]
+        else:
+            verdicts = [
+                (
+                    knowledge_base.classify_ingredient_list(
+                        parsed[position][1], semantic_threshold=settings.semantic_threshold
+                    ),
+                    [],
+                )
+                for position in positions
+            ]
+    except Exception as exc:  # noqa: BLE001
+        for position in positions:
+            if isinstance(exc, ValueError):
+                record_outcome("invalid")
+            batch.outcomes[position] = exc
+        return
+
+    for position, (match, ingredient_matches) in zip(positions, verdicts):
+        ingredients_block, ingredients = parsed[position]
+        batch.finish(
+            position,
+            _classified_result(
+                batch.ocr_texts[position],
+                ingredients_block,
+                ingredients,
+                match,
+                ingredient_matches,
+                knowledge_base.version,
+            ),
         )
 
-    ocr_text = extract_text_from_image(image_path, settings=settings)
-    ingredients_block = find_ingredients_block(ocr_text)
-    if not ingredients_block:
-        raise ValueError("Unable to locate an 'Ingredients' block in the extracted text.")
 
-    ingredients = parse_ingredients_list(ingredients_block)
-    if not ingredients:
-        raise ValueError("Failed to parse ingredients from the detected block.")
+def _result_cache_key(
+    image_digest: Optional[str],
+    confidence_threshold: float,
+    settings: Settings,
+    knowledge_base: KnowledgeBase,
+    detector: LogoDetector,
+    ocr_tag: str,
+) -> Optional[str]:
+    if image_digest is None:
+        return None
+    return ":".join(
+        [
+            image_digest,
+            f"{confidence_threshold:.4f}",
+            f"{settings.semantic_threshold:.4f}",
+            "per-ingredient" if settings.per_ingredient_matching else "joined",
+            "sub-ingredients" if settings.sub_ingredient_matching else "whole",
+            "lexical" if settings.lexical_index_enabled else "semantic",
+            f"fuzzy{settings.fuzzy_max_edit_distance}/{settings.fuzzy_min_length}",
+            knowledge_base.version,
+            detector.version,
+            EMBEDDING_MODEL_NAME,
+            ocr_tag,
+        ]
+    )
+
+
+def _cached_result(cache_key: Optional[str]) -> Optional[AnalysisResult]:
+    if cache_key is None:
+        return None
+    return _result_from_payload(get_result_cache().get(cache_key))
+
+
+async def _cached_results_async(cache_keys: Sequence[Optional[str]]) -> List[Optional[AnalysisResult]]:
+    return [_result_from_payload(payload) for payload in await _cache_get_many_async(get_result_cache(), cache_keys)]
+
+
+def _result_from_payload(payload: Optional[Dict[str, Any]]) -> Optional[AnalysisResult]:
+    if payload is None:
+        return None
+    record_outcome("cached")
+    payload = dict(payload)
+    matches = [IngredientMatch.from_dict(match) for match in payload.pop("ingredient_matches", [])]
+    return AnalysisResult(**payload, ingredient_matches=matches)
+
 
-    match = knowledge_base.classify_ingredient_list(ingredients, semantic_threshold=settings.semantic_threshold)
+def _remember_result(
+    cache_key: Optional[str], result: AnalysisResult, *, background: bool = False
+) -> AnalysisResult:
+    if cache_key is not None:
+        _cache_put(get_result_cache(), cache_key, asdict(result), background)
+    return result
+
+
+async def _cache_get_many_async(cache: ContentCache, keys: Sequence[Optional[str]]) -> List[Optional[Any]]:
+    """
+    :meth:`ContentCache.get` for event-loop code: memory hits are answered inline, and the SQLite lookups for
+    the rest share one worker thread, since they may wait on another process's write lock.
+    """
+
+    values = [cache.get_memory(key) if key is not None else None for key in keys]
+    misses = [position for position, key in enumerate(keys) if key is not None and values[position] is None]
+    if misses and cache.persistent:
+        found = await asyncio.to_thread(lambda: [cache.get_disk(keys[position]) for position in misses])
+        for position, value in zip(misses, found):
+            values[position] = value
+    return values
+
+
+def _cache_put(cache: ContentCache, key: str, value: Any, background: bool) -> None:
+    if not background:
+        cache.put(key, value)
+        return
+    # Called from the event loop: the memory tier is updated at once and the SQLite write runs on a worker
+    # thread without being awaited, so a locked database never holds up the response.
+    cache.put_memory(key, value)
+    if cache.persistent:
+        asyncio.get_running_loop().run_in_executor(None, cache.put_disk, key, value)
+
+
+def _decode(image: ImageSource, settings: Settings) -> Image.Image:
+    with stage_timer("decode"):
+        try:
+            return load_image(image, max_side=_working_max_side(settings))
+        except ValueError:
+            record_outcome("undecodable")
+            raise
+
+
+def _detect_each(
+    detector: LogoDetector, decoded: Dict[int, Image.Image], confidence_threshold: float
+) -> Dict[int, bool | Exception]:
+    """
+    Logo verdict per position from one batched pass. When the batch fails, each image is retried on its own
+    so only the one that actually breaks the detector reports an error.
+    """
+
+    positions = list(decoded)
+    try:
+        detections = detector.detect_many(
+            [decoded[position] for position in positions], confidence_threshold=confidence_threshold
+        )
+        return dict(zip(positions, detections))
+    except Exception as exc:  # noqa: BLE001
+        if len(positions) == 1:
+            return {positions[0]: exc}
+    verdicts: Dict[int, bool | Exception] = {}
+    for position in positions:
+        try:
+            verdicts[position] = detector.detect(decoded[position], confidence_threshold=confidence_threshold)
+        except Exception as exc:  # noqa: BLE001
+            verdicts[position] = exc
+    return verdicts
+
+
+def _working_max_side(settings: Settings) -> Optional[int]:
+    # Decode at the smallest size every stage still gets its full input resolution from. A located panel is
+    # cropped from the decoded image, so it only keeps its detail when that image is full size.
+    if not settings.ocr_max_side or settings.ocr_roi_mode != "off":
+        return None
+    return max(settings.ocr_max_side, settings.detector_image_size)
+
+
+def _ocr_cache_tag(ocr: OCRChain, settings: Settings) -> str:
+    input_tag = ocr_input_tag(settings)
+    return f"{ocr.version}:{input_tag}" if input_tag else ocr.version
+
+
+def _ocr_cache_key(image_digest: Optional[str], ocr_tag: str) -> Optional[str]:
+    # OCR is cached by image alone so threshold or KB changes never trigger a new OCR call.
+    return f"{image_digest}:{ocr_tag}" if image_digest is not None else None
+
+
+def _cached_ocr_text(image_digest: Optional[str], ocr_tag: str) -> Optional[str]:
+    cache_key = _ocr_cache_key(image_digest, ocr_tag)
+    return get_ocr_cache().get(cache_key) if cache_key is not None else None
 
+
+def _remember_ocr_text(
+    image_digest: Optional[str], ocr_tag: str, ocr_text: str, *, background: bool = False
+) -> None:
+    # Only the preferred backend's text is cached, so it is tried again once it recovers.
+    cache_key = _ocr_cache_key(image_digest, ocr_tag)
+    if cache_key is not None:
+        _cache_put(get_ocr_cache(), cache_key, ocr_text, background)
+
+
+def _recognise(ocr: OCRChain, image: Image.Image, settings: Settings) -> OCRResult:
+    """
+    OCR the located ingredients panel, falling back to the full image when no panel is found or its
+    transcript has no ingredients block.
+    """
+
+    crop = crop_to_ingredients(image, settings) if settings.ocr_roi_mode != "off" else None
+    if crop is not None:
+        try:
+            recognised = ocr.recognise(crop)
+        except OCRError:
+            recognised = None
+        if recognised is not None and find_ingredients_block(recognised.text):
+            return recognised
+    return ocr.recognise(fit_to_max_side(image, settings.ocr_max_side))
+
+
+async def _recognise_async(ocr: OCRChain, image: Image.Image, settings: Settings) -> OCRResult:
+    # Cropping and resizing run on the inference executor; only the OCR calls hold an OCR stage slot.
+    if settings.ocr_roi_mode != "off":
+        crop = await run_inference(crop_to_ingredients, image, settings)
+        if crop is not None:
+            try:
+                async with get_stage_limiter("ocr").slot():
+                    recognised = await ocr.recognise_async(crop)
+            except OCRError:
+                pass
+            else:
+                if find_ingredients_block(recognised.text):
+                    return recognised
+    if settings.ocr_max_side:
+        image = await run_inference(fit_to_max_side, image, settings.ocr_max_side)
+    async with get_stage_limiter("ocr").slot():
+        return await ocr.recognise_async(image)
+
+
+def _classify(
+    knowledge_base: KnowledgeBase,
+    ingredients: List[str],
+    settings: Settings,
+) -> Tuple[SemanticMatchResult, List[IngredientMatch]]:
+    try:
+        if settings.per_ingredient_matching:
+            classification = knowledge_base.classify_ingredients(
+                ingredients, semantic_threshold=settings.semantic_threshold
+            )
+            return classification.verdict, classification.matches
+        return (
+            knowledge_base.classify_ingredient_list(ingredients, semantic_threshold=settings.semantic_threshold),
+            [],
+        )
+    except ValueError:
+        record_outcome("invalid")
+        raise
+
+
+def _logo_result(kb_version: Optional[str] = None) -> AnalysisResult:
+    record_outcome("logo")
+    return AnalysisResult(
+        logo_detected=True,
+        ocr_text="",
+        ingredients_block=None,
+        ingredients=[],
+        status="halal",
+        score=1.0,
+        matched_text="Certified halal logo detected.",
+        kb_version=kb_version,
+    )
+
+
+def _extract_ingredients(ocr_text: str) -> Tuple[str, List[str]]:
+    with stage_timer("parse"):
+        block = find_ingredient_block(ocr_text)
+    if block is None:
+        record_outcome("invalid")
+        raise ValueError("Unable to locate an 'Ingredients' block in the extracted text.")
+    return block.text, block.declared_texts()
+
+
+def _classified_result(
+    ocr_text: str,
+    ingredients_block: str,
+    ingredients: List[str],
+    match: SemanticMatchResult,
+    ingredient_matches: List[IngredientMatch],
+    kb_version: Optional[str] = None,
+) -> AnalysisResult:
+    record_outcome("ocr")
     return AnalysisResult(
         logo_detected=False,
         ocr_text=ocr_text,
@@ -107,9 +747,25 @@ def analyse_image(
         status=match.status,
         score=match.score,
         matched_text=match.matched_text,
+        ingredient_matches=ingredient_matches,
+        tier=match.tier,
+        kb_version=kb_version,
     )
 
 
-__all__ = ["AnalysisResult", "analyse_image", "find_ingredients_block", "parse_ingredients_list"]
+__all__ = [
+    "AnalysisEvent",
+    "AnalysisResult",
+    "analyse_image",
+    "analyse_image_async",
+    "analyse_image_stream",
+    "analyse_images",
+    "analyse_images_async",
+    "cached_ocr_text",
+    "classify_ocr_text",
+    "find_ingredient_block",
+    "find_ingredients_block",
+    "parse_ingredients_list",
+]
 
 
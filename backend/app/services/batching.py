@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+"""
+Cross-request dynamic batching for model forward passes.
+"""
+
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Callable, Deque, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Number of recent queue-wait samples kept for percentile reporting.
+WAIT_SAMPLE_WINDOW = 10_000
+
+
+@dataclass
+class BatcherStats:
+    batches: int = 0
+    items: int = 0
+    mean_batch_size: float = 0.0
+    queue_wait_p50_ms: float = 0.0
+    queue_wait_p99_ms: float = 0.0
+    queue_wait_max_ms: float = 0.0
+    pending: int = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(asdict(self))
+
+
+def _percentile(sorted_samples: Sequence[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collect items submitted from many threads into batches for one ``batch_fn`` call.
+
+    A batch is dispatched once ``max_batch_size`` items are queued or ``max_wait_ms`` has elapsed since
+    the first item of the batch arrived, whichever comes first. ``batch_fn`` must return one result per
+    input item, in order. When a batch raises, its items are re-run one at a time so each caller gets its
+    own result or exception and one bad input does not fail the requests it was coalesced with.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[T]], Sequence[R]],
+        *,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._batch_fn = batch_fn
+        self._queue: "queue.Queue[Tuple[T, Future, float]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_WINDOW)
+        self._batches = 0
+        self._items = 0
+        _batchers.add(self)
+
+    def _reset_after_fork(self) -> None:
+        # The worker thread does not exist in a forked child, and its locks may have been held mid-fork.
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def submit(self, item: T) -> R:
+        """
+        Queue ``item`` and block until its batch has been processed.
+        """
+
+        return self._enqueue(item).result()
+
+    def submit_many(self, items: Sequence[T]) -> List[R]:
+        futures = [self._enqueue(item) for item in items]
+        return [future.result() for future in futures]
+
+    def _enqueue(self, item: T) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[T, Future, float]]) -> None:
+        dispatched_at = time.perf_counter()
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._waits.extend(dispatched_at - enqueued_at for _, _, enqueued_at in batch)
+
+        try:
+            results = self._call([item for item, _, _ in batch])
+        except BaseException as exc:  # noqa: BLE001
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            for item, future, _ in batch:
+                try:
+                    future.set_result(self._call([item])[0])
+                except BaseException as item_exc:  # noqa: BLE001
+                    future.set_exception(item_exc)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def _call(self, items: List[T]) -> List[R]:
+        results = list(self._batch_fn(items))
+        if len(results) != len(items):
+            raise RuntimeError(f"Batch function '{self.name}' returned {len(results)} results for {len(items)} items.")
+        return results
+
+    def stats(self) -> BatcherStats:
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            batches, items = self._batches, self._items
+        return BatcherStats(
+            batches=batches,
+            items=items,
+            mean_batch_size=items / batches if batches else 0.0,
+            queue_wait_p50_ms=_percentile(waits, 0.50) * 1000.0,
+            queue_wait_p99_ms=_percentile(waits, 0.99) * 1000.0,
+            queue_wait_max_ms=(waits[-1] if waits else 0.0) * 1000.0,
+            pending=self._queue.qsize(),
+        )
+
+
+_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+
+def _reset_batchers_after_fork() -> None:
+    for batcher in list(_batchers):
+        batcher._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_batchers_after_fork)
+
+
+__all__ = ["BatcherStats", "MicroBatcher"]
@@ -5,7 +5,7 @@ Simple chatbot utilities leveraging the knowledge base embeddings.
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from ..config import Settings, get_settings
 from .knowledge_base import SemanticMatchResult, get_knowledge_base
@@ -15,13 +15,14 @@ from .knowledge_base import SemanticMatchResult, get_knowledge_base
 class ChatResponse:
     query: str
     results: List[SemanticMatchResult]
+    kb_version: Optional[str] = None
 
 
 def answer_question(question: str, settings: Settings | None = None) -> ChatResponse:
     settings = settings or get_settings()
     kb = get_knowledge_base()
-    matches = kb.search_similar(question, top_k=settings.top_k_chat_results)
-    return ChatResponse(query=question, results=matches)
+    matches = kb.search_similar(question, top_k=settings.top_k_chat_results, min_score=settings.chat_min_score)
+    return ChatResponse(query=question, results=matches, kb_version=kb.version)
 
 
 __all__ = ["answer_question", "ChatResponse"]
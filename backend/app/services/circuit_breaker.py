@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+"""
+Thread-safe circuit breaker for calls to dependencies that can be slow or unavailable.
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class BreakerStats:
+    state: str = "closed"  # closed | open | half_open
+    consecutive_failures: int = 0
+    failures: int = 0
+    successes: int = 0
+    rejected: int = 0
+    opened_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self))
+
+
+class CircuitBreaker:
+    """
+    Stop calling a dependency after ``failure_threshold`` consecutive failures.
+
+    While open, :meth:`allow` rejects calls without trying them. After ``reset_seconds`` one trial call is
+    let through (half-open): its success closes the breaker again, its failure re-opens it for another
+    ``reset_seconds``. A ``failure_threshold`` of zero disables the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(0, failure_threshold)
+        self.reset_seconds = max(0.0, reset_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = BreakerStats()
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._stats.state == "closed":
+                return True
+            if self._stats.state == "open":
+                if self._clock() - (self._stats.opened_at or 0.0) < self.reset_seconds:
+                    self._stats.rejected += 1
+                    return False
+                self._stats.state = "half_open"
+            if self._trial_in_flight:
+                self._stats.rejected += 1
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats.successes += 1
+            self._stats.consecutive_failures = 0
+            self._stats.state = "closed"
+            self._stats.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._stats.failures += 1
+            self._stats.consecutive_failures += 1
+            trial_failed = self._stats.state == "half_open"
+            self._trial_in_flight = False
+            if self.failure_threshold and (
+                trial_failed or self._stats.consecutive_failures >= self.failure_threshold
+            ):
+                self._stats.state = "open"
+                self._stats.opened_at = self._clock()
+
+    def release(self) -> None:
+        """
+        Give back a call let through by :meth:`allow` that ended without an outcome (e.g. it was cancelled),
+        so a half-open breaker admits the next trial instead of waiting on this one forever.
+        """
+
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> BreakerStats:
+        with self._lock:
+            return BreakerStats(**asdict(self._stats))
+
+
+__all__ = ["BreakerStats", "CircuitBreaker"]
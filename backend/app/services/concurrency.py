@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+"""
+Concurrency primitives that keep blocking inference and OCR work off the event loop.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional, TypeVar
+
+from ..config import Settings, get_settings
+
+R = TypeVar("R")
+
+
+class StageSaturatedError(RuntimeError):
+    """
+    Raised when a pipeline stage already has its maximum number of running and queued calls.
+    """
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"The '{stage}' stage is at capacity. Please retry shortly.")
+        self.stage = stage
+
+
+class StageLimiter:
+    """
+    Cap the calls running in a stage and the calls allowed to wait for a slot.
+
+    Callers beyond ``concurrency + queue_size`` are rejected immediately with ``StageSaturatedError``
+    rather than piling up unbounded latency behind the ones already waiting.
+    """
+
+    def __init__(self, stage: str, concurrency: int, queue_size: int) -> None:
+        self.stage = stage
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._admitted = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._admitted
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._admitted >= self.concurrency + self.queue_size:
+            raise StageSaturatedError(self.stage)
+        self._admitted += 1
+        try:
+            async with self._semaphore:
+                yield
+        finally:
+            self._admitted -= 1
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_batched_executor: Optional[ThreadPoolExecutor] = None
+_limiters: Dict[str, StageLimiter] = {}
+
+
+def get_inference_executor(settings: Settings | None = None) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        settings = settings or get_settings()
+        _executor = ThreadPoolExecutor(max_workers=settings.inference_workers, thread_name_prefix="inference")
+    return _executor
+
+
+def get_batched_executor(settings: Settings | None = None) -> ThreadPoolExecutor:
+    global _batched_executor
+    if _batched_executor is None:
+        settings = settings or get_settings()
+        _batched_executor = ThreadPoolExecutor(
+            max_workers=settings.batching_max_batch_size, thread_name_prefix="batched"
+        )
+    return _batched_executor
+
+
+def get_stage_limiter(stage: str, settings: Settings | None = None) -> StageLimiter:
+    limiter = _limiters.get(stage)
+    if limiter is None:
+        settings = settings or get_settings()
+        if stage == "inference":
+            limiter = StageLimiter(stage, settings.inference_workers, settings.inference_queue_size)
+        elif stage == "batched":
+            limiter = StageLimiter(stage, settings.batching_max_batch_size, settings.inference_queue_size)
+        elif stage == "ocr":
+            limiter = StageLimiter(stage, settings.ocr_max_concurrency, settings.ocr_queue_size)
+        else:
+            raise KeyError(f"Unknown pipeline stage '{stage}'.")
+        _limiters[stage] = limiter
+    return limiter
+
+
+def _reset_after_fork() -> None:
+    # Executor threads do not survive ``fork`` and limiters are bound to the parent's event loop.
+    global _executor, _batched_executor
+    _executor = None
+    _batched_executor = None
+    _limiters.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def run_inference(func: Callable[..., R], *args, **kwargs) -> R:
+    """
+    Run a blocking, CPU-bound callable on the bounded inference executor.
+    """
+
+    async with get_stage_limiter("inference").slot():
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so per-request state (stage timings) reaches the worker thread.
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(get_inference_executor(), call)
+
+
+async def run_batched(func: Callable[..., R], *args, **kwargs) -> R:
+    """
+    Run a blocking callable whose forward passes go through a :class:`MicroBatcher`.
+
+    The batcher's own thread runs each pass, so the caller mostly waits for its batch. Holding one of the
+    ``inference_workers`` threads meanwhile would cap a shared batch at that many requests; with batching
+    enabled these calls get their own pool and ``batched`` stage limit of ``batching_max_batch_size``
+    instead. Without batching this is :func:`run_inference`.
+    """
+
+    settings = get_settings()
+    if not settings.batching_enabled:
+        return await run_inference(func, *args, **kwargs)
+    async with get_stage_limiter("batched", settings).slot():
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(get_batched_executor(settings), call)
+
+
+__all__ = [
+    "StageLimiter",
+    "StageSaturatedError",
+    "get_batched_executor",
+    "get_inference_executor",
+    "get_stage_limiter",
+    "run_batched",
+    "run_inference",
+]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+"""
+In-memory image decoding shared by the logo detector and OCR.
+"""
+
+import io
+import math
+from pathlib import Path
+from typing import Optional, Union
+
+from PIL import Image, UnidentifiedImageError
+
+ImageSource = Union[Path, bytes, Image.Image]
+
+EXIF_ORIENTATION_TAG = 0x0112
+# Draft decoding may land this far below ``max_side``: a 4032 px photo then decodes at half scale (2016 px)
+# for a 2048 px target instead of decoding at full size and resampling.
+DRAFT_TOLERANCE = 0.9
+# EXIF orientation value -> transpose that turns the stored pixels upright.
+EXIF_TRANSPOSES = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def load_image(source: ImageSource, max_side: Optional[int] = None) -> Image.Image:
+    """
+    Decode ``source`` once into an RGB ``PIL.Image`` that every pipeline stage can share.
+
+    Raw upload bytes are decoded without touching disk and turned upright according to their EXIF
+    orientation. With ``max_side`` the result is downscaled so its longer side is at most ``max_side``;
+    JPEGs are then decoded at a reduced DCT scale (draft mode), which skips most of the decode work for
+    large phone photos. Already-decoded images are only downscaled.
+    """
+
+    if isinstance(source, Image.Image):
+        return fit_to_max_side(source, max_side)
+
+    if isinstance(source, (bytes, bytearray)):
+        stream: Union[io.BytesIO, Path] = io.BytesIO(source)
+    else:
+        if not source.exists():
+            raise FileNotFoundError(f"Image path '{source}' does not exist.")
+        stream = source
+
+    try:
+        with Image.open(stream) as image:
+            if max_side and image.format == "JPEG" and max(image.size) > max_side:
+                scale = max_side * DRAFT_TOLERANCE / max(image.size)
+                # Draft picks the smallest 1/2, 1/4 or 1/8 scale that still covers the requested size.
+                image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+            orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            decoded = fit_to_max_side(image.convert("RGB"), max_side)
+    except (UnidentifiedImageError, OSError) as exc:
+        raise ValueError("The uploaded file could not be decoded as an image.") from exc
+    transpose = EXIF_TRANSPOSES.get(orientation)
+    return decoded.transpose(transpose) if transpose is not None else decoded
+
+
+def fit_to_max_side(
+    image: Image.Image, max_side: Optional[int], resample: Image.Resampling = Image.Resampling.LANCZOS
+) -> Image.Image:
+    """
+    Downscale ``image`` so its longer side is at most ``max_side`` pixels (never upscales).
+    """
+
+    if not max_side or max(image.size) <= max_side:
+        return image
+    scale = max_side / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    # ``reducing_gap`` first shrinks by an integer factor with a box filter, then resamples the rest.
+    return image.resize(size, resample, reducing_gap=2.0)
+
+
+__all__ = ["ImageSource", "fit_to_max_side", "load_image"]
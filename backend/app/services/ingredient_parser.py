@@ -0,0 +1,512 @@
+from __future__ import annotations
+
+"""
+Single-pass parser for ingredient statements in OCR transcripts.
+
+A statement is shaped by a handful of tokens: headers ("Ingredients:", "Zutaten:", ...), bracketed groups,
+percentages, "contains" / "may contain" markers and sentence ends. Words are located with ``str.find`` on
+a lower-cased copy and punctuation with one compiled pattern (bracketed groups up to two levels deep are a
+single token); the two sorted streams are merged in one pass. Items between tokens are cut at the separator positions,
+so the Python work grows with the number of tokens and items rather than characters.
+
+Results are ``(start, end)`` spans into the transcript; text is only copied when asked for.
+:func:`parse_ingredient` turns one item into a tree of its bracketed sub-ingredients with their E-numbers.
+"""
+
+import re
+import string
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import starmap
+from typing import Dict, List, Optional, Tuple
+
+from .lexical_index import extract_e_codes
+
+Span = Tuple[int, int]
+
+# Every alternative starts with a literal character so the regex engine can skip straight to candidates.
+PUNCTUATION_RE = re.compile(
+    r"\([^()]*(?:\([^()]*\)[^()]*)*\)|\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\]|\(|\[|\{|\)|\]|\}|%|\.|\n[ \t]*\n"
+)
+HEADER_RE = re.compile(
+    r"(?:ingredient(?:s|es|i|en)?|ingrédients?|ingrediënten|zutaten|sk[łl]adniki|i[cç]indekiler"
+    r"|bahan(?:-bahan)?|composition)\b(?:[ \t]*\([^()\n]{0,60}\))?(\s*[:：])?"
+)
+SECTION_RE = re.compile(
+    r"(?P<may_contain>may\s+(?:also\s+)?contain|traces?\s+of)\b\s*:?"
+    r"|(?P<contains>contains?(?!\s+(?:\d|less\b|no\b|not\b|only\b))|allergens?)\b\s*:?"
+)
+# Literal prefixes to look for, and the pattern that confirms a marker at each hit.
+MARKER_STEMS = (
+    *((stem, HEADER_RE) for stem in ("ingr", "zutaten", "skladniki", "składniki", "icindekiler", "içindekiler")),
+    *((stem, HEADER_RE) for stem in ("bahan", "composition")),
+    *((stem, SECTION_RE) for stem in ("may", "trace", "contain", "allergen")),
+)
+PERCENT_VALUE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*%\Z")
+# A bracket holding nothing but a share, as in "cocoa butter (25%)" or "milk [min. 3,5 %]".
+BRACKETED_PERCENT_RE = re.compile(r"[(\[]\s*(?:min|max|approx|ca)?\.?\s*(\d+(?:[.,]\d+)?)\s*%\s*[)\]]")
+ABBREVIATION_RE = re.compile(r"\b(?:vit|approx|incl|min|max|conc|ca|no|nr|sp|spp|var|st|e\.g|i\.e)\Z")
+SEPARATORS = (";", "•", "·")
+ITEM_DELIMITER_RE = re.compile(r"[()\[\]{},;]")
+QUANTITY_RE = re.compile(r"(?:min|max|approx|ca)?\.?\s*\d+(?:[.,]\d+)?\s*%?", re.IGNORECASE)
+# A bracketed part that opens with an amount ("1,5% fat", "30 g per 100 g") describes its parent.
+LEADING_QUANTITY_RE = re.compile(
+    r"(?:min|max|approx|ca)?\.?\s*\d+(?:[.,]\d+)?\s*(?:%|(?:mg|g|kg|ml|l)\b)", re.IGNORECASE
+)
+# Claims about an ingredient rather than ingredients of it: "beef gelatine (halal)".
+CLAIM_WORDS = frozenset(
+    {
+        "bio",
+        "certified halal",
+        "free range",
+        "gluten free",
+        "gluten-free",
+        "gmo free",
+        "gmo-free",
+        "halal",
+        "halal certified",
+        "kosher",
+        "natural",
+        "non-gmo",
+        "organic",
+        "vegan",
+        "vegetarian",
+    }
+)
+
+# Functional class names (EU 1169/2011 Annex VII part C and common variants) say what an additive does, not
+# what it is: "emulsifier (E471)" is fully described by its brackets, so the class name is not looked up.
+FUNCTIONAL_CLASSES = frozenset(
+    {
+        "acid",
+        "acidity regulator",
+        "anti-caking agent",
+        "anti-foaming agent",
+        "antioxidant",
+        "bulking agent",
+        "color",
+        "colour",
+        "colouring",
+        "emulsifier",
+        "emulsifying salt",
+        "firming agent",
+        "flavor",
+        "flavor enhancer",
+        "flavoring",
+        "flavour",
+        "flavour enhancer",
+        "flavouring",
+        "flour treatment agent",
+        "gelling agent",
+        "glazing agent",
+        "humectant",
+        "modified starch",
+        "preservative",
+        "raising agent",
+        "sequestrant",
+        "stabiliser",
+        "stabilizer",
+        "sweetener",
+        "thickener",
+    }
+)
+# Fallback case folding that keeps every character a single character (``"İ".lower()`` is two).
+CASE_FOLD = str.maketrans(string.ascii_uppercase + "İÇÉËŁ", string.ascii_lowercase + "içéëł")
+
+
+@dataclass
+class IngredientBlock:
+    """
+    One ingredient statement: ``start``/``end`` cover the header through the closing full stop, and every
+    section is a list of item spans. ``percentages`` maps item positions to their declared share.
+    """
+
+    source: str = field(repr=False)
+    start: int
+    end: int
+    items: List[Span] = field(default_factory=list)
+    contains: List[Span] = field(default_factory=list)
+    may_contain: List[Span] = field(default_factory=list)
+    percentages: Dict[int, float] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start : self.end].strip()
+
+    def texts(self, spans: List[Span]) -> List[str]:
+        """
+        The text of ``spans``, with line breaks inside an item folded into single spaces.
+        """
+
+        texts = list(map(self.source.__getitem__, starmap(slice, spans)))
+        return list(map(_flatten, texts)) if "\n" in self.source[self.start : self.end] else texts
+
+    def item_texts(self) -> List[str]:
+        return self.texts(self.items)
+
+    def declared_texts(self) -> List[str]:
+        """
+        Items plus the "Contains: ..." declaration, i.e. everything the product is stated to contain.
+        """
+
+        return self.texts(self.items + self.contains)
+
+    def tree(self) -> List[IngredientNode]:
+        return [parse_ingredient(text) for text in self.item_texts()]
+
+
+@dataclass
+class IngredientNode:
+    """
+    One ingredient and its bracketed sub-ingredients. ``name`` is the text outside the brackets and
+    ``e_codes`` are the E-numbers written in it.
+    """
+
+    text: str
+    name: str
+    e_codes: List[str] = field(default_factory=list)
+    children: List[IngredientNode] = field(default_factory=list)
+
+    @property
+    def is_functional_class(self) -> bool:
+        key = " ".join(self.name.lower().replace(":", " ").split())
+        return key in FUNCTIONAL_CLASSES or key.removesuffix("s") in FUNCTIONAL_CLASSES
+
+    def leaves(self) -> List[IngredientNode]:
+        """
+        The nodes that say what the ingredient is made of: every node without sub-ingredients, plus parents
+        whose own name is more than a functional class ("pork gelatin (E441)" keeps "pork gelatin").
+        """
+
+        if not self.children:
+            return [self]
+        own = [self] if self.name and (self.e_codes or not self.is_functional_class) else []
+        return own + [leaf for child in self.children for leaf in child.leaves()]
+
+
+class _Builder:
+    __slots__ = ("block", "section", "section_start", "masks", "percents", "closed")
+
+    def __init__(self, source: str, start: int, body_start: int) -> None:
+        self.block = IngredientBlock(source=source, start=start, end=len(source))
+        self.closed = False
+        self._open_section("items", body_start)
+
+    def _open_section(self, section: str, start: int) -> None:
+        self.section = section
+        self.section_start = start
+        self.masks: List[Span] = []
+        self.percents: List[Tuple[int, float]] = []
+
+    def switch_section(self, section: str, marker_start: int, body_start: int) -> None:
+        if not self.closed:
+            self.close_section(marker_start)
+        self.closed = False
+        self._open_section(section, body_start)
+
+    def close_section(self, end: int) -> None:
+        spans = _split(self.block.source, self.section_start, end, self.masks)
+        getattr(self.block, self.section).extend(spans)
+        if self.section == "items" and self.percents:
+            starts = [start for start, _ in spans]
+            for position, value in self.percents:
+                index = bisect_right(starts, position) - 1
+                if index >= 0:
+                    self.block.percentages.setdefault(index, value)
+
+    def finish(self, end: int, block_end: int) -> None:
+        self.close_section(end)
+        self.block.end = block_end
+        self.closed = True
+
+
+class _Scanner:
+    """
+    State of one pass: the statement being read, bracket depth and the end of the last consumed token.
+    """
+
+    def __init__(self, text: str, scan: str, implicit_header: bool) -> None:
+        self.text = text
+        self.scan = scan
+        self.builders: List[_Builder] = []
+        self.current: Optional[_Builder] = None
+        self.depth = 0  # brackets left open because they nest deeper than a group token or never close
+        self.group_start = 0
+        self.covered_until = 0
+        if implicit_header:
+            self._start_block(0, 0)
+
+    @property
+    def active(self) -> bool:
+        return self.current is not None and not self.current.closed
+
+    def _start_block(self, start: int, body_start: int) -> None:
+        self.current = _Builder(self.text, start, body_start)
+        self.builders.append(self.current)
+
+    def marker(self, match: re.Match) -> None:
+        start = match.start()
+        if start < self.covered_until or self.depth:
+            return
+        if match.re is HEADER_RE:
+            # Inside a statement only "Word:" opens the next one; a bare word is part of an item. Elsewhere a
+            # bare word only opens one at the start of a line ("INGREDIENTS sugar, ..."), not in prose.
+            if not match.group(1) and (self.active or self.text[self.text.rfind("\n", 0, start) + 1 : start].strip()):
+                return
+            self.covered_until = match.end()
+            if self.active:
+                self.current.finish(start, start)
+            self._start_block(start, match.end())
+        elif self.current is not None:
+            if self.active:
+                # "flavour which contains alcohol" is an item; only "Contains:" or a capitalised line opens one.
+                if not (match.group().endswith(":") or self._starts_line(start)):
+                    return
+            elif self.text[self.current.block.end : start].strip():
+                return
+            # A "Contains: ..." sentence right after the list still belongs to that statement.
+            self.covered_until = match.end()
+            self.current.switch_section(match.lastgroup, start, match.end())
+
+    def _starts_line(self, start: int) -> bool:
+        line_start = self.text.rfind("\n", self.current.section_start, start)
+        if line_start == -1 or self.text[line_start + 1 : start].strip() or not self.text[start].isupper():
+            return False
+        # A line ending in a comma continues the list onto the next one.
+        return not self.text[max(self.current.section_start, line_start - 64) : line_start].rstrip().endswith(",")
+
+    def punctuation(self, match: re.Match) -> None:
+        start = match.start()
+        if start < self.covered_until or not self.active:
+            return
+        token = match.group()
+        first = token[0]
+        current = self.current
+        if len(token) > 1 and first in "([":
+            self.covered_until = match.end()
+            if self.depth == 0:
+                current.masks.append(match.span())
+                self._bracketed_percent(start, match.end())
+        elif first in "([{":
+            if self.depth == 0:
+                self.group_start = start
+            self.depth += 1
+        elif first in ")]}":
+            if self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    current.masks.append((self.group_start, match.end()))
+                    self._bracketed_percent(self.group_start, match.end())
+        elif first == "%":
+            number = PERCENT_VALUE_RE.search(self.scan, max(0, start - 16), start + 1) if not self.depth else None
+            if number is not None:
+                if "," in number.group(1):
+                    current.masks.append(number.span())
+                current.percents.append((number.start(), float(number.group(1).replace(",", "."))))
+        elif first == ".":
+            if self.depth == 0 and _ends_statement(self.text, self.scan, start):
+                current.finish(start, start + 1)
+        else:
+            # A blank line ends the statement even when a bracket was left open.
+            self.close_brackets(start)
+            current.finish(start, start)
+
+    def _bracketed_percent(self, start: int, end: int) -> None:
+        number = BRACKETED_PERCENT_RE.fullmatch(self.scan, start, end)
+        if number is not None:
+            self.current.percents.append((start, float(number.group(1).replace(",", "."))))
+
+    def close_brackets(self, end: int) -> None:
+        if self.depth:
+            self.current.masks.append((self.group_start, end))
+            self.depth = 0
+
+    def blocks(self) -> List[IngredientBlock]:
+        if self.active:
+            self.close_brackets(len(self.text))
+            self.current.finish(len(self.text), len(self.text))
+        return [builder.block for builder in self.builders if builder.block.items]
+
+
+def parse_ingredient_blocks(text: str, *, implicit_header: bool = False) -> List[IngredientBlock]:
+    """
+    Every ingredient statement in ``text`` in order (multilingual labels carry one per language).
+
+    With ``implicit_header`` the text is treated as the body of a statement even without a header.
+    Statements without any items are skipped.
+    """
+
+    if not text:
+        return []
+    scan = text.lower()
+    if len(scan) != len(text):
+        scan = text.translate(CASE_FOLD)
+
+    scanner = _Scanner(text, scan, implicit_header)
+    markers = _markers(scan)
+    search = PUNCTUATION_RE.search
+    position = next_marker = 0
+    while True:
+        if not scanner.active:
+            # Outside a statement only markers matter (one may open the next), so skip straight to them.
+            if next_marker == len(markers):
+                break
+            marker = markers[next_marker]
+            next_marker += 1
+            scanner.marker(marker)
+            position = max(position, marker.end())
+            continue
+        match = search(scan, position)
+        if match is None:
+            for marker in markers[next_marker:]:
+                scanner.marker(marker)
+            break
+        while next_marker < len(markers) and markers[next_marker].start() < match.start():
+            scanner.marker(markers[next_marker])
+            next_marker += 1
+        scanner.punctuation(match)
+        position = match.end()
+    return scanner.blocks()
+
+
+def _markers(scan: str) -> List[re.Match]:
+    found = []
+    for stem, pattern in MARKER_STEMS:
+        position = scan.find(stem)
+        while position != -1:
+            if not (position and scan[position - 1].isalnum()):
+                match = pattern.match(scan, position)
+                if match is not None:
+                    found.append(match)
+            position = scan.find(stem, position + 1)
+    found.sort(key=lambda match: match.start())
+    return found
+
+
+def parse_ingredient(text: str) -> IngredientNode:
+    """
+    Split one ingredient into its name and bracketed sub-ingredients, recursively.
+
+    ``"emulsifier (E471, soy lecithin [E322])"`` becomes ``emulsifier`` with children ``E471`` and
+    ``soy lecithin`` (itself with child ``E322``). Bracketed parts that only describe the ingredient are
+    dropped: quantities (``(min. 30%)``, ``(1,5% fat)``), single letters (``Vitamins (A, D, E)``) and claims
+    (``(halal)``). An ingredient left without children is looked up by its own name.
+    """
+
+    text = text.strip()
+    name_parts: List[str] = []
+    groups: List[str] = []
+    depth = cursor = group_start = 0
+    for match in ITEM_DELIMITER_RE.finditer(text):
+        char = match.group()
+        if char in "([{":
+            if depth == 0:
+                name_parts.append(text[cursor : match.start()])
+                group_start = match.end()
+            depth += 1
+        elif char in ")]}" and depth:
+            depth -= 1
+            if depth == 0:
+                groups.append(text[group_start : match.start()])
+                cursor = match.end()
+    if depth:
+        groups.append(text[group_start:])
+    else:
+        name_parts.append(text[cursor:])
+
+    name = " ".join(" ".join(name_parts).split()).strip(" :*")
+    children = [
+        parse_ingredient(part)
+        for group in groups
+        for part in _split_top_level(group)
+        if not _describes_parent(part)
+    ]
+    return IngredientNode(text=text, name=name, e_codes=extract_e_codes(name), children=children)
+
+
+def _describes_parent(part: str) -> bool:
+    return (
+        len(part.strip(" .*")) <= 1
+        or QUANTITY_RE.fullmatch(part) is not None
+        or LEADING_QUANTITY_RE.match(part) is not None
+        or " ".join(part.lower().strip(" .*").split()) in CLAIM_WORDS
+    )
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts: List[str] = []
+    depth = start = 0
+    for match in ITEM_DELIMITER_RE.finditer(text):
+        char = match.group()
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth = max(0, depth - 1)
+        elif depth == 0 and not _decimal_comma(text, match.start()):
+            parts.append(text[start : match.start()].strip())
+            start = match.end()
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _decimal_comma(text: str, position: int) -> bool:
+    return (
+        text[position] == ","
+        and 0 < position < len(text) - 1
+        and text[position - 1].isdigit()
+        and text[position + 1].isdigit()
+    )
+
+
+def _ends_statement(text: str, scan: str, position: int) -> bool:
+    """
+    Whether the full stop at ``position`` closes the statement rather than a decimal ("2.5") or an
+    abbreviation ("Vit. C").
+    """
+
+    following = position + 1
+    if following < len(text) and not text[following].isspace():
+        return False
+    return ABBREVIATION_RE.search(scan, max(0, position - 6), position) is None
+
+
+def _split(text: str, start: int, end: int, masks: List[Span]) -> List[Span]:
+    """
+    Split ``text[start:end]`` at top-level separators into trimmed, non-empty spans.
+
+    Bracketed groups and decimal-comma percentages (``masks``) are blanked out first so their commas do
+    not split; the blanked copy has the same length, so offsets carry over to ``text``.
+    """
+
+    if start >= end:
+        return []
+    if masks:
+        pieces, cursor = [], start
+        for mask_start, mask_end in masks:
+            pieces.append(text[cursor:mask_start])
+            pieces.append("_" * (mask_end - mask_start))
+            cursor = mask_end
+        pieces.append(text[cursor:end])
+        body = "".join(pieces)
+    else:
+        body = text[start:end]
+    for separator in SEPARATORS:
+        if separator in body:
+            body = body.replace(separator, ",")
+
+    spans: List[Span] = []
+    cursor = start  # offset of the current part; each separator is one character
+    for part in body.split(","):
+        item = part.strip()
+        if item:
+            item_start = cursor + len(part) - len(part.lstrip())
+            spans.append((item_start, item_start + len(item)))
+        cursor += len(part) + 1
+    return spans
+
+
+def _flatten(item: str) -> str:
+    return " ".join(item.split()) if "\n" in item else item
+
+
+__all__ = ["IngredientBlock", "IngredientNode", "Span", "parse_ingredient", "parse_ingredient_blocks"]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+"""
+Build KB stores from the phrase CSV, re-embedding only phrases whose normalised text is new.
+"""
+
+import hashlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .kb_store import KBStoreError, kb_store_exists, read_kb_store, write_kb_store
+from .knowledge_base import EMBEDDING_MODEL_NAME, normalize_text_for_matching
+
+CONTENT_HASH_COLUMN = "content_hash"
+
+HALAL_LABELS = {"halal", "h", "permitted", "allowed", "lawful"}
+HARAM_LABELS = {"haram", "forbidden", "prohibited", "not halal", "non-halal", "not permissible"}
+MUSHBOOH_LABELS = {"mushbooh", "doubtful", "unknown", "uncertain", "vary", "depends"}
+
+
+def normalize_status(label: str) -> str:
+    """
+    Map free-form CSV labels onto the KB statuses (mirrors the notebook implementation).
+    """
+
+    if not isinstance(label, str):
+        return "unknown"
+    label = label.strip().lower()
+    if label in HALAL_LABELS:
+        return "halal"
+    if label in HARAM_LABELS:
+        return "haram"
+    if label in MUSHBOOH_LABELS:
+        return "mushbooh"
+    return "unknown"
+
+
+def content_hash(norm_text: str) -> str:
+    """
+    Key under which a phrase embedding is reused: it depends only on the normalised text (and the model).
+    """
+
+    return hashlib.sha256(norm_text.encode("utf-8")).hexdigest()[:16]
+
+
+def prepare_phrase_kb(csv_path: Path) -> pd.DataFrame:
+    """
+    Read the phrase CSV into the KB frame layout (``original_text``, ``status``, ``norm_text``).
+
+    The ``text`` and ``label`` columns are found case-insensitively, falling back to the first two
+    columns, and rows whose text normalises to nothing are dropped.
+    """
+
+    source = pd.read_csv(csv_path)
+    if source.shape[1] < 2:
+        raise ValueError(f"'{csv_path}' needs a text column and a label column.")
+    columns = {str(column).lower().strip(): column for column in source.columns}
+    text_column = columns.get("text", source.columns[0])
+    label_column = columns.get("label", source.columns[1])
+
+    kb_df = pd.DataFrame()
+    kb_df["original_text"] = source[text_column].fillna("").astype(str)
+    kb_df["status"] = source[label_column].apply(normalize_status)
+    kb_df["norm_text"] = kb_df["original_text"].apply(normalize_text_for_matching)
+    kb_df = kb_df[kb_df["norm_text"] != ""].reset_index(drop=True)
+    kb_df[CONTENT_HASH_COLUMN] = kb_df["norm_text"].apply(content_hash)
+    return kb_df
+
+
+@dataclass
+class BuildReport:
+    rows: int
+    embedded: int
+    reused: int
+    removed: int
+    full_rebuild: bool
+    version: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self))
+
+
+def _previous_embeddings(store_dir: Optional[Path], embedding_model: str, dtype: str) -> Dict[str, np.ndarray]:
+    """
+    Embeddings of the existing store keyed by content hash.
+
+    Nothing is reused when the store was built with another model, or stored at a lower precision than
+    the one requested (float16 vectors would otherwise be carried into a float32 store).
+    """
+
+    if not kb_store_exists(store_dir):
+        return {}
+    store = read_kb_store(store_dir)  # type: ignore[arg-type]
+    if store.manifest.get("embedding_model") != embedding_model:
+        return {}
+    if store.manifest.get("dtype") not in ("float32", dtype):
+        return {}
+    if CONTENT_HASH_COLUMN in store.columns:
+        hashes = store.columns[CONTENT_HASH_COLUMN].tolist()
+    elif "norm_text" in store.columns:
+        hashes = [content_hash(str(text)) for text in store.columns["norm_text"].tolist()]
+    else:
+        raise KBStoreError(f"KB store at '{store_dir}' has neither '{CONTENT_HASH_COLUMN}' nor 'norm_text'.")
+    # One copy per distinct phrase; the memmap is released once these rows are materialised.
+    first_rows = dict(zip(reversed(hashes), reversed(range(len(hashes)))))
+    return {key: np.array(store.embeddings[row], dtype=np.float32) for key, row in first_rows.items()}
+
+
+def build_kb_store(
+    csv_path: Path,
+    output_dir: Path,
+    encode: Callable[[List[str]], np.ndarray],
+    *,
+    batch_size: int = 256,
+    dtype: str = "float32",
+    full: bool = False,
+    embedding_model: str = EMBEDDING_MODEL_NAME,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> BuildReport:
+    """
+    Build (or update) the KB store in ``output_dir`` from ``csv_path``.
+
+    Phrases whose content hash already exists in the current store keep their embedding; only new
+    phrases are passed to ``encode``, ``batch_size`` at a time. ``full`` re-embeds everything.
+    """
+
+    kb_df = prepare_phrase_kb(csv_path)
+    if kb_df.empty:
+        raise ValueError(f"'{csv_path}' contains no usable phrases.")
+
+    previous = {} if full else _previous_embeddings(output_dir, embedding_model, dtype)
+    hashes: Sequence[str] = kb_df[CONTENT_HASH_COLUMN].tolist()
+    texts_by_hash = dict(zip(hashes, kb_df["norm_text"].tolist()))
+    missing = [key for key in texts_by_hash if key not in previous]
+
+    fresh: Dict[str, np.ndarray] = {}
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start : start + batch_size]
+        vectors = np.asarray(encode([texts_by_hash[key] for key in chunk]), dtype=np.float32)
+        fresh.update(zip(chunk, vectors))
+        if on_batch is not None:
+            on_batch(min(start + batch_size, len(missing)), len(missing))
+
+    embeddings = np.stack([fresh[key] if key in fresh else previous[key] for key in hashes])
+    manifest = write_kb_store(
+        output_dir,
+        kb_df,
+        embeddings,
+        dtype=dtype,
+        embedding_model=embedding_model,
+        extra={"source": {"csv": str(csv_path)}},
+    )
+    return BuildReport(
+        rows=len(kb_df),
+        embedded=len(fresh),
+        reused=sum(1 for key in hashes if key not in fresh),
+        removed=len(set(previous) - set(texts_by_hash)),
+        full_rebuild=full or not previous,
+        version=manifest["version"],
+    )
+
+
+__all__ = [
+    "BuildReport",
+    "CONTENT_HASH_COLUMN",
+    "build_kb_store",
+    "content_hash",
+    "normalize_status",
+    "prepare_phrase_kb",
+]
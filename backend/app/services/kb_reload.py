@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+"""
+Background hot reload of the knowledge base, triggered from the admin API or by watching the artefacts.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import Settings, get_settings
+from .kb_store import MANIFEST_NAME, kb_store_exists
+from .knowledge_base import current_knowledge_base, reload_knowledge_base
+from .result_cache import fingerprint_files, get_result_cache
+from .vector_index import IVF_INDEX_NAME
+
+
+@dataclass
+class ReloadStatus:
+    state: str = "idle"  # idle | building | succeeded | failed
+    trigger: Optional[str] = None  # admin | watch
+    active_version: Optional[str] = None
+    previous_version: Optional[str] = None
+    started_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    purged_results: int = 0
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self))
+
+
+def artefact_paths(settings: Settings) -> List[Path]:
+    """
+    Files whose change should trigger a reload: the store manifest (written last) or the legacy pair.
+    """
+
+    store_dir = settings.kb_store_path
+    if kb_store_exists(store_dir):
+        return [store_dir / MANIFEST_NAME, store_dir / IVF_INDEX_NAME]
+    return [settings.kb_dataframe_path, settings.kb_embeddings_path]
+
+
+class KBReloader:
+    """
+    Build replacement KBs on a single background thread and swap them in once validated.
+
+    Concurrent reload requests coalesce onto the build already in progress. After a successful swap the
+    result-cache entries keyed on the superseded KB version are purged.
+    """
+
+    def __init__(self, settings: Settings | None = None) -> None:
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._future: Optional[Future] = None
+        self._status = ReloadStatus()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Fingerprint of the artefacts behind the active KB, so the watcher ignores changes already loaded.
+        self._loaded_fingerprint: Optional[str] = None
+
+    def request(self, trigger: str = "admin") -> Future:
+        """
+        Start a reload (or join the one in progress) and return a future resolving to its ``ReloadStatus``.
+        """
+
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return self._future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-reload")
+            previous = current_knowledge_base()
+            previous_version = previous.version if previous is not None else None
+            self._status = ReloadStatus(
+                state="building",
+                trigger=trigger,
+                active_version=previous_version,
+                previous_version=previous_version,
+                started_at=time.time(),
+            )
+            self._future = self._executor.submit(self._reload, self._status)
+            return self._future
+
+    def status(self) -> ReloadStatus:
+        return replace(self._status)
+
+    def _reload(self, status: ReloadStatus) -> ReloadStatus:
+        previous_version = status.previous_version
+        started = time.perf_counter()
+        fingerprint = fingerprint_files(artefact_paths(self.settings))
+        try:
+            knowledge_base = reload_knowledge_base(self.settings)
+        except Exception as exc:  # noqa: BLE001 - the active KB stays in place; report why.
+            status.state, status.error = "failed", f"{type(exc).__name__}: {exc}"
+        else:
+            status.active_version = knowledge_base.version
+            if previous_version is not None and previous_version != knowledge_base.version:
+                status.purged_results = get_result_cache().discard_containing(f":{previous_version}:")
+            status.state = "succeeded"
+            self._loaded_fingerprint = fingerprint
+        status.duration_seconds = time.perf_counter() - started
+        return status
+
+    def start_watching(self, interval_seconds: float) -> None:
+        """
+        Poll the KB artefacts every ``interval_seconds`` and reload when they change.
+
+        A change must be seen unchanged on two consecutive polls before it triggers a reload, so a reload
+        never starts while the artefacts are still being written.
+        """
+
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        if self._loaded_fingerprint is None:
+            self._loaded_fingerprint = fingerprint_files(artefact_paths(self.settings))
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_seconds,), name="kb-watch", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _watch(self, interval_seconds: float) -> None:
+        pending: Optional[str] = None
+        while not self._stop.wait(interval_seconds):
+            fingerprint = fingerprint_files(artefact_paths(self.settings))
+            if fingerprint == self._loaded_fingerprint:
+                pending = None
+            elif fingerprint == pending:
+                status = self.request(trigger="watch").result()
+                if status.state == "failed":
+                    # Do not retry the same broken artefacts on every poll; wait for them to change again.
+                    self._loaded_fingerprint = fingerprint
+                pending = None
+            else:
+                pending = fingerprint
+
+
+_reloader: Optional[KBReloader] = None
+
+
+def get_kb_reloader(settings: Settings | None = None) -> KBReloader:
+    global _reloader
+    if _reloader is None:
+        _reloader = KBReloader(settings)
+    return _reloader
+
+
+def _reset_after_fork() -> None:
+    # The reload executor and watcher threads do not survive ``fork``; each worker starts its own.
+    global _reloader
+    _reloader = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+__all__ = ["KBReloader", "ReloadStatus", "artefact_paths", "get_kb_reloader"]
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+"""
+Versioned, memory-mappable on-disk format for the knowledge base artefacts.
+
+Layout of a store directory::
+
+    manifest.json          format version, shape, dtype, checksums and the KB version tag
+    embeddings.bin         raw row-major matrix of unit-normalised embeddings (float32 or float16)
+    columns/<name>.npy     one fixed-width unicode array per metadata column (no pickle)
+
+The embedding matrix is opened with ``np.memmap`` so every worker process on a host shares the same
+pages through the OS page cache, and loading is independent of the KB size.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+KB_STORE_FORMAT = "halal-kb"
+KB_STORE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+EMBEDDINGS_NAME = "embeddings.bin"
+COLUMNS_DIR = "columns"
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class KBStoreError(ValueError):
+    """
+    Raised when a KB store is missing, malformed or fails checksum verification.
+    """
+
+
+@dataclass
+class KBStore:
+    directory: Path
+    manifest: Dict[str, Any]
+    embeddings: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    @property
+    def version(self) -> str:
+        return str(self.manifest["version"])
+
+    def data_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: values.astype(object) for name, values in self.columns.items()})
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _replace_file(path: Path, write: Callable[[Any], None]) -> None:
+    # Write beside the target and rename over it: a process that still has the old file memory-mapped
+    # keeps reading the old inode instead of seeing it truncated and rewritten underneath it.
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with temp_path.open("wb") as handle:
+        write(handle)
+    os.replace(temp_path, path)
+
+
+def kb_store_exists(directory: Optional[Path]) -> bool:
+    return directory is not None and (directory / MANIFEST_NAME).is_file()
+
+
+def write_kb_store(
+    directory: Path,
+    data_frame: pd.DataFrame,
+    embeddings: np.ndarray,
+    *,
+    dtype: str = "float32",
+    embedding_model: str,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Write ``data_frame`` and its ``embeddings`` (one row per KB entry) as a store in ``directory``.
+
+    Embeddings are unit-normalised before writing. The manifest is written last and atomically, so a
+    reader never observes a manifest that points at partially written files.
+    """
+
+    if dtype not in SUPPORTED_DTYPES:
+        raise KBStoreError(f"Unsupported embedding dtype '{dtype}'. Choose one of {SUPPORTED_DTYPES}.")
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(data_frame):
+        raise KBStoreError(f"Embeddings shape {embeddings.shape} does not match {len(data_frame)} KB rows.")
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = (embeddings / np.maximum(norms, 1e-12)).astype(dtype)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / COLUMNS_DIR).mkdir(exist_ok=True)
+
+    files: Dict[str, Dict[str, Any]] = {}
+    embeddings_path = directory / EMBEDDINGS_NAME
+    _replace_file(embeddings_path, normalized.tofile)
+    files[EMBEDDINGS_NAME] = {"sha256": _sha256(embeddings_path), "bytes": embeddings_path.stat().st_size}
+
+    columns: List[str] = []
+    for column in data_frame.columns:
+        values = np.asarray(data_frame[column].fillna("").astype(str).tolist(), dtype=str)
+        relative = f"{COLUMNS_DIR}/{column}.npy"
+        column_path = directory / relative
+        _replace_file(column_path, lambda handle, values=values: np.save(handle, values, allow_pickle=False))
+        files[relative] = {"sha256": _sha256(column_path), "bytes": column_path.stat().st_size}
+        columns.append(str(column))
+
+    version = hashlib.sha256(
+        "".join(f"{name}:{meta['sha256']}" for name, meta in sorted(files.items())).encode("utf-8")
+    ).hexdigest()[:16]
+    manifest: Dict[str, Any] = {
+        "format": KB_STORE_FORMAT,
+        "format_version": KB_STORE_FORMAT_VERSION,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "rows": int(normalized.shape[0]),
+        "dim": int(normalized.shape[1]),
+        "dtype": dtype,
+        "normalized": True,
+        "embedding_model": embedding_model,
+        "columns": columns,
+        "files": files,
+    }
+    if extra:
+        manifest.update(extra)
+
+    temp_manifest = directory / f".{MANIFEST_NAME}.tmp"
+    temp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(temp_manifest, directory / MANIFEST_NAME)
+    return manifest
+
+
+def read_manifest(directory: Path) -> Dict[str, Any]:
+    manifest_path = directory / MANIFEST_NAME
+    if not manifest_path.is_file():
+        raise KBStoreError(f"No KB store manifest found at '{manifest_path}'.")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format") != KB_STORE_FORMAT:
+        raise KBStoreError(f"'{manifest_path}' is not a {KB_STORE_FORMAT} manifest.")
+    if int(manifest.get("format_version", 0)) > KB_STORE_FORMAT_VERSION:
+        raise KBStoreError(
+            f"KB store format version {manifest.get('format_version')} is newer than supported "
+            f"version {KB_STORE_FORMAT_VERSION}."
+        )
+    return manifest
+
+
+def verify_kb_store(directory: Path, manifest: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Recompute every file checksum listed in the manifest, raising ``KBStoreError`` on a mismatch.
+    """
+
+    manifest = manifest or read_manifest(directory)
+    for relative, meta in manifest["files"].items():
+        path = directory / relative
+        if not path.is_file():
+            raise KBStoreError(f"KB store file '{path}' is missing.")
+        if path.stat().st_size != meta["bytes"] or _sha256(path) != meta["sha256"]:
+            raise KBStoreError(f"KB store file '{path}' does not match its manifest checksum.")
+
+
+def load_legacy_kb(dataframe_path: Path, embeddings_path: Path) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Load the original ``kb_dataframe.pkl`` / ``kb_embeddings.pt`` pair exported by ``CV2.ipynb``.
+
+    Both files are unpickled, so only load artefacts from a trusted source.
+    """
+
+    import torch
+
+    data_frame = pd.read_pickle(dataframe_path)
+    embeddings = torch.load(embeddings_path, map_location="cpu")
+    if isinstance(embeddings, (list, tuple)):
+        embeddings = torch.stack(list(embeddings))
+    return data_frame, embeddings.detach().cpu().float().numpy()
+
+
+def read_kb_store(directory: Path, *, verify: bool = False) -> KBStore:
+    """
+    Open a store written by :func:`write_kb_store`, memory-mapping the embedding matrix read-only.
+    """
+
+    manifest = read_manifest(directory)
+    if verify:
+        verify_kb_store(directory, manifest)
+
+    dtype = manifest["dtype"]
+    if dtype not in SUPPORTED_DTYPES:
+        raise KBStoreError(f"Unsupported embedding dtype '{dtype}' in KB store manifest.")
+    shape = (int(manifest["rows"]), int(manifest["dim"]))
+    embeddings_path = directory / EMBEDDINGS_NAME
+    expected_bytes = shape[0] * shape[1] * np.dtype(dtype).itemsize
+    actual_bytes = embeddings_path.stat().st_size
+    if actual_bytes != expected_bytes:
+        raise KBStoreError(f"'{embeddings_path}' is {actual_bytes} bytes, expected {expected_bytes}.")
+    embeddings = np.memmap(embeddings_path, dtype=dtype, mode="r", shape=shape)
+
+    columns = {
+        name: np.load(directory / COLUMNS_DIR / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        for name in manifest["columns"]
+    }
+    return KBStore(directory=directory, manifest=manifest, embeddings=embeddings, columns=columns)
+
+
+__all__ = [
+    "KBStore",
+    "KBStoreError",
+    "KB_STORE_FORMAT_VERSION",
+    "kb_store_exists",
+    "load_legacy_kb",
+    "read_kb_store",
+    "read_manifest",
+    "verify_kb_store",
+    "write_kb_store",
+]
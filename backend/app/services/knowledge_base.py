@@ -4,16 +4,42 @@ from __future__ import annotations
 Knowledge base loader and semantic search utilities.
 """
 
+import functools
+import os
 import re
-from dataclasses import dataclass
-from typing import Iterable, List, Tuple
+import threading
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-import torch
-from sentence_transformers import SentenceTransformer, util
 
 from ..config import Settings, get_settings
+from .batching import MicroBatcher
+from .cache import LRUCache
+from .kb_store import kb_store_exists, load_legacy_kb, read_kb_store
+from .ingredient_parser import FUNCTIONAL_CLASSES, parse_ingredient
+from .lexical_index import (
+    LexicalHit,
+    LexicalIndex,
+    build_e_code_table,
+    deciding_e_code_rows,
+    resolve_e_code_rows,
+)
+from .metrics import stage_timer
+from .readiness import track_load
+from .result_cache import fingerprint_files
+from .vector_index import (
+    IVF_INDEX_NAME,
+    QUANTIZED_STORAGES,
+    BruteForceIndex,
+    IVFIndex,
+    QuantizedIndex,
+    VectorIndex,
+    top_k_indices,
+)
 
 PARENS_RE = re.compile(r"\([^)]*\)")
 BRACKETS_RE = re.compile(r"\[[^\]]*\]")
@@ -21,6 +47,9 @@ EXTRA_SPACES_RE = re.compile(r"\s+")
 
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Order in which per-ingredient statuses decide the overall verdict (most severe first).
+VERDICT_PRIORITY = ("haram", "mushbooh", "doubtful", "unknown", "halal")
+
 
 def normalize_text_for_matching(text: str) -> str:
     """
@@ -44,6 +73,56 @@ class SemanticMatchResult:
     score: float
     status: str
     matched_text: str
+    tier: str = "semantic"
+
+
+@dataclass
+class IngredientMatch:
+    ingredient: str
+    score: float
+    status: str
+    matched_text: str
+    tier: str = "semantic"
+    # Matches of the sub-ingredients that decided this one, when it was looked up as more than its own text.
+    components: List[IngredientMatch] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> IngredientMatch:
+        payload = dict(payload)
+        components = [cls.from_dict(component) for component in payload.pop("components", [])]
+        return cls(**payload, components=components)
+
+
+@dataclass
+class IngredientListClassification:
+    verdict: SemanticMatchResult
+    matches: List[IngredientMatch]
+
+
+def aggregate_verdict(matches: Sequence[IngredientMatch]) -> SemanticMatchResult:
+    """
+    Combine per-ingredient matches into a single product verdict.
+
+    The most severe status present wins. Within that status the strongest match decides, except for
+    ``halal`` where the weakest match is reported because it bounds the confidence of the whole list.
+    """
+
+    if not matches:
+        raise ValueError("Cannot aggregate an empty list of ingredient matches.")
+
+    worst_rank = min(_status_rank(match.status) for match in matches)
+    candidates = [match for match in matches if _status_rank(match.status) == worst_rank]
+    if VERDICT_PRIORITY[worst_rank] == "halal":
+        deciding = min(candidates, key=lambda match: match.score)
+    else:
+        deciding = max(candidates, key=lambda match: match.score)
+
+    return SemanticMatchResult(
+        score=deciding.score,
+        status=deciding.status,
+        matched_text=deciding.matched_text,
+        tier=deciding.tier,
+    )
 
 
 class KnowledgeBase:
@@ -51,14 +130,49 @@ class KnowledgeBase:
     In-memory representation of the phrase knowledge base plus embedding model.
     """
 
-    def __init__(self, settings: Settings | None = None) -> None:
+    def __init__(self, settings: Settings | None = None, *, previous: KnowledgeBase | None = None) -> None:
+        """
+        Load the KB artefacts. When ``previous`` is given (a hot reload), its embedding model, query
+        embedding cache and batcher are reused: they depend only on the model, not on the KB contents.
+        """
+
         self.settings = settings or get_settings()
-        self._embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        self._kb_df = pd.read_pickle(self.settings.kb_dataframe_path)
-        embeddings = torch.load(self.settings.kb_embeddings_path, map_location="cpu")
-        if isinstance(embeddings, (list, tuple)):
-            embeddings = torch.stack(list(embeddings))
-        self._kb_embeddings = embeddings
+        if previous is not None:
+            self._embedder = previous._embedder
+            self._embedding_cache: LRUCache[str, np.ndarray] = previous._embedding_cache
+            self._encode_batcher: MicroBatcher[str, np.ndarray] | None = previous._encode_batcher
+        else:
+            # Imported here so importing this module does not pull in torch until the KB is actually built.
+            from sentence_transformers import SentenceTransformer
+
+            self._embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
+            # Query embeddings keyed on the normalised text, so repeat questions and labels skip the encoder.
+            self._embedding_cache = LRUCache(
+                self.settings.embedding_cache_size,
+                ttl_seconds=self.settings.embedding_cache_ttl_seconds,
+            )
+            # Optionally coalesce encode calls from concurrent requests into shared forward passes. The batch
+            # function is bound to the model rather than to this instance so a reloaded KB can share it.
+            self._encode_batcher = None
+            if self.settings.batching_enabled:
+                self._encode_batcher = MicroBatcher(
+                    "embedder",
+                    functools.partial(_encode_texts, self._embedder, self.settings.embedding_batch_size),
+                    max_batch_size=self.settings.batching_max_batch_size,
+                    max_wait_ms=self.settings.batching_max_wait_ms,
+                )
+        store_dir = self.settings.kb_store_path
+        if kb_store_exists(store_dir):
+            # Memory-mapped store: embeddings are already unit-normalised and shared via the page cache.
+            store = read_kb_store(store_dir, verify=self.settings.kb_verify_checksums)
+            self.version = store.version
+            self._kb_df = store.data_frame()
+            self._kb_embeddings = store.embeddings
+        else:
+            self.version = fingerprint_files([self.settings.kb_dataframe_path, self.settings.kb_embeddings_path])
+            self._kb_df, embeddings = load_legacy_kb(self.settings.kb_dataframe_path, self.settings.kb_embeddings_path)
+            # Unit-normalise once so cosine similarity against many queries is a single matrix multiply.
+            self._kb_embeddings = _normalize_rows(embeddings)
 
         if "norm_text" not in self._kb_df.columns:
             raise ValueError(
@@ -66,12 +180,180 @@ class KnowledgeBase:
                 "Ensure it matches the exported format from CV2.ipynb."
             )
 
+        # Column arrays let result rows be gathered with one fancy-index instead of per-row ``iloc``.
+        self._statuses = self._column_array("status", "unknown")
+        self._original_texts = self._column_array("original_text", "")
+
+        norm_texts = self._kb_df["norm_text"].astype(str).tolist()
+        self._severity = severity = [_status_rank(status) for status in self._statuses]
+        self._lexical_index: LexicalIndex | None = None
+        if self.settings.lexical_index_enabled:
+            original_texts = self._original_texts.tolist() if "original_text" in self._kb_df.columns else None
+            self._lexical_index = LexicalIndex(
+                norm_texts,
+                original_texts,
+                max_edit_distance=self.settings.fuzzy_max_edit_distance,
+                min_fuzzy_length=self.settings.fuzzy_min_length,
+                severity=severity,
+                code_labels=FUNCTIONAL_CLASSES,
+            )
+
+        # E-number -> KB rows, so sub-ingredients written as E-numbers resolve with a dict lookup; both paths
+        # decide through the same row per code.
+        self._e_code_table: Dict[str, List[int]] = {}
+        self._e_code_rows: Dict[str, int] = {}
+        if self._lexical_index is not None:
+            self._e_code_table = self._lexical_index.e_codes
+            self._e_code_rows = self._lexical_index.e_code_rows
+        elif self.settings.sub_ingredient_matching:
+            self._e_code_table = build_e_code_table(self._original_texts.tolist(), norm_texts)
+            self._e_code_rows = deciding_e_code_rows(self._e_code_table, norm_texts, severity)
+
+        self._vector_index = self._load_vector_index(store_dir if kb_store_exists(store_dir) else None)
+        if self._vector_index.embeddings is None:
+            # The compressed copy replaced the full-precision matrix; let the latter be freed.
+            self._kb_embeddings = None
+
+    def _load_vector_index(self, store_dir: Path | None) -> VectorIndex:
+        """
+        Open the configured index over ``_kb_embeddings``, falling back to a brute-force scan (optionally
+        over a compressed copy) when an IVF index is not requested or has not been built for this KB version.
+        """
+
+        if self.settings.vector_index == "ivf":
+            index_path = store_dir / IVF_INDEX_NAME if store_dir is not None else None
+            if index_path is None or not index_path.is_file():
+                warnings.warn(
+                    "vector_index='ivf' but no IVF index was found next to the KB store; "
+                    "run 'python -m app.cli.build_index'. Falling back to brute-force search.",
+                    RuntimeWarning,
+                )
+            else:
+                try:
+                    index = IVFIndex.load(index_path, self._kb_embeddings, nprobe=self.settings.ivf_nprobe)
+                except (OSError, ValueError, KeyError) as exc:
+                    # e.g. a stale index left behind after build_kb added or removed rows.
+                    warnings.warn(
+                        f"IVF index at '{index_path}' could not be used ({exc}); rebuild it. "
+                        "Falling back to brute-force search.",
+                        RuntimeWarning,
+                    )
+                else:
+                    if index.kb_version == self.version:
+                        return index
+                    warnings.warn(
+                        f"IVF index at '{index_path}' was built for KB version '{index.kb_version}', not "
+                        f"'{self.version}'; rebuild it. Falling back to brute-force search.",
+                        RuntimeWarning,
+                    )
+        if self.settings.embedding_storage in QUANTIZED_STORAGES:
+            # Rescoring reads full-precision rows from the store memmap. A legacy in-RAM matrix would have to
+            # stay resident next to its compressed copy, so it is scanned without rescoring instead.
+            in_memory = not isinstance(self._kb_embeddings, np.memmap)
+            return QuantizedIndex(
+                self._kb_embeddings,
+                self.settings.embedding_storage,
+                rescore_candidates=0 if in_memory else self.settings.rescore_candidates,
+            )
+        return BruteForceIndex(self._kb_embeddings)
+
+    def _column_array(self, column: str, default: str) -> np.ndarray:
+        if column not in self._kb_df.columns:
+            return np.full(len(self._kb_df), default, dtype=object)
+        return self._kb_df[column].fillna(default).astype(str).to_numpy(dtype=object)
+
     @property
     def data_frame(self) -> pd.DataFrame:
         return self._kb_df
 
-    def _encode(self, text: str) -> torch.Tensor:
-        return self._embedder.encode([text], convert_to_tensor=True, normalize_embeddings=True)
+    @property
+    def lexical_index(self) -> LexicalIndex | None:
+        return self._lexical_index
+
+    @property
+    def vector_index(self) -> VectorIndex:
+        return self._vector_index
+
+    @property
+    def e_code_table(self) -> Dict[str, List[int]]:
+        return self._e_code_table
+
+    @property
+    def embedding_cache(self) -> LRUCache[str, np.ndarray]:
+        return self._embedding_cache
+
+    @property
+    def encode_batcher(self) -> MicroBatcher[str, np.ndarray] | None:
+        return self._encode_batcher
+
+    def _lexical_lookup(self, normalized_query: str, raw_query: str) -> LexicalHit | None:
+        if self._lexical_index is None:
+            return None
+        return self._lexical_index.lookup(normalized_query, raw_query)
+
+    def _encode(self, text: str) -> np.ndarray:
+        return self._encode_batch([text])
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        rows: List[np.ndarray | None] = [self._embedding_cache.get(text) for text in texts]
+        missing = list(dict.fromkeys(text for text, row in zip(texts, rows) if row is None))
+        if missing:
+            with stage_timer("encode"):
+                if self._encode_batcher is not None:
+                    encoded = self._encode_batcher.submit_many(missing)
+                else:
+                    encoded = self._encode_uncached(missing)
+            fresh = {text: np.asarray(embedding, dtype=np.float32) for text, embedding in zip(missing, encoded)}
+            for text, embedding in fresh.items():
+                self._embedding_cache.put(text, embedding)
+            rows = [row if row is not None else fresh[text] for text, row in zip(texts, rows)]
+        return np.stack(rows)  # type: ignore[arg-type]
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        return _encode_texts(self._embedder, self.settings.embedding_batch_size, texts)
+
+    def validate(self) -> None:
+        """
+        Sanity-check freshly loaded artefacts before they serve traffic, raising ``ValueError`` on failure.
+        """
+
+        if len(self._kb_df) == 0:
+            raise ValueError("Knowledge base is empty.")
+        if self._vector_index.size != len(self._kb_df):
+            raise ValueError(
+                f"Knowledge base has {len(self._kb_df)} rows but {self._vector_index.size} embeddings."
+            )
+        probe = np.asarray(self._encode_uncached(["water"]), dtype=np.float32)
+        if probe.shape[1] != self._vector_index.dimension:
+            raise ValueError(
+                f"Knowledge base embeddings have dimension {self._vector_index.dimension}, "
+                f"but the embedding model produces {probe.shape[1]}."
+            )
+        _, indices = self._nearest(probe)
+        if indices.shape[1] == 0 or indices[0, 0] < 0:
+            raise ValueError("Knowledge base search returned no result for a probe query.")
+
+    def _nearest(self, query_embeddings: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine scores and row indices of the ``k`` nearest KB rows per query, each shaped ``(n_queries, k)``.
+        """
+
+        with stage_timer("search"):
+            return self._vector_index.search(query_embeddings, k)
+
+    def _results(
+        self,
+        indices: np.ndarray,
+        scores: Sequence[float],
+        tier: str = "semantic",
+    ) -> List[SemanticMatchResult]:
+        statuses = self._statuses[indices]
+        texts = self._original_texts[indices]
+        return [
+            SemanticMatchResult(score=_clamp_score(score), status=status, matched_text=text, tier=tier)
+            for score, status, text in zip(scores, statuses, texts)
+        ]
 
     def classify_ingredient_list(
         self,
@@ -95,28 +377,155 @@ class KnowledgeBase:
         if not normalized_query:
             raise ValueError("Failed to normalise ingredient list for matching.")
 
-        query_embedding = self._encode(normalized_query)
-        cos_scores = util.cos_sim(query_embedding, self._kb_embeddings)[0]
-        scores_np = cos_scores.cpu().numpy()
-        best_index = int(np.argmax(scores_np))
-        best_score = float(scores_np[best_index])
+        scores, indices = self._nearest(self._encode(normalized_query))
+        best_index = int(indices[0, 0])
+        best_score = float(scores[0, 0])
+        if best_index < 0:
+            raise ValueError("No knowledge base entry found for the ingredient list.")
 
-        matched_row = self._kb_df.iloc[best_index]
-        matched_text = str(matched_row.get("original_text", ""))
-        status = str(matched_row.get("status", "unknown"))
+        matched_text = str(self._original_texts[best_index])
+        status = str(self._statuses[best_index])
 
         if best_score < semantic_threshold:
             status = "doubtful"
 
         return SemanticMatchResult(
-            score=best_score,
+            score=_clamp_score(best_score),
             status=status,
             matched_text=matched_text,
         )
 
-    def search_similar(self, query: str, top_k: int | None = None) -> List[SemanticMatchResult]:
+    def classify_ingredients(
+        self,
+        ingredients: Iterable[str],
+        semantic_threshold: float | None = None,
+    ) -> IngredientListClassification:
+        """
+        Match every ingredient against the KB individually and aggregate the results into a verdict.
+
+        All ingredients are embedded in one batched encode call and scored against the KB with a single
+        matrix multiply, so a long list costs roughly the same as one joined query.
+        """
+
+        return self.classify_ingredient_lists([ingredients], semantic_threshold=semantic_threshold)[0]
+
+    def classify_ingredient_lists(
+        self,
+        ingredient_lists: Sequence[Iterable[str]],
+        semantic_threshold: float | None = None,
+    ) -> List[IngredientListClassification]:
+        """
+        Classify several ingredient lists (e.g. one per product image) with a single embedding pass.
+
+        With ``sub_ingredient_matching`` every ingredient is looked up through its sub-ingredient leaves
+        ("emulsifier (E471, soy lecithin)" as ``E471`` and ``soy lecithin``) and reported with the most
+        severe of their matches. Raises ``ValueError`` when any list has no ingredient left after normalisation.
+        """
+
+        semantic_threshold = (
+            semantic_threshold if semantic_threshold is not None else self.settings.semantic_threshold
+        )
+
+        prepared: List[List[Tuple[str, List[_Leaf]]]] = []
+        for ingredients in ingredient_lists:
+            entries = [(ing, self._leaves(ing)) for ing in ingredients if ing]
+            entries = [(ing, leaves) for ing, leaves in entries if leaves]
+            if not entries:
+                raise ValueError("Ingredient list is empty.")
+            prepared.append(entries)
+
+        flat_matches = self._match_ingredients(
+            [leaf for entries in prepared for _, leaves in entries for leaf in leaves], semantic_threshold
+        )
+
+        classifications: List[IngredientListClassification] = []
+        offset = 0
+        for entries in prepared:
+            matches: List[IngredientMatch] = []
+            for ingredient, leaves in entries:
+                matches.append(_combine_leaf_matches(ingredient, flat_matches[offset : offset + len(leaves)]))
+                offset += len(leaves)
+            classifications.append(IngredientListClassification(verdict=aggregate_verdict(matches), matches=matches))
+        return classifications
+
+    def _leaves(self, ingredient: str) -> List[_Leaf]:
+        """
+        ``(text, normalised text, E-numbers)`` for every lookup an ingredient needs.
+        """
+
+        if self.settings.sub_ingredient_matching:
+            leaves = [
+                (leaf.name, normalize_text_for_matching(leaf.name), leaf.e_codes)
+                for leaf in parse_ingredient(ingredient).leaves()
+            ]
+            leaves = [leaf for leaf in leaves if leaf[1]]
+            if leaves:
+                return leaves
+        normalized = normalize_text_for_matching(ingredient)
+        return [(ingredient, normalized, [])] if normalized else []
+
+    def _resolve_e_codes(self, codes: Sequence[str]) -> int | None:
+        """
+        The KB row deciding ``codes`` (the most severe status among them), or ``None`` unless every code is
+        in the E-code table. The lexical ``ecode`` tier resolves through the same rows.
+        """
+
+        rows = resolve_e_code_rows(self._e_code_rows, codes, self._severity)
+        return rows[0] if rows else None
+
+    def _match_ingredients(self, leaves: Sequence[_Leaf], semantic_threshold: float) -> List[IngredientMatch]:
+        # Resolve E-numbers and lexical hits first; only the misses pay for the embedding forward pass.
+        resolved: List[Tuple[int, float, str] | None] = []
+        for ingredient, normalized, codes in leaves:
+            row = self._resolve_e_codes(codes)
+            if row is not None:
+                resolved.append((row, 1.0, "ecode"))
+                continue
+            hit = self._lexical_lookup(normalized, ingredient)
+            resolved.append((hit.rows[0], hit.score, hit.tier) if hit else None)
+
+        misses = [position for position, entry in enumerate(resolved) if entry is None]
+        if misses:
+            queries = self._encode_batch([leaves[position][1] for position in misses])
+            best_scores, best_indices = self._nearest(queries)
+            for position, score, index in zip(misses, best_scores[:, 0].tolist(), best_indices[:, 0].tolist()):
+                resolved[position] = (index, score, "semantic")
+
+        matches: List[IngredientMatch] = []
+        for (ingredient, _, _), entry in zip(leaves, resolved):
+            assert entry is not None
+            index, score, tier = entry
+            if index < 0:
+                # An approximate index probed no populated bucket; report the ingredient as unmatched.
+                score, status, matched_text = 0.0, "doubtful", ""
+            else:
+                status = str(self._statuses[index])
+                matched_text = str(self._original_texts[index])
+                if score < semantic_threshold:
+                    status = "doubtful"
+            matches.append(
+                IngredientMatch(
+                    ingredient=ingredient,
+                    score=_clamp_score(score),
+                    status=status,
+                    matched_text=matched_text,
+                    tier=tier,
+                )
+            )
+        return matches
+
+    def search_similar(
+        self,
+        query: str,
+        top_k: int | None = None,
+        min_score: float | None = None,
+    ) -> List[SemanticMatchResult]:
         """
         Return the top-k KB entries that semantically match the query string.
+
+        Exact phrases, E-numbers and near-miss spellings are answered from the lexical index without
+        running the embedder; the result ``tier`` records which path answered. Semantic matches scoring
+        below ``min_score`` are dropped.
         """
 
         top_k = top_k or self.settings.top_k_chat_results
@@ -124,42 +533,117 @@ class KnowledgeBase:
         if not normalized_query:
             return []
 
-        query_embedding = self._encode(normalized_query)
-        cos_scores = util.cos_sim(query_embedding, self._kb_embeddings)[0]
-        score_indices: List[Tuple[float, int]] = [
-            (float(score), int(idx)) for idx, score in enumerate(cos_scores.cpu().numpy())
-        ]
-        score_indices.sort(key=lambda item: item[0], reverse=True)
-        top_k = min(top_k, len(score_indices))
-
-        results: List[SemanticMatchResult] = []
-        for score, index in score_indices[:top_k]:
-            row = self._kb_df.iloc[index]
-            results.append(
-                SemanticMatchResult(
-                    score=score,
-                    status=str(row.get("status", "unknown")),
-                    matched_text=str(row.get("original_text", "")),
-                )
-            )
-        return results
+        hit = self._lexical_lookup(normalized_query, query)
+        if hit is not None:
+            rows = np.asarray(hit.rows[:top_k], dtype=np.int64)
+            return self._results(rows, [hit.score] * len(rows), tier=hit.tier)
+
+        scores, indices = self._nearest(self._encode(normalized_query), top_k)
+        keep = indices[0] >= 0
+        if min_score is not None:
+            keep &= scores[0] >= min_score
+        return self._results(indices[0][keep], scores[0][keep].tolist())
+
+
+# An ingredient lookup: the text as written, its normalised form and the E-numbers it names.
+_Leaf = Tuple[str, str, List[str]]
+
+
+def _status_rank(status: str) -> int:
+    return VERDICT_PRIORITY.index(status) if status in VERDICT_PRIORITY else VERDICT_PRIORITY.index("unknown")
+
+
+def _combine_leaf_matches(ingredient: str, matches: List[IngredientMatch]) -> IngredientMatch:
+    if len(matches) == 1 and matches[0].ingredient == ingredient:
+        return matches[0]
+    verdict = aggregate_verdict(matches)
+    return IngredientMatch(
+        ingredient=ingredient,
+        score=verdict.score,
+        status=verdict.status,
+        matched_text=verdict.matched_text,
+        tier=verdict.tier,
+        components=list(matches),
+    )
+
+
+def _encode_texts(embedder, batch_size: int, texts: List[str]) -> np.ndarray:
+    return embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.maximum(norms, 1e-12)).astype(np.float32, copy=False)
+
+
+def _clamp_score(score: float) -> float:
+    # Cosine similarity can drift marginally outside [0, 1] (float error, unrelated phrases).
+    return min(1.0, max(0.0, float(score)))
 
 
 _kb_instance: KnowledgeBase | None = None
+_kb_lock = threading.Lock()
+_reload_lock = threading.Lock()
 
 
 def get_knowledge_base() -> KnowledgeBase:
     global _kb_instance
     if _kb_instance is None:
-        _kb_instance = KnowledgeBase()
+        # Warm-up threads and first requests may race here; only one of them builds the KB.
+        with _kb_lock:
+            if _kb_instance is None:
+                with track_load("knowledge_base"):
+                    _kb_instance = KnowledgeBase()
+    return _kb_instance
+
+
+def reload_knowledge_base(settings: Settings | None = None) -> KnowledgeBase:
+    """
+    Build a new KB from the current artefacts, validate it and atomically swap it in.
+
+    Requests hold on to the instance they fetched, so those in flight finish on the old KB while new ones
+    get the replacement. Raises (leaving the active KB untouched) when loading or validation fails.
+    """
+
+    global _kb_instance
+    with _reload_lock:
+        candidate = KnowledgeBase(settings or get_settings(), previous=_kb_instance)
+        candidate.validate()
+        with _kb_lock:
+            _kb_instance = candidate
+    return candidate
+
+
+def current_knowledge_base() -> KnowledgeBase | None:
+    """
+    The active KB if one has been loaded, without triggering a load.
+    """
+
     return _kb_instance
 
 
+def _reset_lock_after_fork() -> None:
+    # A KB built before ``fork`` is inherited copy-on-write; only the locks must not carry over a held state.
+    global _kb_lock, _reload_lock
+    _kb_lock = threading.Lock()
+    _reload_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
 __all__ = [
+    "IngredientListClassification",
+    "IngredientMatch",
     "KnowledgeBase",
     "SemanticMatchResult",
+    "aggregate_verdict",
+    "current_knowledge_base",
     "get_knowledge_base",
     "normalize_text_for_matching",
+    "reload_knowledge_base",
+    "top_k_indices",
 ]
 
 
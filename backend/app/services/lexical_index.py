@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+"""
+Lexical fast-path index that resolves exact phrases, E-numbers and OCR typos without the embedder.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Set
+
+E_CODE_RE = re.compile(r"\be[\s-]?(\d{3,4})\s?([a-z])?\b", re.IGNORECASE)
+WORD_RE = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+# Words that may join E-numbers in a query without naming anything themselves ("e100 and e120").
+E_CODE_CONNECTORS = frozenset({"and", "or", "e"})
+
+# Fuzzy lookups generate O(len ** distance) delete variants, so very long queries skip that tier.
+MAX_FUZZY_QUERY_LENGTH = 64
+
+
+def extract_e_codes(text: str) -> List[str]:
+    """
+    Return the canonical E-numbers (``e471``, ``e150a``) mentioned in ``text``, in order of appearance.
+    """
+
+    if not isinstance(text, str):
+        return []
+    codes: List[str] = []
+    for match in E_CODE_RE.finditer(text):
+        code = f"e{match.group(1)}{(match.group(2) or '').lower()}"
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def build_e_code_table(*columns: Sequence[str]) -> Dict[str, List[int]]:
+    """
+    Map every E-number mentioned in any of the row-aligned ``columns`` to the rows that mention it.
+    """
+
+    table: Dict[str, List[int]] = {}
+    for column in columns:
+        for row, text in enumerate(column):
+            for code in extract_e_codes(text):
+                rows = table.setdefault(code, [])
+                if row not in rows:
+                    rows.append(row)
+    return table
+
+
+def deciding_e_code_rows(
+    table: Dict[str, List[int]], norm_texts: Sequence[str], severity: Sequence[int] | None = None
+) -> Dict[str, int]:
+    """
+    The row that speaks for each E-number: an entry that is the code itself ("E471") when the KB has one,
+    otherwise the most severe of the rows mentioning it (``severity`` ranks rows, lowest first). Ties go to the
+    row naming the fewest E-numbers, so a list that merely mentions the code ("contains E100 and E120") never
+    decides it over the code's own entry.
+    """
+
+    mentions = Counter(row for code_rows in table.values() for row in code_rows)
+    deciding: Dict[str, int] = {}
+    for code, code_rows in table.items():
+        exact = [row for row in code_rows if "".join(filter(str.isalnum, norm_texts[row])) == code]
+        deciding[code] = min(
+            exact or code_rows,
+            key=lambda row: (severity[row] if severity is not None else 0, mentions[row], len(norm_texts[row])),
+        )
+    return deciding
+
+
+def resolve_e_code_rows(
+    deciding: Dict[str, int], codes: Sequence[str], severity: Sequence[int] | None = None
+) -> Optional[List[int]]:
+    """
+    The deciding row of every code in ``codes``, most severe first, or ``None`` unless all of them are known.
+    """
+
+    rows: List[int] = []
+    for code in codes:
+        row = deciding.get(code)
+        if row is None:
+            return None
+        if row not in rows:
+            rows.append(row)
+    if severity is not None:
+        rows.sort(key=severity.__getitem__)
+    return rows or None
+
+
+def bounded_edit_distance(left: str, right: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between ``left`` and ``right``, or ``None`` once it exceeds ``max_distance``.
+    """
+
+    if abs(len(left) - len(right)) > max_distance:
+        return None
+    if left == right:
+        return 0
+
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, start=1):
+        current = [i] + [0] * len(right)
+        row_min = current[0]
+        for j, right_char in enumerate(right, start=1):
+            cost = 0 if left_char == right_char else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+def _edits_long_words(query: str, key: str, min_length: int) -> bool:
+    """
+    Whether every word the edit touches is at least ``min_length`` long: a typo in "sugar" is recoverable,
+    but "beet" and "beef" are both real words, so a short word is never corrected.
+    """
+
+    query_words, key_words = query.split(), key.split()
+    if len(query_words) != len(key_words):
+        # The edit added or removed a space ("sunfloweroil"); the phrase-level length check applies.
+        return True
+    return all(
+        min(len(query_word), len(key_word)) >= min_length
+        for query_word, key_word in zip(query_words, key_words)
+        if query_word != key_word
+    )
+
+
+def _deletes(text: str, max_distance: int) -> Set[str]:
+    variants = {text}
+    frontier = {text}
+    for _ in range(max_distance):
+        next_frontier: Set[str] = set()
+        for word in frontier:
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1 :])
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+@dataclass
+class LexicalHit:
+    tier: str
+    rows: List[int]
+    score: float
+
+
+class LexicalIndex:
+    """
+    Precomputed exact, E-number and bounded-edit-distance lookups over the KB ``norm_text`` column.
+
+    The fuzzy tier uses a symmetric-delete index: every key is stored under all variants reachable by
+    up to ``max_edit_distance`` deletions, so a query only has to verify the handful of keys sharing one
+    of its own delete variants instead of scanning the whole KB. Each word the edit changes must itself
+    be at least ``min_fuzzy_length`` long.
+
+    Each E-number resolves to its deciding row (see :func:`deciding_e_code_rows`, ranked by ``severity``),
+    and only queries naming nothing but E-numbers and one of ``code_labels`` ("colours E100, E120") take
+    that tier.
+    """
+
+    def __init__(
+        self,
+        norm_texts: Sequence[str],
+        original_texts: Sequence[str] | None = None,
+        *,
+        max_edit_distance: int = 1,
+        min_fuzzy_length: int = 5,
+        severity: Sequence[int] | None = None,
+        code_labels: Collection[str] = (),
+    ) -> None:
+        self.max_edit_distance = max_edit_distance
+        self.min_fuzzy_length = min_fuzzy_length
+        self._severity = severity
+        self._code_labels = frozenset(code_labels)
+
+        self._exact: Dict[str, List[int]] = {}
+        for row, text in enumerate(norm_texts):
+            if text:
+                self._exact.setdefault(text, []).append(row)
+
+        sources: Iterable[Sequence[str]] = (norm_texts,) if original_texts is None else (original_texts, norm_texts)
+        self._e_codes = build_e_code_table(*sources)
+        self._e_code_rows = deciding_e_code_rows(self._e_codes, norm_texts, severity)
+
+        self._keys: List[str] = list(self._exact)
+        self._delete_index: Dict[str, List[int]] = {}
+        if max_edit_distance > 0:
+            for key_id, key in enumerate(self._keys):
+                if len(key) < min_fuzzy_length or len(key) > MAX_FUZZY_QUERY_LENGTH:
+                    continue
+                for variant in _deletes(key, max_edit_distance):
+                    self._delete_index.setdefault(variant, []).append(key_id)
+
+    @property
+    def e_codes(self) -> Dict[str, List[int]]:
+        return self._e_codes
+
+    @property
+    def e_code_rows(self) -> Dict[str, int]:
+        return self._e_code_rows
+
+    def lookup_exact(self, normalized_query: str) -> Optional[LexicalHit]:
+        rows = self._exact.get(normalized_query)
+        if rows:
+            return LexicalHit(tier="exact", rows=list(rows), score=1.0)
+        return None
+
+    def lookup_e_codes(self, query: str) -> Optional[LexicalHit]:
+        """
+        Resolve a query made of E-numbers to their deciding rows, most severe first; only a full resolution
+        counts as a hit. A query that also names something else ("pork gelatin e441") is left to the other tiers.
+        """
+
+        codes = extract_e_codes(query)
+        if not codes:
+            return None
+        words = [word for word in WORD_RE.findall(E_CODE_RE.sub(" ", query).lower()) if word not in E_CODE_CONNECTORS]
+        label = " ".join(words)
+        if label and label not in self._code_labels and label.removesuffix("s") not in self._code_labels:
+            return None
+        rows = resolve_e_code_rows(self._e_code_rows, codes, self._severity)
+        return LexicalHit(tier="ecode", rows=rows, score=1.0) if rows else None
+
+    def lookup_fuzzy(self, normalized_query: str) -> Optional[LexicalHit]:
+        if self.max_edit_distance <= 0:
+            return None
+        if not self.min_fuzzy_length <= len(normalized_query) <= MAX_FUZZY_QUERY_LENGTH:
+            return None
+
+        candidates: Set[int] = set()
+        for variant in _deletes(normalized_query, self.max_edit_distance):
+            candidates.update(self._delete_index.get(variant, ()))
+
+        best_key: Optional[str] = None
+        best_distance = self.max_edit_distance + 1
+        for key_id in sorted(candidates):
+            key = self._keys[key_id]
+            distance = bounded_edit_distance(normalized_query, key, self.max_edit_distance)
+            if distance is None or not _edits_long_words(normalized_query, key, self.min_fuzzy_length):
+                continue
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+                if distance == 0:
+                    break
+
+        if best_key is None:
+            return None
+        score = 1.0 - best_distance / max(len(best_key), len(normalized_query))
+        return LexicalHit(tier="fuzzy", rows=list(self._exact[best_key]), score=score)
+
+    def lookup(self, normalized_query: str, raw_query: str | None = None) -> Optional[LexicalHit]:
+        """
+        Try the exact, E-number and fuzzy tiers in order, returning the first hit.
+        """
+
+        return (
+            self.lookup_exact(normalized_query)
+            or self.lookup_e_codes(raw_query if raw_query is not None else normalized_query)
+            or self.lookup_fuzzy(normalized_query)
+        )
+
+
+__all__ = [
+    "LexicalHit",
+    "LexicalIndex",
+    "bounded_edit_distance",
+    "build_e_code_table",
+    "deciding_e_code_rows",
+    "extract_e_codes",
+    "resolve_e_code_rows",
+]
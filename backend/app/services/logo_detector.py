@@ -5,13 +5,23 @@ Halal logo detection using the trained YOLOv8 model.
 """
 
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
 import contextlib
-import torch
-from ultralytics import YOLO
+import os
+import threading
+
+from PIL import Image
 
 from ..config import Settings, get_settings
+from .batching import MicroBatcher
+from .imaging import ImageSource, fit_to_max_side, load_image
+from .metrics import stage_timer
+from .readiness import track_load
+from .result_cache import fingerprint_files
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
 
 
 class LogoDetector:
@@ -22,17 +32,46 @@ class LogoDetector:
     def __init__(self, weights_path: Path, settings: Settings | None = None) -> None:
         self.settings = settings or get_settings()
         self.weights_path = weights_path
+        self.image_size = self.settings.detector_image_size
+        self.version = f"{fingerprint_files([weights_path])}-{self.image_size}"
         self._model: Optional[YOLO] = None
+        self._batcher: Optional[MicroBatcher] = None
 
         if self.weights_path.exists():
+            # Deferred so torch/ultralytics are only imported when a detector is actually built.
+            from ultralytics import YOLO
+
             with _force_weights_only_false():
                 self._model = YOLO(str(self.weights_path))
+            if self.settings.batching_enabled:
+                self._batcher = MicroBatcher(
+                    "detector",
+                    self._predict,
+                    max_batch_size=self.settings.batching_max_batch_size,
+                    max_wait_ms=self.settings.batching_max_wait_ms,
+                )
 
     @property
     def available(self) -> bool:
         return self._model is not None
 
-    def detect(self, image_path: Path, confidence_threshold: float = 0.5) -> bool:
+    @property
+    def batcher(self) -> Optional[MicroBatcher]:
+        return self._batcher
+
+    def _predict(self, images: List[ImageSource]) -> list:
+        sources = [self._model_source(image) for image in images]
+        return list(self._model(sources, verbose=False, imgsz=self.image_size))  # type: ignore[misc]
+
+    def _model_source(self, image: ImageSource) -> Image.Image:
+        # Hand Ultralytics an image already at its input size: paths and bytes are draft-decoded straight
+        # to it, and large decoded images skip the full-resolution letterbox resize. Bilinear matches the
+        # interpolation of YOLO's own letterboxing and is much cheaper than the LANCZOS used for OCR.
+        if isinstance(image, Image.Image):
+            return fit_to_max_side(image, self.image_size, Image.Resampling.BILINEAR)
+        return load_image(image, max_side=self.image_size)
+
+    def detect(self, image: ImageSource, confidence_threshold: float = 0.5) -> bool:
         """
         Return True when a halal logo is detected with confidence above the threshold.
         """
@@ -40,34 +79,79 @@ class LogoDetector:
         if not self.available:
             return False
 
-        results = self._model(image_path, verbose=False)  # type: ignore[operator]
+        with stage_timer("detect"):
+            if self._batcher is not None:
+                return _has_logo(self._batcher.submit(image), confidence_threshold)
+            source = self._model_source(image)
+            results = self._model(source, verbose=False, imgsz=self.image_size)  # type: ignore[operator]
         if not results:
             return False
 
-        result = results[0]
-        if not getattr(result, "boxes", None):
-            return False
+        return _has_logo(results[0], confidence_threshold)
+
+    def detect_many(self, images: Sequence[ImageSource], confidence_threshold: float = 0.5) -> List[bool]:
+        """
+        Run the detector over several images, ``detector_batch_size`` images per forward pass.
+        """
+
+        if not self.available or not images:
+            return [False] * len(images)
 
-        for box in result.boxes:
-            score = float(box.conf[0])
-            if score >= confidence_threshold:
-                return True
+        if self._batcher is not None:
+            with stage_timer("detect"):
+                results = self._batcher.submit_many(images)
+            return [_has_logo(result, confidence_threshold) for result in results]
+
+        batch_size = self.settings.detector_batch_size
+        detections: List[bool] = []
+        for start in range(0, len(images), batch_size):
+            with stage_timer("detect"):
+                chunk = [self._model_source(image) for image in images[start : start + batch_size]]
+                results = self._model(chunk, verbose=False, imgsz=self.image_size)  # type: ignore[operator]
+            detections.extend(_has_logo(result, confidence_threshold) for result in results)
+        return detections
+
+
+def _has_logo(result, confidence_threshold: float) -> bool:
+    if not getattr(result, "boxes", None):
         return False
 
+    for box in result.boxes:
+        score = float(box.conf[0])
+        if score >= confidence_threshold:
+            return True
+    return False
+
 
 _detector: Optional[LogoDetector] = None
+_detector_lock = threading.Lock()
 
 
 def get_logo_detector() -> LogoDetector:
     global _detector
     if _detector is None:
-        settings = get_settings()
-        _detector = LogoDetector(settings.yolo_weights_path, settings=settings)
+        with _detector_lock:
+            if _detector is None:
+                settings = get_settings()
+                with track_load("logo_detector"):
+                    _detector = LogoDetector(settings.yolo_weights_path, settings=settings)
     return _detector
 
 
+def _reset_lock_after_fork() -> None:
+    # A detector built before ``fork`` is inherited copy-on-write; only the lock must not carry over a held state.
+    global _detector_lock
+    _detector_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
 @contextlib.contextmanager
 def _force_weights_only_false():
+    import torch
+
     original_load = torch.load
 
     def custom_load(*args, **kwargs):
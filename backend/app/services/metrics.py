@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+"""
+Lightweight per-stage latency histograms and outcome counters, rendered in the Prometheus text format.
+
+Instrumentation is off unless ``HALAL_METRICS_ENABLED`` is set: :func:`stage_timer` then returns a shared
+no-op context manager, so the hot path pays one global lookup per stage. Metrics are per process; with
+several workers each one exposes its own values.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .readiness import readiness
+
+# Upper bounds (seconds) of the latency buckets, from sub-millisecond lexical hits to slow OCR calls.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; buckets are stored per bucket and made cumulative when rendered.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[position] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._stages: Dict[str, Histogram] = {}
+        self._outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def record_outcome(self, outcome: str) -> None:
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def render(self) -> str:
+        lines: List[str] = [
+            "# HELP halal_stage_duration_seconds Time spent in each analysis stage.",
+            "# TYPE halal_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            outcomes = sorted(self._outcomes.items())
+        for stage, histogram in stages:
+            cumulative, total = histogram.snapshot()
+            for bound, count in zip([*histogram.buckets, "+Inf"], cumulative):
+                lines.append(f'halal_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'halal_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'halal_stage_duration_seconds_count{{stage="{stage}"}} {cumulative[-1]}')
+
+        lines += [
+            "# HELP halal_analysis_outcomes_total Analyses by outcome (cached, logo, ocr, invalid, undecodable).",
+            "# TYPE halal_analysis_outcomes_total counter",
+        ]
+        lines += [f'halal_analysis_outcomes_total{{outcome="{outcome}"}} {count}' for outcome, count in outcomes]
+
+        _, components = readiness()
+        lines += [
+            "# HELP halal_component_ready Whether a heavy component (model, KB, OCR client) has loaded.",
+            "# TYPE halal_component_ready gauge",
+        ]
+        lines += [
+            f'halal_component_ready{{component="{name}"}} {int(status["state"] == "ready")}'
+            for name, status in sorted(components.items())
+        ]
+        lines += [
+            "# HELP halal_component_load_seconds Time taken to load each heavy component.",
+            "# TYPE halal_component_load_seconds gauge",
+        ]
+        lines += [
+            f'halal_component_load_seconds{{component="{name}"}} {status["duration_seconds"]:.6f}'
+            for name, status in sorted(components.items())
+            if status["duration_seconds"] is not None
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __enter__(self) -> "_StageTimer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        elapsed = time.perf_counter() - self._started
+        _registry.observe_stage(self.stage, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.stage] = timings.get(self.stage, 0.0) + elapsed
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_enabled = False
+_registry = MetricsRegistry()
+_NULL_TIMER = _NullTimer()
+# Stage durations of the request being served, for its ``Server-Timing`` header.
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def set_metrics_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+def stage_timer(stage: str):
+    """
+    Context manager timing one pipeline stage (a no-op while metrics are disabled).
+    """
+
+    return _StageTimer(stage) if _enabled else _NULL_TIMER
+
+
+def record_outcome(outcome: str) -> None:
+    if _enabled:
+        _registry.record_outcome(outcome)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """
+    Begin collecting stage durations for the current request; later stages in this context add to it.
+    """
+
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    # Copy first: inference threads of an abandoned request may still be adding to the dict.
+    return ", ".join(f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in list(timings.items()))
+
+
+def render_metrics() -> str:
+    return _registry.render()
+
+
+__all__ = [
+    "DURATION_BUCKETS",
+    "Histogram",
+    "MetricsRegistry",
+    "metrics_enabled",
+    "record_outcome",
+    "render_metrics",
+    "server_timing_header",
+    "set_metrics_enabled",
+    "stage_timer",
+    "start_request_timings",
+]
@@ -1,56 +1,390 @@
 from __future__ import annotations
 
 """
-Gemini-based OCR utilities.
+OCR backends (Google Gemini, local Tesseract and a deterministic stub) behind a fallback chain.
+
+Backends are tried in the order of ``HALAL_OCR_BACKENDS``. Each call is bounded by the backend's timeout,
+and a per-backend circuit breaker stops a slow or failing backend from adding its latency to every
+request until it has had time to recover.
 """
 
-from pathlib import Path
-from typing import Optional
+import asyncio
+import os
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from PIL import Image
-import google.generativeai as genai
 
 from ..config import Settings, get_settings
+from .circuit_breaker import CircuitBreaker
+from .imaging import ImageSource, load_image
+from .metrics import stage_timer
+from .readiness import track_load
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
+DEFAULT_OCR_PROMPT = "Extract all text from this image exactly as it appears. Preserve line breaks and formatting."
 
 _gemini_model: Optional[genai.GenerativeModel] = None
 _configured_api_key: Optional[str] = None
+_model_lock = threading.Lock()
+
+
+class OCRError(RuntimeError):
+    """
+    Raised when no configured OCR backend returned text for an image.
+    """
+
+
+@dataclass
+class OCRResult:
+    text: str
+    backend: str
+    # True when a fallback answered because an earlier backend failed, timed out or was skipped.
+    degraded: bool = False
 
 
 def _get_model(settings: Settings) -> genai.GenerativeModel:
+    if _gemini_model is None or settings.gemini_api_key != _configured_api_key:
+        with _model_lock:
+            if _gemini_model is None or settings.gemini_api_key != _configured_api_key:
+                _configure_model(settings)
+    return _gemini_model
+
+
+def _configure_model(settings: Settings) -> None:
     global _gemini_model, _configured_api_key
     if not settings.gemini_api_key:
         raise RuntimeError(
             "Gemini API key is not configured. Set HALAL_GEMINI_API_KEY or provide apikey.py."
         )
-    if _gemini_model is None or settings.gemini_api_key != _configured_api_key:
-        genai.configure(api_key=settings.gemini_api_key)
-        _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
-        _configured_api_key = settings.gemini_api_key
-    return _gemini_model
+    # The Gemini SDK is slow to import, so it is only loaded once OCR is first needed.
+    import google.generativeai as genai
 
+    genai.configure(api_key=settings.gemini_api_key)
+    _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    _configured_api_key = settings.gemini_api_key
 
-def extract_text_from_image(image_path: Path, prompt: Optional[str] = None, settings: Settings | None = None) -> str:
+
+class OCRBackend(ABC):
     """
-    Run OCR over ``image_path`` using Google Gemini.
+    One way of turning an image into text. Backends return ``""`` when the image contains no text.
     """
 
-    settings = settings or get_settings()
-    prompt = prompt or "Extract all text from this image exactly as it appears. Preserve line breaks and formatting."
+    name: str
+
+    def __init__(self, settings: Settings, timeout_seconds: Optional[float] = None) -> None:
+        self.settings = settings
+        self.timeout_seconds = timeout_seconds
+
+    @property
+    def version(self) -> str:
+        """
+        Identifies this backend's output in cache keys.
+        """
+
+        return self.name
+
+    def load(self) -> None:
+        """
+        Import and configure whatever the backend needs, so the first request does not pay for it.
+        """
+
+    @abstractmethod
+    def recognise(self, image: Image.Image, prompt: str) -> str:
+        raise NotImplementedError
+
+    async def recognise_async(self, image: Image.Image, prompt: str) -> str:
+        # Local backends block; run them on a thread so the event loop stays free.
+        return await asyncio.to_thread(self.recognise, image, prompt)
+
+
+class GeminiOCRBackend(OCRBackend):
+    name = "gemini"
+
+    @property
+    def version(self) -> str:
+        return GEMINI_MODEL_NAME
+
+    def load(self) -> None:
+        _get_model(self.settings)
+
+    def recognise(self, image: Image.Image, prompt: str) -> str:
+        response = _get_model(self.settings).generate_content([prompt, image], **self._request_options())
+        return _response_text(response)
+
+    async def recognise_async(self, image: Image.Image, prompt: str) -> str:
+        model = _get_model(self.settings)
+        response = await model.generate_content_async([prompt, image], **self._request_options())
+        return _response_text(response)
+
+    def _request_options(self) -> Dict[str, Any]:
+        if self.timeout_seconds is None:
+            return {}
+        return {"request_options": {"timeout": self.timeout_seconds}}
+
+
+class TesseractOCRBackend(OCRBackend):
+    """
+    Local CPU OCR through ``pytesseract`` (optional: needs the package and the ``tesseract`` binary).
+    """
+
+    name = "tesseract"
+
+    def __init__(self, settings: Settings, timeout_seconds: Optional[float] = None) -> None:
+        super().__init__(settings, timeout_seconds)
+        self.lang = settings.ocr_tesseract_lang
+        self._pytesseract = None
+
+    @property
+    def version(self) -> str:
+        return f"tesseract:{self.lang}"
+
+    def load(self) -> None:
+        if self._pytesseract is not None:
+            return
+        try:
+            import pytesseract
+        except ImportError as exc:
+            raise RuntimeError("The tesseract OCR backend needs 'pip install pytesseract'.") from exc
+        pytesseract.get_tesseract_version()  # fails fast when the binary is not installed
+        self._pytesseract = pytesseract
+
+    def recognise(self, image: Image.Image, prompt: str) -> str:
+        self.load()
+        # Tesseract kills its subprocess itself once the timeout passes (0 means no limit).
+        text = self._pytesseract.image_to_string(image, lang=self.lang, timeout=self.timeout_seconds or 0)
+        return text.strip()
+
+
+class StubOCRBackend(OCRBackend):
+    """
+    Deterministic backend for tests and offline development: every image reads as ``HALAL_OCR_STUB_TEXT``.
+    """
+
+    name = "stub"
+
+    def recognise(self, image: Image.Image, prompt: str) -> str:
+        return self.settings.ocr_stub_text
 
-    if not image_path.exists():
-        raise FileNotFoundError(f"Image path '{image_path}' does not exist.")
+    async def recognise_async(self, image: Image.Image, prompt: str) -> str:
+        return self.recognise(image, prompt)
 
-    model = _get_model(settings)
-    image = Image.open(image_path)
 
-    response = model.generate_content([prompt, image])
-    if not response or not getattr(response, "text", "").strip():
-        raise RuntimeError("No text returned by Gemini OCR.")
-    return response.text.strip()
+OCR_BACKENDS = {
+    GeminiOCRBackend.name: GeminiOCRBackend,
+    TesseractOCRBackend.name: TesseractOCRBackend,
+    StubOCRBackend.name: StubOCRBackend,
+}
+
+
+class OCRChain:
+    """
+    Try OCR backends in order until one returns text.
+
+    A backend that raises or exceeds its timeout counts as a failure on its circuit breaker; while the
+    breaker is open the backend is skipped outright. Empty output is not a failure, but the next backend
+    still gets a chance to read the image.
+    """
+
+    def __init__(self, backends: List[OCRBackend], breakers: List[CircuitBreaker]) -> None:
+        if not backends:
+            raise ValueError("At least one OCR backend is required.")
+        self.backends = backends
+        self.breakers = breakers
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "OCRChain":
+        timeouts = {
+            "gemini": settings.ocr_gemini_timeout_seconds,
+            "tesseract": settings.ocr_tesseract_timeout_seconds,
+        }
+        backends = [OCR_BACKENDS[name](settings, timeouts.get(name)) for name in settings.ocr_backends.split(",")]
+        breakers = [
+            CircuitBreaker(settings.ocr_breaker_failure_threshold, settings.ocr_breaker_reset_seconds)
+            for _ in backends
+        ]
+        return cls(backends, breakers)
+
+    @property
+    def version(self) -> str:
+        """
+        Cache tag of the preferred backend; fallback answers are flagged ``degraded`` and never cached.
+        """
+
+        return self.backends[0].version
+
+    def load(self) -> None:
+        """
+        Load every backend, failing only when none of them can be used.
+        """
+
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            with track_load("ocr"):
+                errors = []
+                for backend in self.backends:
+                    try:
+                        backend.load()
+                    except Exception as exc:  # noqa: BLE001 - a later backend may still work.
+                        errors.append(f"{backend.name}: {exc}")
+                if len(errors) == len(self.backends):
+                    raise OCRError(f"No OCR backend could be loaded ({'; '.join(errors)}).")
+            self._loaded = True
+
+    def recognise(self, image: Image.Image, prompt: Optional[str] = None) -> OCRResult:
+        self.load()
+        errors: List[str] = []
+        for position, (backend, breaker) in enumerate(zip(self.backends, self.breakers)):
+            if not breaker.allow():
+                errors.append(f"{backend.name}: circuit open")
+                continue
+            try:
+                with stage_timer("ocr"):
+                    text = backend.recognise(image, prompt or DEFAULT_OCR_PROMPT)
+            except Exception as exc:  # noqa: BLE001
+                breaker.record_failure()
+                errors.append(f"{backend.name}: {type(exc).__name__}: {exc}")
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record_success()
+            if text:
+                return OCRResult(text=text, backend=backend.name, degraded=position > 0)
+            errors.append(f"{backend.name}: no text")
+        raise OCRError(f"No text returned by OCR ({'; '.join(errors)}).")
+
+    async def recognise_async(self, image: Image.Image, prompt: Optional[str] = None) -> OCRResult:
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+        errors: List[str] = []
+        for position, (backend, breaker) in enumerate(zip(self.backends, self.breakers)):
+            if not breaker.allow():
+                errors.append(f"{backend.name}: circuit open")
+                continue
+            try:
+                with stage_timer("ocr"):
+                    text = await asyncio.wait_for(
+                        backend.recognise_async(image, prompt or DEFAULT_OCR_PROMPT), timeout=backend.timeout_seconds
+                    )
+            except asyncio.TimeoutError:
+                breaker.record_failure()
+                errors.append(f"{backend.name}: timed out after {backend.timeout_seconds:g}s")
+                continue
+            except Exception as exc:  # noqa: BLE001
+                breaker.record_failure()
+                errors.append(f"{backend.name}: {type(exc).__name__}: {exc}")
+                continue
+            except BaseException:
+                # Cancelled by a disconnecting client or an outer timeout: no verdict on the backend.
+                breaker.release()
+                raise
+            breaker.record_success()
+            if text:
+                return OCRResult(text=text, backend=backend.name, degraded=position > 0)
+            errors.append(f"{backend.name}: no text")
+        raise OCRError(f"No text returned by OCR ({'; '.join(errors)}).")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            backend.name: {"timeout_seconds": backend.timeout_seconds, **breaker.stats().as_dict()}
+            for backend, breaker in zip(self.backends, self.breakers)
+        }
+
+
+_chain: Optional[OCRChain] = None
+_chain_lock = threading.Lock()
+
+
+def get_ocr_chain(settings: Settings | None = None) -> OCRChain:
+    """
+    The configured OCR fallback chain. Backends load on first use (or via :meth:`OCRChain.load`).
+    """
+
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = OCRChain.from_settings(settings or get_settings())
+    return _chain
+
+
+def load_ocr_backends(settings: Settings | None = None) -> OCRChain:
+    chain = get_ocr_chain(settings)
+    chain.load()
+    return chain
+
+
+def _reset_after_fork() -> None:
+    # The Gemini client's gRPC channel is not fork-safe; each worker configures its own on first use.
+    global _gemini_model, _configured_api_key, _model_lock, _chain, _chain_lock
+    _gemini_model = None
+    _configured_api_key = None
+    _model_lock = threading.Lock()
+    _chain = None
+    _chain_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_ocr_model(settings: Settings | None = None) -> genai.GenerativeModel:
+    """
+    Configure (once) and return the Gemini OCR client.
+    """
+
+    return _get_model(settings or get_settings())
+
+
+def extract_text_from_image(image: ImageSource, prompt: Optional[str] = None, settings: Settings | None = None) -> str:
+    """
+    Run OCR over ``image`` (a path, raw bytes or an already decoded image) with the configured backends.
+    """
+
+    return get_ocr_chain(settings).recognise(load_image(image), prompt).text
+
+
+async def extract_text_from_image_async(
+    image: ImageSource, prompt: Optional[str] = None, settings: Settings | None = None
+) -> str:
+    """
+    Non-blocking variant of :func:`extract_text_from_image` for use from async routes.
+    """
+
+    return (await get_ocr_chain(settings).recognise_async(load_image(image), prompt)).text
 
 
-__all__ = ["extract_text_from_image", "GEMINI_MODEL_NAME"]
+def _response_text(response) -> str:
+    if not response:
+        raise RuntimeError("No response returned by Gemini OCR.")
+    return (getattr(response, "text", "") or "").strip()
 
 
+__all__ = [
+    "DEFAULT_OCR_PROMPT",
+    "GEMINI_MODEL_NAME",
+    "GeminiOCRBackend",
+    "OCRBackend",
+    "OCRChain",
+    "OCRError",
+    "OCRResult",
+    "OCR_BACKENDS",
+    "StubOCRBackend",
+    "TesseractOCRBackend",
+    "extract_text_from_image",
+    "extract_text_from_image_async",
+    "get_ocr_chain",
+    "get_ocr_model",
+    "load_ocr_backends",
+]
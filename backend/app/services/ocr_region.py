@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+"""
+Locate the ingredients panel on a label so only that region is sent to OCR.
+
+Two locators are available: a YOLO model trained with an ingredients class (next to the halal logo
+detector), and a text-density heuristic that needs no weights and picks the largest dense block of text.
+Both return ``None`` when they find nothing, and the caller then falls back to full-image OCR.
+"""
+
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..config import Settings, get_settings
+from .imaging import fit_to_max_side
+from .metrics import stage_timer
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+# The heuristic works on a small grayscale copy split into square cells; a cell is "text" when enough of
+# its pixels sit on a sharp horizontal intensity change (glyph strokes).
+HEURISTIC_SIDE = 480
+HEURISTIC_CELL = 8
+HEURISTIC_EDGE_THRESHOLD = 40
+HEURISTIC_CELL_DENSITY = 0.12
+HEURISTIC_MIN_AREA = 0.02
+HEURISTIC_MAX_AREA = 0.9
+
+
+@dataclass
+class Region:
+    left: float
+    top: float
+    right: float
+    bottom: float
+    score: float
+    source: str  # heuristic | yolo
+
+    def padded_box(self, padding: float, size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """
+        Integer crop box grown by ``padding`` (a fraction of the region size) and clipped to ``size``.
+        """
+
+        pad_x = (self.right - self.left) * padding
+        pad_y = (self.bottom - self.top) * padding
+        width, height = size
+        return (
+            max(0, int(self.left - pad_x)),
+            max(0, int(self.top - pad_y)),
+            min(width, int(round(self.right + pad_x))),
+            min(height, int(round(self.bottom + pad_y))),
+        )
+
+
+def locate_text_region(image: Image.Image) -> Optional[Region]:
+    """
+    Bounding box of the largest connected block of text-like cells, or ``None`` when no block covers
+    between ``HEURISTIC_MIN_AREA`` and ``HEURISTIC_MAX_AREA`` of the image.
+    """
+
+    gray = image.convert("L")
+    scale = min(1.0, HEURISTIC_SIDE / max(gray.size))
+    if scale < 1.0:
+        gray = gray.resize(
+            (max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.Resampling.BILINEAR
+        )
+    pixels = np.asarray(gray, dtype=np.int16)
+    edges = np.abs(np.diff(pixels, axis=1)) > HEURISTIC_EDGE_THRESHOLD
+
+    rows, cols = edges.shape[0] // HEURISTIC_CELL, edges.shape[1] // HEURISTIC_CELL
+    if rows == 0 or cols == 0:
+        return None
+    cells = edges[: rows * HEURISTIC_CELL, : cols * HEURISTIC_CELL]
+    density = cells.reshape(rows, HEURISTIC_CELL, cols, HEURISTIC_CELL).mean(axis=(1, 3))
+    # Bridge the gaps between words and lines so a paragraph becomes one component.
+    text = _dilate(density >= HEURISTIC_CELL_DENSITY)
+
+    component = _largest_component(text)
+    if component is None:
+        return None
+    top, left, bottom, right = component
+    area = (bottom - top) * (right - left) / float(rows * cols)
+    if not HEURISTIC_MIN_AREA <= area <= HEURISTIC_MAX_AREA:
+        return None
+
+    to_original = HEURISTIC_CELL / scale
+    return Region(
+        left=left * to_original,
+        top=top * to_original,
+        right=min(image.width, right * to_original),
+        bottom=min(image.height, bottom * to_original),
+        score=float(text[top:bottom, left:right].mean()),
+        source="heuristic",
+    )
+
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    padded = np.pad(mask, 1)
+    grown = np.zeros_like(mask)
+    for dy in range(3):
+        for dx in range(3):
+            grown |= padded[dy : dy + mask.shape[0], dx : dx + mask.shape[1]]
+    return grown
+
+
+def _largest_component(mask: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    # The grid is at most (HEURISTIC_SIDE / HEURISTIC_CELL)^2 cells, so a plain BFS is fast enough.
+    seen = np.zeros_like(mask)
+    best: Optional[Tuple[int, int, int, int]] = None
+    best_size = 0
+    height, width = mask.shape
+    for start_y, start_x in zip(*np.nonzero(mask)):
+        if seen[start_y, start_x]:
+            continue
+        seen[start_y, start_x] = True
+        queue = deque([(start_y, start_x)])
+        size, top, left, bottom, right = 0, start_y, start_x, start_y, start_x
+        while queue:
+            y, x = queue.popleft()
+            size += 1
+            top, left, bottom, right = min(top, y), min(left, x), max(bottom, y), max(right, x)
+            for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)):
+                if 0 <= ny < height and 0 <= nx < width and mask[ny, nx] and not seen[ny, nx]:
+                    seen[ny, nx] = True
+                    queue.append((ny, nx))
+        if size > best_size:
+            best_size, best = size, (int(top), int(left), int(bottom) + 1, int(right) + 1)
+    return best
+
+
+class IngredientRegionDetector:
+    """
+    YOLO model whose ``class_name`` boxes mark ingredients panels (single-class models need no name).
+    """
+
+    def __init__(self, weights_path: Path, class_name: str) -> None:
+        # Deferred so torch/ultralytics are only imported when region detection is configured.
+        from ultralytics import YOLO
+
+        from .logo_detector import _force_weights_only_false
+
+        self.weights_path = weights_path
+        self.class_name = class_name
+        with _force_weights_only_false():
+            self._model: YOLO = YOLO(str(weights_path))
+
+    def locate(self, image: Image.Image, confidence_threshold: float) -> Optional[Region]:
+        results = self._model(image, verbose=False)
+        if not results:
+            return None
+        result = results[0]
+        names = getattr(result, "names", None) or {}
+        best: Optional[Region] = None
+        for box in getattr(result, "boxes", None) or []:
+            score = float(box.conf[0])
+            if len(names) > 1 and names.get(int(box.cls[0])) != self.class_name:
+                continue
+            if score >= confidence_threshold and (best is None or score > best.score):
+                left, top, right, bottom = (float(value) for value in box.xyxy[0])
+                best = Region(left=left, top=top, right=right, bottom=bottom, score=score, source="yolo")
+        return best
+
+
+_region_detector: Optional[IngredientRegionDetector] = None
+_region_detector_lock = threading.Lock()
+
+
+def get_region_detector(settings: Settings | None = None) -> Optional[IngredientRegionDetector]:
+    """
+    The YOLO ingredients-panel detector, or ``None`` when ``HALAL_OCR_ROI_WEIGHTS_PATH`` is unset or missing.
+    """
+
+    global _region_detector
+    settings = settings or get_settings()
+    weights_path = settings.ocr_roi_weights_path
+    if weights_path is None or not weights_path.exists():
+        return None
+    if _region_detector is None:
+        with _region_detector_lock:
+            if _region_detector is None:
+                _region_detector = IngredientRegionDetector(weights_path, settings.ocr_roi_class_name)
+    return _region_detector
+
+
+def _reset_lock_after_fork() -> None:
+    global _region_detector_lock
+    _region_detector_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def locate_ingredients_region(image: Image.Image, settings: Settings | None = None) -> Optional[Region]:
+    settings = settings or get_settings()
+    if settings.ocr_roi_mode == "heuristic":
+        return locate_text_region(image)
+    if settings.ocr_roi_mode == "yolo":
+        detector = get_region_detector(settings)
+        return detector.locate(image, settings.ocr_roi_confidence) if detector is not None else None
+    return None
+
+
+def crop_to_ingredients(image: Image.Image, settings: Settings | None = None) -> Optional[Image.Image]:
+    """
+    The ingredients region of ``image``, downscaled for OCR, or ``None`` to OCR the full image instead.
+    """
+
+    settings = settings or get_settings()
+    with stage_timer("roi"):
+        region = locate_ingredients_region(image, settings)
+        if region is None:
+            return None
+        crop = image.crop(region.padded_box(settings.ocr_roi_padding, image.size))
+        return fit_to_max_side(crop, settings.ocr_max_side)
+
+
+def ocr_input_tag(settings: Settings) -> str:
+    """
+    Describes how images are prepared for OCR, so transcripts of differently prepared inputs never share
+    a cache entry. Empty for the default (full image, original size).
+    """
+
+    parts = []
+    if settings.ocr_roi_mode != "off":
+        parts.append(f"roi-{settings.ocr_roi_mode}")
+    if settings.ocr_max_side:
+        parts.append(f"max{settings.ocr_max_side}")
+    return "-".join(parts)
+
+
+__all__ = [
+    "IngredientRegionDetector",
+    "Region",
+    "crop_to_ingredients",
+    "get_region_detector",
+    "locate_ingredients_region",
+    "locate_text_region",
+    "ocr_input_tag",
+]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+"""
+Load-state tracking for heavy components (KB, detector, OCR client) and their start-up warm-up.
+"""
+
+import contextlib
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# ``eager`` loads before the worker serves requests, ``background`` loads in a thread right after start-up
+# and ``lazy`` loads on first use.
+LOAD_MODES = ("eager", "background", "lazy")
+
+
+@dataclass
+class ComponentStatus:
+    name: str
+    mode: str = "lazy"
+    state: str = "pending"  # pending | loading | ready | failed
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self))
+
+
+_statuses: Dict[str, ComponentStatus] = {}
+_statuses_lock = threading.Lock()
+
+
+def _status(name: str) -> ComponentStatus:
+    with _statuses_lock:
+        status = _statuses.get(name)
+        if status is None:
+            status = _statuses[name] = ComponentStatus(name=name)
+        return status
+
+
+@contextlib.contextmanager
+def track_load(name: str) -> Iterator[None]:
+    """
+    Record the state and duration of loading component ``name`` around the wrapped block.
+    """
+
+    status = _status(name)
+    status.state, status.error = "loading", None
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as exc:
+        status.state, status.error = "failed", f"{type(exc).__name__}: {exc}"
+        raise
+    else:
+        status.state = "ready"
+    finally:
+        status.duration_seconds = time.perf_counter() - started
+
+
+def readiness() -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+    """
+    Whether every non-lazy component has loaded, plus a per-component status snapshot.
+
+    Lazy components never block readiness; they load (and report their timings) on first use.
+    """
+
+    with _statuses_lock:
+        statuses = list(_statuses.values())
+    ready = all(status.state == "ready" for status in statuses if status.mode != "lazy")
+    return ready, {status.name: status.as_dict() for status in statuses}
+
+
+def warm_up(loaders: Mapping[str, Callable[[], Any]], modes: Mapping[str, str]) -> List[threading.Thread]:
+    """
+    Load each component according to its mode and return the started background threads.
+
+    Eager loaders run inline and propagate their errors so a broken deployment fails fast. Background
+    failures are recorded in the component status (surfaced by ``/readyz``) and retried on first use.
+    """
+
+    threads: List[threading.Thread] = []
+    for name, loader in loaders.items():
+        mode = modes.get(name, "lazy")
+        if mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode '{mode}' for component '{name}'. Choose one of {LOAD_MODES}.")
+        _status(name).mode = mode
+        if mode == "eager":
+            loader()
+        elif mode == "background":
+            thread = threading.Thread(target=_load_quietly, args=(loader,), name=f"warm-up-{name}", daemon=True)
+            thread.start()
+            threads.append(thread)
+    return threads
+
+
+def _load_quietly(loader: Callable[[], Any]) -> None:
+    try:
+        loader()
+    except Exception:  # noqa: BLE001 - recorded by ``track_load`` and reported via ``/readyz``.
+        pass
+
+
+__all__ = ["ComponentStatus", "LOAD_MODES", "readiness", "track_load", "warm_up"]
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+"""
+Content-addressed caches for analysis results and OCR transcripts.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..config import Settings, get_settings
+from .cache import LRUCache
+
+
+def image_digest(data: bytes) -> str:
+    """
+    Content address of an uploaded image (SHA-256 of the raw bytes).
+    """
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint_files(paths: Iterable[Path]) -> str:
+    """
+    Cheap version tag for on-disk artefacts derived from their names, sizes and modification times.
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(str(path).encode("utf-8"))
+        try:
+            stat = path.stat()
+        except OSError:
+            digest.update(b"missing")
+            continue
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class ContentCache:
+    """
+    Two-tier cache of JSON-serialisable values: an in-memory LRU in front of an optional SQLite table.
+
+    The SQLite tier survives restarts and is shared by every worker pointing at the same file; hits
+    from it are promoted into the memory tier. Writes to it are best-effort: a value that cannot be
+    stored because another process holds the lock stays in memory only. Entries older than
+    ``ttl_seconds`` expire from both tiers, and every ``PRUNE_INTERVAL`` writes the table is cut back to
+    its newest ``max_rows`` rows.
+    """
+
+    PRUNE_INTERVAL = 256
+
+    def __init__(
+        self,
+        namespace: str,
+        capacity: int,
+        sqlite_path: Optional[Path] = None,
+        *,
+        max_rows: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.namespace = namespace
+        self.max_rows = max_rows if max_rows and max_rows > 0 else None
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._memory: LRUCache[str, Any] = LRUCache(capacity, ttl_seconds=self.ttl_seconds)
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._disk_hits = 0
+        self._puts_since_prune = 0
+        if sqlite_path is not None:
+            sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+            # Concurrent writers (server workers, bulk_scan processes) wait this long for the lock.
+            self._connection = sqlite3.connect(str(sqlite_path), timeout=10.0, check_same_thread=False)
+            with self._lock, self._connection:
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{namespace}" '
+                    "(key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{namespace}_created_at" ON "{namespace}" (created_at)'
+                )
+            # Under WAL readers never wait for a writer, so lookups get their own connection and do not queue
+            # behind a write that is waiting for another process's lock.
+            self._reader = sqlite3.connect(str(sqlite_path), timeout=10.0, check_same_thread=False)
+
+    @property
+    def persistent(self) -> bool:
+        return self._connection is not None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.get_memory(key)
+        if value is None:
+            value = self.get_disk(key)
+        return value
+
+    def get_memory(self, key: str) -> Optional[Any]:
+        return self._memory.get(key)
+
+    def get_disk(self, key: str) -> Optional[Any]:
+        """
+        Look ``key`` up in the SQLite tier only, promoting a hit into memory. This is blocking file I/O, so
+        event-loop code runs it on a worker thread.
+        """
+
+        if self._reader is None:
+            return None
+        oldest = time.time() - self.ttl_seconds if self.ttl_seconds is not None else float("-inf")
+        try:
+            with self._read_lock:
+                row = self._reader.execute(
+                    f'SELECT payload FROM "{self.namespace}" WHERE key = ? AND created_at >= ?', (key, oldest)
+                ).fetchone()
+                if row is not None:
+                    self._disk_hits += 1
+        except sqlite3.OperationalError as exc:
+            warnings.warn(f"Result cache read from {self.namespace!r} skipped: {exc}", RuntimeWarning)
+            return None
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        self._memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_memory(key, value)
+        self.put_disk(key, value)
+
+    def put_memory(self, key: str, value: Any) -> None:
+        self._memory.put(key, value)
+
+    def put_disk(self, key: str, value: Any) -> None:
+        """
+        Best-effort write to the SQLite tier; like :meth:`get_disk` it may block on another process's lock.
+        """
+
+        if self._connection is None:
+            return
+        payload = json.dumps(value)
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    f'INSERT OR REPLACE INTO "{self.namespace}" (key, payload, created_at) VALUES (?, ?, ?)',
+                    (key, payload, time.time()),
+                )
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= self.PRUNE_INTERVAL:
+                    self._puts_since_prune = 0
+                    self._prune()
+        except sqlite3.OperationalError as exc:
+            warnings.warn(f"Result cache write to {self.namespace!r} skipped: {exc}", RuntimeWarning)
+
+    def _prune(self) -> None:
+        # Caller holds the lock and an open transaction.
+        if self.ttl_seconds is not None:
+            self._connection.execute(
+                f'DELETE FROM "{self.namespace}" WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+            )
+        if self.max_rows is not None:
+            self._connection.execute(
+                f'DELETE FROM "{self.namespace}" WHERE key IN '
+                f'(SELECT key FROM "{self.namespace}" ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_rows,),
+            )
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self._connection is not None:
+            with self._lock, self._connection:
+                self._connection.execute(f'DELETE FROM "{self.namespace}"')
+
+    def discard_containing(self, fragment: str) -> int:
+        """
+        Drop every entry whose key contains ``fragment`` (e.g. a superseded KB version) from both tiers.
+        """
+
+        removed = self._memory.discard_where(lambda key: fragment in key)
+        if self._connection is not None:
+            with self._lock, self._connection:
+                cursor = self._connection.execute(
+                    f'DELETE FROM "{self.namespace}" WHERE instr(key, ?) > 0', (fragment,)
+                )
+            removed = max(removed, cursor.rowcount)
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        stats = self._memory.stats().as_dict()
+        stats["disk_hits"] = self._disk_hits
+        stats["disk_enabled"] = self._connection is not None
+        stats["disk_max_rows"] = self.max_rows
+        return stats
+
+
+_result_cache: Optional[ContentCache] = None
+_ocr_cache: Optional[ContentCache] = None
+
+
+def get_result_cache(settings: Settings | None = None) -> ContentCache:
+    global _result_cache
+    if _result_cache is None:
+        settings = settings or get_settings()
+        _result_cache = ContentCache(
+            "analysis_results",
+            settings.result_cache_size,
+            settings.result_cache_path,
+            max_rows=settings.result_cache_max_rows,
+            ttl_seconds=settings.result_cache_ttl_seconds,
+        )
+    return _result_cache
+
+
+def get_ocr_cache(settings: Settings | None = None) -> ContentCache:
+    global _ocr_cache
+    if _ocr_cache is None:
+        settings = settings or get_settings()
+        _ocr_cache = ContentCache(
+            "ocr_text",
+            settings.ocr_cache_size,
+            settings.result_cache_path,
+            max_rows=settings.result_cache_max_rows,
+            ttl_seconds=settings.result_cache_ttl_seconds,
+        )
+    return _ocr_cache
+
+
+def _reset_after_fork() -> None:
+    # SQLite connections must not be shared across ``fork``; each worker reopens its own.
+    global _result_cache, _ocr_cache
+    _result_cache = None
+    _ocr_cache = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+__all__ = [
+    "ContentCache",
+    "fingerprint_files",
+    "get_ocr_cache",
+    "get_result_cache",
+    "image_digest",
+]
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+"""
+Pluggable nearest-neighbour indexes over the unit-normalised KB embedding matrix.
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+IVF_INDEX_NAME = "ivf_index.npz"
+
+QUANTIZED_STORAGES = ("float16", "int8")
+
+# Rows converted and scored per block when scanning or assigning, bounding temporary float32 memory.
+SCAN_BLOCK_ROWS = 65_536
+
+# Compressed rows widened to float32 per block during a quantised scan; small enough to stay in cache.
+QUANTIZED_BLOCK_ROWS = 2_048
+
+
+def top_k_indices(scores: np.ndarray, k: int, min_score: float | None = None) -> np.ndarray:
+    """
+    Indices of the ``k`` highest ``scores`` in descending order, optionally dropping those below ``min_score``.
+
+    Uses a partial selection (``argpartition``) so only the ``k`` winners are sorted.
+    """
+
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    if min_score is not None:
+        order = order[scores[order] >= min_score]
+    return order
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise :func:`top_k_indices` for a ``(n_queries, n_rows)`` score matrix.
+    """
+
+    n_queries, n_rows = scores.shape
+    k = min(k, n_rows)
+    if k <= 0:
+        return np.empty((n_queries, 0), dtype=np.float32), np.empty((n_queries, 0), dtype=np.int64)
+    if k < n_rows:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_rows), (n_queries, n_rows)).copy()
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidate_scores, order, axis=1), np.take_along_axis(candidates, order, axis=1)
+
+
+class VectorIndex(ABC):
+    """
+    Maximum inner-product search over a fixed matrix of unit-normalised rows.
+
+    ``search`` returns ``(scores, indices)`` arrays of shape ``(n_queries, k)`` sorted by descending
+    score. Approximate indexes may find fewer than ``k`` rows; missing slots hold index ``-1`` and score
+    ``-inf``.
+    """
+
+    kind: str = "abstract"
+
+    def __init__(self, embeddings: np.ndarray) -> None:
+        self.embeddings: Optional[np.ndarray] = embeddings
+
+    @property
+    def size(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.embeddings.shape[1])
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+def blocked_scan(
+    queries: np.ndarray, matrix: np.ndarray, k: int, scales: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-``k`` rows of a non-float32 ``matrix`` (float16, int8 codes with per-row ``scales``), widening
+    ``QUANTIZED_BLOCK_ROWS`` rows at a time into one reused buffer so no full-size float32 copy is made.
+    """
+
+    queries = np.asarray(queries, dtype=np.float32)
+    n_rows = int(matrix.shape[0])
+    buffer = np.empty((min(QUANTIZED_BLOCK_ROWS, n_rows), matrix.shape[1]), dtype=np.float32)
+    partial_scores: List[np.ndarray] = []
+    partial_indices: List[np.ndarray] = []
+    for start in range(0, n_rows, QUANTIZED_BLOCK_ROWS):
+        rows = matrix[start : start + QUANTIZED_BLOCK_ROWS]
+        block = buffer[: rows.shape[0]]
+        np.copyto(block, rows)
+        scores = queries @ block.T
+        if scales is not None:
+            scores *= scales[start : start + rows.shape[0]]
+        # Keep only each block's top-k so the full score matrix is never materialised.
+        block_scores, block_indices = top_k_rows(scores, k)
+        partial_scores.append(block_scores)
+        partial_indices.append(block_indices + start)
+    if not partial_scores:
+        return np.empty((queries.shape[0], 0), dtype=np.float32), np.empty((queries.shape[0], 0), dtype=np.int64)
+    best_scores, order = top_k_rows(np.concatenate(partial_scores, axis=1), k)
+    return best_scores, np.take_along_axis(np.concatenate(partial_indices, axis=1), order, axis=1)
+
+
+class BruteForceIndex(VectorIndex):
+    """
+    Exact search: one matrix multiply against every row, then a partial top-k selection.
+
+    A float16 KB store is scanned block by block (:func:`blocked_scan`): multiplying float32 queries by the
+    whole memmap would cast it to a temporary float32 copy on every query.
+    """
+
+    kind = "brute"
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.embeddings.dtype != np.float32:
+            return blocked_scan(queries, self.embeddings, k)
+        scores = np.asarray(queries, dtype=np.float32) @ self.embeddings.T
+        return top_k_rows(scores, k)
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantisation: ``matrix[i] ~= codes[i] * scales[i]``.
+    """
+
+    codes = np.empty(matrix.shape, dtype=np.int8)
+    scales = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], SCAN_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + SCAN_BLOCK_ROWS], dtype=np.float32)
+        block_scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+        codes[start : start + block.shape[0]] = np.rint(block / block_scales[:, None]).astype(np.int8)
+        scales[start : start + block.shape[0]] = block_scales
+    return codes, scales
+
+
+class QuantizedIndex(VectorIndex):
+    """
+    Brute-force scan over a compressed (float16 or per-row int8) copy of the embeddings, followed by exact
+    rescoring of the best ``rescore_candidates`` rows against the original matrix.
+
+    Only the compressed copy has to stay resident; when ``embeddings`` is the KB store memmap, rescoring
+    pages in just the handful of candidate rows. With ``rescore_candidates=0`` no reference to
+    ``embeddings`` is kept (``self.embeddings`` is ``None``), so an in-RAM matrix can be freed.
+    """
+
+    kind = "quantized"
+
+    def __init__(self, embeddings: np.ndarray, storage: str = "int8", *, rescore_candidates: int = 64) -> None:
+        if storage not in QUANTIZED_STORAGES:
+            raise ValueError(f"Unsupported embedding storage '{storage}'. Choose one of {QUANTIZED_STORAGES}.")
+        super().__init__(embeddings)
+        self.storage = storage
+        self.rescore_candidates = max(0, rescore_candidates)
+        self.scales: Optional[np.ndarray] = None
+        if storage == "int8":
+            self.codes, self.scales = quantize_int8(embeddings)
+        else:
+            self.codes = np.empty(embeddings.shape, dtype=np.float16)
+            for start in range(0, embeddings.shape[0], SCAN_BLOCK_ROWS):
+                self.codes[start : start + SCAN_BLOCK_ROWS] = embeddings[start : start + SCAN_BLOCK_ROWS]
+        if not self.rescore_candidates:
+            self.embeddings = None
+
+    @property
+    def size(self) -> int:
+        return int(self.codes.shape[0])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.codes.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Resident size of the compressed matrix the scan runs over.
+        """
+
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def approximate_search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-``k`` rows by compressed-domain score, without rescoring.
+        """
+
+        return blocked_scan(queries, self.codes, k, self.scales)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32)
+        candidate_scores, candidates = self.approximate_search(queries, max(k, self.rescore_candidates))
+        if self.rescore_candidates <= 0 or candidates.shape[1] == 0:
+            return candidate_scores[:, :k], candidates[:, :k]
+
+        rows = np.asarray(self.embeddings[candidates.ravel()], dtype=np.float32)
+        exact = np.einsum("qcd,qd->qc", rows.reshape(*candidates.shape, -1), queries)
+        scores, order = top_k_rows(exact, k)
+        return scores, np.take_along_axis(candidates, order, axis=1)
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index: rows are bucketed under their nearest of ``nlist`` spherical k-means centroids,
+    and a query only scores the rows in its ``nprobe`` closest buckets.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        *,
+        nprobe: int = 8,
+        kb_version: str = "",
+    ) -> None:
+        super().__init__(embeddings)
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = max(1, min(nprobe, centroids.shape[0]))
+        self.kb_version = kb_version
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        *,
+        nlist: Optional[int] = None,
+        iterations: int = 20,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+        nprobe: int = 8,
+        kb_version: str = "",
+    ) -> "IVFIndex":
+        """
+        Train centroids on a sample of rows with spherical k-means, then bucket every row.
+        """
+
+        n_rows = int(embeddings.shape[0])
+        if n_rows == 0:
+            raise ValueError("Cannot build an IVF index over an empty embedding matrix.")
+        nlist = max(1, min(nlist or int(4 * np.sqrt(n_rows)), n_rows))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n_rows, sample_size or max(256 * nlist, 10_000))
+        sample_rows = np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters from random sample rows so every bucket stays useful.
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()), replace=False)]
+            centroids = _normalize(sums)
+
+        assignment = _assign(embeddings, centroids)
+        list_rows = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(embeddings, centroids, list_offsets, list_rows, nprobe=nprobe, kb_version=kb_version)
+
+    def save(self, path: Path) -> None:
+        with path.open("wb") as handle:
+            np.savez(
+                handle,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows,
+                rows=np.array(self.size, dtype=np.int64),
+                kb_version=np.array(self.kb_version),
+            )
+
+    @classmethod
+    def load(cls, path: Path, embeddings: np.ndarray, *, nprobe: int = 8) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["rows"]) != int(embeddings.shape[0]):
+                raise ValueError(
+                    f"IVF index at '{path}' covers {int(data['rows'])} rows but the KB has {embeddings.shape[0]}."
+                )
+            return cls(
+                embeddings,
+                data["centroids"],
+                data["list_offsets"],
+                data["list_rows"],
+                nprobe=nprobe,
+                kb_version=str(data["kb_version"]),
+            )
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32)
+        scores_out = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        indices_out = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        if k <= 0:
+            return scores_out, indices_out
+
+        _, probes = top_k_rows(queries @ self.centroids.T, self.nprobe)
+        for query_index, query in enumerate(queries):
+            candidates = np.concatenate(
+                [self.list_rows[self.list_offsets[c] : self.list_offsets[c + 1]] for c in probes[query_index]]
+            )
+            if candidates.size == 0:
+                continue
+            candidate_scores = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query
+            best = top_k_indices(candidate_scores, k)
+            scores_out[query_index, : best.size] = candidate_scores[best]
+            indices_out[query_index, : best.size] = candidates[best]
+        return scores_out, indices_out
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.maximum(norms, 1e-12)).astype(np.float32, copy=False)
+
+
+def _assign(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(rows.shape[0], dtype=np.int64)
+    for start in range(0, rows.shape[0], SCAN_BLOCK_ROWS):
+        block = np.asarray(rows[start : start + SCAN_BLOCK_ROWS], dtype=np.float32)
+        assignment[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+__all__ = [
+    "BruteForceIndex",
+    "IVFIndex",
+    "IVF_INDEX_NAME",
+    "QUANTIZED_STORAGES",
+    "QuantizedIndex",
+    "VectorIndex",
+    "blocked_scan",
+    "quantize_int8",
+    "top_k_indices",
+    "top_k_rows",
+]
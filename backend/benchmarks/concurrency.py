@@ -0,0 +1,126 @@
+"""
+Throughput benchmark for the API under concurrent clients.
+
+Start the API (``uvicorn app.main:app --app-dir backend``) on the commit under test, then run::
+
+    python backend/benchmarks/concurrency.py --endpoint chat --clients 32 --requests 500
+    python backend/benchmarks/concurrency.py --endpoint analyze --image label.jpg --clients 8
+
+Run it once against a checkout before the executor offload and once after to compare. Alongside the
+load, a probe polls ``/healthz`` to show whether the event loop stays responsive while inference runs.
+Results are printed as JSON. Requires ``httpx``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+CHAT_QUESTIONS = [
+    "Is gelatin halal?",
+    "What is E120?",
+    "Is soy lecithin permissible?",
+    "Are mono and diglycerides halal?",
+    "Is carmine haram?",
+    "Is whey powder halal?",
+]
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "p50_ms": _percentile(latencies, 0.50) * 1000.0,
+        "p99_ms": _percentile(latencies, 0.99) * 1000.0,
+        "mean_ms": (statistics.fmean(latencies) if latencies else 0.0) * 1000.0,
+    }
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, index: int, image: Optional[bytes]) -> httpx.Response:
+    if endpoint == "chat":
+        return await client.post("/api/chat", json={"question": CHAT_QUESTIONS[index % len(CHAT_QUESTIONS)]})
+    if endpoint == "analyze":
+        return await client.post("/api/analyze", files={"file": ("label.jpg", image or b"", "image/jpeg")})
+    return await client.get("/healthz")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    image = Path(args.image).read_bytes() if args.image else None
+    counter = iter(range(args.requests))
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    probe_latencies: List[float] = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+
+        async def worker() -> None:
+            for index in counter:
+                started = time.perf_counter()
+                try:
+                    response = await _send(client, args.endpoint, index, image)
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as exc:
+                    statuses[exc.__class__.__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                try:
+                    await client.get("/healthz")
+                except httpx.HTTPError:
+                    pass
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(args.probe_interval)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "endpoint": args.endpoint,
+        "clients": args.clients,
+        "requests": args.requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": args.requests / elapsed if elapsed else 0.0,
+        "status_counts": dict(statuses),
+        "latency": _summary(latencies),
+        "healthz_probe": _summary(probe_latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["chat", "analyze", "healthz"], default="chat")
+    parser.add_argument("--image", help="Label image uploaded by the analyze endpoint.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+    if args.endpoint == "analyze" and not args.image:
+        parser.error("--image is required for the analyze endpoint.")
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
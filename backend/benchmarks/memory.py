@@ -0,0 +1,86 @@
+"""
+Resident memory of a server process and its workers, read from ``/proc/<pid>/smaps_rollup`` (Linux).
+
+Start the API, then point the script at the parent process::
+
+    python -m app.cli.serve --workers 8 &
+    python benchmarks/memory.py --pid $!
+
+    uvicorn app.main:app --workers 8 &          # for comparison: every worker loads its own models
+    python benchmarks/memory.py --pid $!
+
+RSS counts shared pages in full for every process, so it overstates the total; PSS splits each shared
+page between the processes mapping it and sums to the real footprint, and USS (private pages) is what
+each extra worker costs. Send a few requests first so lazily initialised state is included. Results are
+printed as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def _children(pid: int) -> List[int]:
+    children: List[int] = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        text = (task / "children").read_text().split()
+        children.extend(int(child) for child in text)
+    return children
+
+
+def _descendants(pid: int) -> List[int]:
+    found: List[int] = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        for child in _children(current):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def _rollup(pid: int) -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, _, rest = line.partition(":")
+        if name in FIELDS:
+            values[name] = int(rest.split()[0]) / 1024.0  # kB -> MiB
+    values["Uss"] = values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0)
+    return {f"{name.lower()}_mib": round(value, 1) for name, value in values.items()}
+
+
+def _command(pid: int) -> str:
+    return Path(f"/proc/{pid}/cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace").strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, required=True, help="PID of the server's parent process.")
+    args = parser.parse_args()
+
+    processes = []
+    for pid in [args.pid, *_descendants(args.pid)]:
+        try:
+            processes.append({"pid": pid, "role": "parent" if pid == args.pid else "worker", **_rollup(pid)})
+        except FileNotFoundError:
+            continue  # exited while we were reading
+
+    workers = [process for process in processes if process["role"] == "worker"]
+    report = {
+        "command": _command(args.pid),
+        "workers": len(workers),
+        "total_pss_mib": round(sum(process.get("pss_mib", 0.0) for process in processes), 1),
+        "mean_worker_rss_mib": round(sum(p["rss_mib"] for p in workers) / len(workers), 1) if workers else None,
+        "mean_worker_uss_mib": round(sum(p["uss_mib"] for p in workers) / len(workers), 1) if workers else None,
+        "processes": processes,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Latency, payload and accuracy impact of the image preprocessing stage (draft JPEG decoding, EXIF
+orientation and downscaling) against decoding every photo at full resolution.
+
+Run from ``backend/`` on a folder of label photos, or on synthetic 12 MP JPEG labels::
+
+    python benchmarks/preprocessing.py --images ../samples --ocr-max-side 1024 1600 2048
+    python benchmarks/preprocessing.py --synthetic 8 --size 4032x3024
+    python benchmarks/preprocessing.py --images ../samples --detector --ocr   # also compare model outputs
+
+For every ``--ocr-max-side`` the script reports decode time, the time to prepare the detector and OCR
+inputs, and the JPEG size of the image sent to OCR. ``--detector`` compares logo verdicts and ``--ocr``
+compares parsed ingredient lists (exact match rate and mean Jaccard similarity) with the full-resolution
+baseline; ``--ocr`` calls the configured OCR backends once per image and setting. Results are printed as
+JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.analysis import find_ingredients_block, parse_ingredients_list  # noqa: E402
+from app.services.imaging import fit_to_max_side, load_image  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _synthetic_label(size: Tuple[int, int], seed: int) -> bytes:
+    image = Image.new("RGB", size, (235 - seed * 7 % 40, 225, 200))
+    draw = ImageDraw.Draw(image)
+    width, height = size
+    draw.ellipse((width // 10, height // 10, width // 2, height // 2), fill=(180, 40 + seed * 13 % 120, 40))
+    font = ImageFont.load_default(size=max(12, height // 70))
+    lines = ["INGREDIENTS: sugar, wheat flour, palm oil, emulsifier (E471), gelatin, salt."] * 12
+    for row, line in enumerate(lines):
+        origin = (width // 2, height * 3 // 5 + row * height // 55)
+        draw.text(origin, line[: 30 + row * 4], fill=(0, 0, 0), font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _inputs(args: argparse.Namespace) -> List[Tuple[str, bytes]]:
+    if args.images is not None:
+        paths = sorted(path for path in args.images.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+        return [(path.name, path.read_bytes()) for path in paths[: args.limit]]
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    return [(f"synthetic-{seed}.jpg", _synthetic_label((width, height), seed)) for seed in range(args.synthetic)]
+
+
+def _timed(func: Callable[[], object], repeat: int) -> Tuple[object, float]:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func()
+        durations.append(time.perf_counter() - started)
+    return value, min(durations)
+
+
+def _jpeg_bytes(image: Image.Image) -> int:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.tell()
+
+
+def _ingredients(ocr, image: Image.Image) -> List[str]:
+    try:
+        text = ocr.recognise(image).text
+    except Exception:  # noqa: BLE001 - a failed read counts as an empty list.
+        return []
+    block = find_ingredients_block(text)
+    return [item.lower() for item in parse_ingredients_list(block)] if block else []
+
+
+def _jaccard(left: List[str], right: List[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(set(left) & set(right)) / len(set(left) | set(right))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, default=None, help="Folder of label photos (default: synthetic).")
+    parser.add_argument("--limit", type=int, default=None, help="Use at most this many photos.")
+    parser.add_argument("--synthetic", type=int, default=8, help="Number of synthetic labels without --images.")
+    parser.add_argument("--size", default="4032x3024", help="Synthetic label size, WIDTHxHEIGHT.")
+    parser.add_argument("--ocr-max-side", type=int, nargs="+", default=[1024, 1600, 2048])
+    parser.add_argument("--detector-size", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per image (the best is kept).")
+    parser.add_argument("--detector", action="store_true", help="Compare logo verdicts with the full-size decode.")
+    parser.add_argument("--ocr", action="store_true", help="Compare parsed ingredients with full-size OCR.")
+    args = parser.parse_args()
+
+    inputs = _inputs(args)
+    if not inputs:
+        parser.error("No images found.")
+
+    detector = ocr = None
+    if args.detector:
+        from app.services.logo_detector import get_logo_detector
+
+        detector = get_logo_detector()
+    if args.ocr:
+        from app.services.ocr import get_ocr_chain
+
+        ocr = get_ocr_chain()
+
+    baseline_decode: List[float] = []
+    baseline_payload: List[int] = []
+    baseline_logos: Dict[str, bool] = {}
+    baseline_ingredients: Dict[str, List[str]] = {}
+    for name, data in inputs:
+        full, seconds = _timed(lambda: load_image(data), args.repeat)
+        baseline_decode.append(seconds)
+        baseline_payload.append(_jpeg_bytes(full))
+        if detector is not None:
+            baseline_logos[name] = detector.detect(full)
+        if ocr is not None:
+            baseline_ingredients[name] = _ingredients(ocr, full)
+
+    report: Dict[str, object] = {
+        "images": len(inputs),
+        "baseline": {
+            "decode_ms": statistics.fmean(baseline_decode) * 1000.0,
+            "ocr_payload_kib": statistics.fmean(baseline_payload) / 1024.0,
+        },
+        "settings": [],
+    }
+    for max_side in args.ocr_max_side:
+        working_side: Optional[int] = max(max_side, args.detector_size)
+        decode, prepare, payload, logo_agree, exact, jaccard = [], [], [], [], [], []
+        for name, data in inputs:
+            working, seconds = _timed(lambda: load_image(data, max_side=working_side), args.repeat)
+            decode.append(seconds)
+            started = time.perf_counter()
+            ocr_input = fit_to_max_side(working, max_side)
+            fit_to_max_side(working, args.detector_size, Image.Resampling.BILINEAR)
+            prepare.append(time.perf_counter() - started)
+            payload.append(_jpeg_bytes(ocr_input))
+            if detector is not None:
+                logo_agree.append(detector.detect(working) == baseline_logos[name])
+            if ocr is not None:
+                ingredients = _ingredients(ocr, ocr_input)
+                exact.append(ingredients == baseline_ingredients[name])
+                jaccard.append(_jaccard(ingredients, baseline_ingredients[name]))
+
+        entry: Dict[str, object] = {
+            "ocr_max_side": max_side,
+            "decode_ms": statistics.fmean(decode) * 1000.0,
+            "prepare_ms": statistics.fmean(prepare) * 1000.0,
+            "ocr_payload_kib": statistics.fmean(payload) / 1024.0,
+            "decode_speedup": statistics.fmean(baseline_decode) / max(statistics.fmean(decode), 1e-9),
+        }
+        if logo_agree:
+            entry["logo_agreement"] = sum(logo_agree) / len(logo_agree)
+        if exact:
+            entry["ingredients_exact_match"] = sum(exact) / len(exact)
+            entry["ingredients_mean_jaccard"] = statistics.fmean(jaccard)
+        report["settings"].append(entry)  # type: ignore[union-attr]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
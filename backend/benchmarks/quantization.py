@@ -0,0 +1,126 @@
+"""
+Memory, scan speed and accuracy of compressed KB embedding storage against the float32 path.
+
+Run from ``backend/`` on a KB store (convert the shipped KB first with ``python -m app.cli.convert_kb``),
+or on synthetic clustered embeddings::
+
+    python benchmarks/quantization.py --store ../HalalKB/kb_store
+    python benchmarks/quantization.py --rows 500000 --rescore 0 16 64
+
+Queries are KB rows perturbed with Gaussian noise. For each storage mode and rescoring depth the script
+reports the resident size of the scanned matrix, per-query latency percentiles, top-1 agreement and
+recall@k relative to exact float32 search. Results are printed as JSON. Requires only NumPy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.kb_store import read_kb_store  # noqa: E402
+from app.services.vector_index import QUANTIZED_STORAGES, BruteForceIndex, QuantizedIndex, VectorIndex  # noqa: E402
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+def _synthetic(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centres = _normalize(rng.standard_normal((clusters, dim)))
+    labels = rng.integers(0, clusters, size=rows)
+    noise = rng.standard_normal((rows, dim)).astype(np.float32) * (0.7 / np.sqrt(dim))
+    return _normalize(centres[labels] + noise)
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _run(index: VectorIndex, queries: np.ndarray, k: int) -> Tuple[np.ndarray, Dict[str, float]]:
+    latencies: List[float] = []
+    results = np.empty((queries.shape[0], k), dtype=np.int64)
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        _, indices = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+        results[position] = indices[0]
+    return results, {
+        "p50_ms": _percentile(latencies, 0.50) * 1000.0,
+        "p99_ms": _percentile(latencies, 0.99) * 1000.0,
+        "mean_ms": statistics.fmean(latencies) * 1000.0,
+    }
+
+
+def _accuracy(truth: np.ndarray, found: np.ndarray) -> Dict[str, float]:
+    overlap = sum(len(set(row_truth) & set(row_found)) for row_truth, row_found in zip(truth, found))
+    return {
+        "top1_agreement": float(np.mean(truth[:, 0] == found[:, 0])),
+        f"recall@{truth.shape[1]}": overlap / truth.size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", type=Path, help="Benchmark a KB store instead of synthetic embeddings.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0, 64])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.store is not None:
+        embeddings = read_kb_store(args.store).embeddings
+        source = str(args.store)
+    else:
+        embeddings = _synthetic(args.rows, args.dim, args.clusters, rng)
+        source = "synthetic"
+    reference = np.asarray(embeddings, dtype=np.float32)
+
+    picks = rng.choice(reference.shape[0], size=min(args.queries, reference.shape[0]), replace=False)
+    dim = reference.shape[1]
+    noise = rng.standard_normal((picks.size, dim)).astype(np.float32) * (0.2 / np.sqrt(dim))
+    queries = _normalize(reference[picks] + noise)
+
+    truth, float32_latency = _run(BruteForceIndex(reference), queries, args.k)
+    runs = [{"storage": "float32", "rescore_candidates": 0, "resident_bytes": int(reference.nbytes), **float32_latency}]
+    for storage in QUANTIZED_STORAGES:
+        for rescore in args.rescore:
+            index = QuantizedIndex(reference, storage, rescore_candidates=rescore)
+            found, latency = _run(index, queries, args.k)
+            runs.append(
+                {
+                    "storage": storage,
+                    "rescore_candidates": rescore,
+                    "resident_bytes": index.nbytes,
+                    **latency,
+                    **_accuracy(truth, found),
+                }
+            )
+
+    report = {
+        "source": source,
+        "rows": int(reference.shape[0]),
+        "dim": int(reference.shape[1]),
+        "queries": int(queries.shape[0]),
+        "k": args.k,
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
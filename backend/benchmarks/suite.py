@@ -0,0 +1,439 @@
+"""
+Reproducible benchmark suite for the text, knowledge-base and end-to-end API paths.
+
+Run from ``backend/``::
+
+    python benchmarks/suite.py                                        # all sections, default sizes
+    python benchmarks/suite.py --sections kb --kb-sizes 1000 10000 100000 1000000
+    python benchmarks/suite.py --output results/head.json --compare results/base.json
+
+Sections:
+
+* ``text``: ``normalize_text_for_matching`` over synthetic ingredient phrases, and ingredient parsing
+  (``find_ingredient_block`` + ``declared_texts``) over synthetic OCR transcripts of increasing length, next to
+  the regex + character-loop parser it replaced (``legacy_parse_*``, with ``speedup`` comparing the p50s). The
+  legacy parser stops at the first decimal point, so it is timed on the same text with decimal points written as
+  commas, which makes it scan the whole list too.
+* ``kb``: for every ``--kb-sizes`` entry a synthetic KB store is written to a temporary directory, loaded, and
+  ``search_similar`` (lexical and semantic queries), ``classify_ingredient_list`` and ``classify_ingredients``
+  are timed. 1M rows need about 4 GB of RAM while the store is written.
+* ``e2e``: concurrent ``/api/analyze`` and ``/api/chat`` requests against the app in-process (or a running server
+  with ``--url``), using the stub OCR backend and a synthetic label image.
+
+With ``--model synthetic`` (the default) everything runs offline on CPU: MiniLM is replaced by a deterministic
+hashing encoder and the logo detector gets randomly initialised YOLOv8n weights (when ``ultralytics`` is
+installed; otherwise it is disabled). Absolute numbers then measure the pipeline around the models, not the
+models. ``--model minilm`` uses the real encoder. Result caches are disabled so every request runs the full
+pipeline. Random inputs are seeded, so runs on two commits see the same data; ``--compare`` adds the relative
+change of every latency and throughput figure against an earlier JSON report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+WORDS = [
+    "sugar", "salt", "water", "gelatin", "pork", "beef", "chicken", "whey", "milk", "cocoa", "butter", "palm",
+    "sunflower", "rapeseed", "oil", "flour", "wheat", "rice", "corn", "starch", "glucose", "syrup", "lecithin",
+    "soy", "emulsifier", "mono", "diglycerides", "fatty", "acids", "carmine", "cochineal", "colour", "extract",
+    "yeast", "malt", "barley", "vinegar", "wine", "rum", "alcohol", "vanilla", "flavouring", "natural",
+    "artificial", "enzymes", "rennet", "lard", "tallow", "shellac", "glycerol", "citric", "acid", "sorbate",
+    "potassium", "sodium", "bicarbonate", "pectin", "agar", "carrageenan", "xanthan", "gum", "honey",
+]
+STATUSES = ["halal", "haram", "mushbooh", "halal", "halal"]
+COMPARED_METRICS = ("p50_ms", "p99_ms", "mean_ms", "ops_per_s", "throughput_rps")
+
+
+class HashingEmbedder:
+    """
+    Deterministic stand-in for a sentence-transformer: hashed character trigrams in 384 dimensions.
+    """
+
+    def __init__(self, model_name: str = "", dim: int = 384, **_: Any) -> None:
+        self.dim = dim
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, normalize_embeddings: bool = True, **_: Any):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            padded = f"  {text} "
+            for start in range(len(padded) - 2):
+                vectors[row, zlib.crc32(padded[start : start + 3].encode("utf-8")) % self.dim] += 1.0
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+def _install_synthetic_encoder() -> None:
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = HashingEmbedder  # type: ignore[attr-defined]
+    sys.modules["sentence_transformers"] = module
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    total = sum(latencies)
+    return {
+        "count": len(latencies),
+        "p50_ms": _percentile(latencies, 0.50) * 1000.0,
+        "p99_ms": _percentile(latencies, 0.99) * 1000.0,
+        "mean_ms": statistics.fmean(latencies) * 1000.0,
+        "ops_per_s": len(latencies) / total if total else 0.0,
+    }
+
+
+def _measure(func: Callable[[Any], Any], inputs: Sequence[Any], warmup: int = 3) -> Dict[str, float]:
+    for item in inputs[:warmup]:
+        func(item)
+    latencies = []
+    for item in inputs:
+        started = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - started)
+    return _summary(latencies)
+
+
+def _phrase(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _ingredient(rng: random.Random) -> str:
+    item = _phrase(rng, rng.randint(1, 3))
+    roll = rng.random()
+    if roll < 0.15:
+        item += f" ({_phrase(rng, 1)}, {_phrase(rng, 2)})"
+    elif roll < 0.25:
+        item += f" {rng.randint(1, 40)}.{rng.randint(0, 9)}%"
+    elif roll < 0.35:
+        item += f" (E{rng.randint(100, 1520)})"
+    return item.capitalize()
+
+
+def _ocr_text(rng: random.Random, length: int) -> str:
+    # Marketing copy around one ingredients block, as a label transcript looks.
+    parts = [_phrase(rng, 8).capitalize() + "." for _ in range(3)]
+    ingredients: List[str] = []
+    while sum(len(item) + 2 for item in ingredients) < length:
+        ingredients.append(_ingredient(rng))
+    parts.append("Ingredients: " + ", ".join(ingredients) + ".")
+    parts.append("Store in a cool dry place. Best before: see lid.")
+    return "\n".join(parts)
+
+
+LEGACY_BLOCK_RE = re.compile(r"ingredients.*?\.", re.IGNORECASE | re.DOTALL)
+LEGACY_HEADER_RE = re.compile(r"^ingredients.*?(?::|\))\s*", re.IGNORECASE | re.DOTALL)
+
+
+def _legacy_parse(text: str) -> List[str]:
+    # The parser replaced by app/services/ingredient_parser.py, kept verbatim as the speed baseline.
+    match = LEGACY_BLOCK_RE.search(text)
+    if not match:
+        return []
+    cleaned_text = LEGACY_HEADER_RE.sub("", match.group(0).strip().replace("\n", " "))
+    cleaned_text = cleaned_text.strip().removesuffix(".")
+    ingredients: List[str] = []
+    current = ""
+    depth = 0
+    for char in cleaned_text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        if char == "," and depth == 0:
+            ingredients.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        ingredients.append(current.strip())
+    return ingredients
+
+
+def run_text(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.services.analysis import find_ingredient_block
+    from app.services.knowledge_base import normalize_text_for_matching
+
+    rng = random.Random(args.seed)
+    phrases = [_ingredient(rng) for _ in range(args.text_phrases)]
+    report: Dict[str, Any] = {"normalize": _measure(normalize_text_for_matching, phrases)}
+    for length in args.ocr_lengths:
+        texts = [_ocr_text(rng, length) for _ in range(args.text_repeats)]
+
+        def parse(text: str) -> List[str]:
+            block = find_ingredient_block(text)
+            return block.declared_texts() if block else []
+
+        current = report[f"parse_{length}_chars"] = {
+            **_measure(parse, texts),
+            "ingredients": statistics.fmean(len(parse(text)) for text in texts),
+        }
+        legacy_texts = [re.sub(r"(\d)\.(\d)", r"\1,\2", text) for text in texts]
+        legacy = report[f"legacy_parse_{length}_chars"] = {
+            **_measure(_legacy_parse, legacy_texts),
+            "ingredients": statistics.fmean(len(_legacy_parse(text)) for text in legacy_texts),
+        }
+        current["speedup"] = legacy["p50_ms"] / current["p50_ms"] if current["p50_ms"] else None
+    return report
+
+
+def _write_synthetic_store(directory: Path, rows: int, seed: int, dim: int = 384) -> float:
+    from app.services.kb_store import write_kb_store
+    from app.services.knowledge_base import EMBEDDING_MODEL_NAME, normalize_text_for_matching
+
+    rng = random.Random(seed)
+    texts = [_phrase(rng, rng.randint(1, 4)) + f" {position}" for position in range(rows)]
+    data_frame = pd.DataFrame(
+        {
+            "original_text": texts,
+            "status": [rng.choice(STATUSES) for _ in range(rows)],
+            "norm_text": [normalize_text_for_matching(text) for text in texts],
+        }
+    )
+    # Random unit vectors: search cost does not depend on what the embeddings mean.
+    embeddings = np.random.default_rng(seed).standard_normal((rows, dim), dtype=np.float32)
+    started = time.perf_counter()
+    write_kb_store(directory, data_frame, embeddings, embedding_model=EMBEDDING_MODEL_NAME)
+    return time.perf_counter() - started
+
+
+def run_kb(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.config import Settings
+    from app.services.knowledge_base import KnowledgeBase
+
+    rng = random.Random(args.seed)
+    lexical_queries = [_phrase(rng, 2) for _ in range(args.kb_queries)]
+    semantic_queries = [f"{_phrase(rng, 3)} blend" for _ in range(args.kb_queries)]
+    ingredient_lists = [[_ingredient(rng) for _ in range(10)] for _ in range(max(1, args.kb_queries // 4))]
+
+    report: Dict[str, Any] = {}
+    for rows in args.kb_sizes:
+        with tempfile.TemporaryDirectory(prefix="halal-bench-kb-") as directory:
+            store = Path(directory) / "kb_store"
+            write_seconds = _write_synthetic_store(store, rows, args.seed)
+            settings = Settings(
+                kb_store_path=store,
+                embedding_cache_size=0,
+                vector_index="brute",
+                embedding_storage=args.embedding_storage,
+            )
+            started = time.perf_counter()
+            knowledge_base = KnowledgeBase(settings)
+            load_seconds = time.perf_counter() - started
+            report[str(rows)] = {
+                "write_store_s": write_seconds,
+                "load_s": load_seconds,
+                "search_lexical": _measure(knowledge_base.search_similar, lexical_queries),
+                "search_semantic": _measure(knowledge_base.search_similar, semantic_queries),
+                "classify_ingredient_list": _measure(knowledge_base.classify_ingredient_list, ingredient_lists),
+                "classify_ingredients": _measure(knowledge_base.classify_ingredients, ingredient_lists),
+            }
+            del knowledge_base
+    return report
+
+
+def _label_image(seed: int) -> bytes:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (1280, 960), (235, 225, 200))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((80, 80, 480, 480), fill=(180, 60, 40))
+    for row in range(16):
+        draw.text((620, 520 + row * 22), _phrase(rng, 8), fill=(0, 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _synthetic_yolo_weights(path: Path) -> Optional[Path]:
+    try:
+        from ultralytics import YOLO
+
+        # Built from the architecture definition: randomly initialised and nothing is downloaded.
+        YOLO("yolov8n.yaml").save(str(path))
+    except Exception:  # noqa: BLE001 - no ultralytics (or an incompatible version): run without a detector.
+        return None
+    return path
+
+
+async def _load(client, send: Callable[[Any, int], Any], clients: int, requests: int) -> Dict[str, Any]:
+    counter = iter(range(requests))
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await send(client, index)
+                statuses[str(response.status_code)] += 1
+            except Exception as exc:  # noqa: BLE001
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        "clients": clients,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "status_counts": dict(statuses),
+        **{key: value for key, value in _summary(latencies).items() if key != "ops_per_s"},
+    }
+
+
+def run_e2e(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    import httpx
+
+    report: Dict[str, Any] = {}
+    if args.url is None:
+        store = workdir / "e2e_kb_store"
+        _write_synthetic_store(store, args.e2e_kb_size, args.seed)
+        weights = _synthetic_yolo_weights(workdir / "synthetic_yolov8n.pt") if args.model == "synthetic" else None
+        rng = random.Random(args.seed)
+        os.environ.update(
+            {
+                "HALAL_KB_STORE_PATH": str(store),
+                "HALAL_OCR_BACKENDS": "stub",
+                "HALAL_OCR_STUB_TEXT": "Ingredients: " + ", ".join(_ingredient(rng) for _ in range(12)) + ".",
+                "HALAL_RESULT_CACHE_SIZE": "0",
+                "HALAL_OCR_CACHE_SIZE": "0",
+                "HALAL_EMBEDDING_CACHE_SIZE": "0",
+            }
+        )
+        if weights is not None:
+            os.environ["HALAL_YOLO_WEIGHTS_PATH"] = str(weights)
+        from app.config import get_settings
+
+        get_settings.cache_clear()
+        from app.main import app
+
+        report["detector"] = "synthetic-yolov8n" if weights is not None else "unavailable"
+        report["kb_rows"] = args.e2e_kb_size
+        client_factory = lambda: httpx.AsyncClient(  # noqa: E731
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout
+        )
+    else:
+        report["url"] = args.url
+        client_factory = lambda: httpx.AsyncClient(base_url=args.url, timeout=args.timeout)  # noqa: E731
+
+    image = _label_image(args.seed)
+    rng = random.Random(args.seed)
+    questions = [f"Is {_phrase(rng, 2)} halal?" for _ in range(64)]
+
+    async def analyze(client, index: int):
+        return await client.post("/api/analyze", files={"file": ("label.jpg", image, "image/jpeg")})
+
+    async def chat(client, index: int):
+        return await client.post("/api/chat", json={"question": questions[index % len(questions)]})
+
+    async def run_all() -> None:
+        async with client_factory() as client:
+            for name, send in (("analyze", analyze), ("chat", chat)):
+                await send(client, 0)  # first request loads the models
+                report[name] = await _load(client, send, args.clients, args.requests)
+
+    asyncio.run(run_all())
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip() or None
+
+
+def _compare(before: Any, after: Any, path: str = "") -> Dict[str, Dict[str, float]]:
+    changes: Dict[str, Dict[str, float]] = {}
+    if isinstance(before, dict) and isinstance(after, dict):
+        for key in after:
+            if key in before:
+                changes.update(_compare(before[key], after[key], f"{path}.{key}" if path else key))
+    elif path.rsplit(".", 1)[-1] in COMPARED_METRICS and isinstance(before, (int, float)) and before:
+        changes[path] = {"before": before, "after": after, "change_pct": (after - before) / before * 100.0}
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", nargs="+", choices=["text", "kb", "e2e"], default=["text", "kb", "e2e"])
+    parser.add_argument("--model", choices=["synthetic", "minilm"], default="synthetic")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text-phrases", type=int, default=20000)
+    parser.add_argument("--text-repeats", type=int, default=50)
+    parser.add_argument("--ocr-lengths", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--kb-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--kb-queries", type=int, default=200)
+    parser.add_argument("--embedding-storage", choices=["float32", "float16", "int8"], default="float32")
+    parser.add_argument("--e2e-kb-size", type=int, default=10000)
+    parser.add_argument("--url", default=None, help="Load-test a running server instead of the in-process app.")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", type=Path, default=None, help="Also write the JSON report to this file.")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier JSON report to compare against.")
+    args = parser.parse_args()
+
+    if args.model == "synthetic":
+        _install_synthetic_encoder()
+
+    report: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+    }
+    with tempfile.TemporaryDirectory(prefix="halal-bench-") as workdir:
+        if "text" in args.sections:
+            report["text"] = run_text(args)
+        if "kb" in args.sections:
+            report["kb"] = run_kb(args)
+        if "e2e" in args.sections:
+            report["e2e"] = run_e2e(args, Path(workdir))
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        report["comparison"] = {"baseline_commit": baseline.get("commit"), "changes": _compare(baseline, report)}
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text, encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Recall and latency of the IVF vector index against exact brute-force search.
+
+Run from ``backend/`` on synthetic clustered embeddings, or on a real KB store::
+
+    python benchmarks/vector_index.py --rows 1000000 --nlist 4096 --nprobe 1 8 32
+    python benchmarks/vector_index.py --store ../HalalKB/kb_store --nprobe 4 8 16
+
+Queries are KB rows perturbed with Gaussian noise, so every query has a meaningful true neighbourhood.
+For each ``nprobe`` the script reports recall@k (overlap with the brute-force top-k) and per-query
+latency percentiles for both backends. Results are printed as JSON. Requires only NumPy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.kb_store import read_kb_store  # noqa: E402
+from app.services.vector_index import BruteForceIndex, IVFIndex, VectorIndex  # noqa: E402
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+def _synthetic(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    # Clustered data resembles sentence embeddings far better than uniform noise on the sphere.
+    centres = _normalize(rng.standard_normal((clusters, dim)))
+    labels = rng.integers(0, clusters, size=rows)
+    noise = rng.standard_normal((rows, dim)).astype(np.float32) * (0.7 / np.sqrt(dim))
+    return _normalize(centres[labels] + noise)
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _time_queries(index: VectorIndex, queries: np.ndarray, k: int) -> Tuple[np.ndarray, Dict[str, float]]:
+    latencies: List[float] = []
+    results = np.empty((queries.shape[0], k), dtype=np.int64)
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        _, indices = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+        results[position] = indices[0]
+    return results, {
+        "p50_ms": _percentile(latencies, 0.50) * 1000.0,
+        "p99_ms": _percentile(latencies, 0.99) * 1000.0,
+        "mean_ms": statistics.fmean(latencies) * 1000.0,
+    }
+
+
+def _recall(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(row_truth) & set(row_found[row_found >= 0])) for row_truth, row_found in zip(truth, found))
+    return hits / truth.size
+
+
+def _timed(label: str, func: Callable[[], IVFIndex]) -> Tuple[IVFIndex, float]:
+    started = time.perf_counter()
+    index = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.2f}s", file=sys.stderr)
+    return index, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", type=Path, help="Benchmark a KB store instead of synthetic embeddings.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.store is not None:
+        embeddings = read_kb_store(args.store).embeddings
+        source = str(args.store)
+    else:
+        embeddings = _synthetic(args.rows, args.dim, args.clusters, rng)
+        source = "synthetic"
+
+    picks = rng.choice(embeddings.shape[0], size=min(args.queries, embeddings.shape[0]), replace=False)
+    queries = np.asarray(embeddings[picks], dtype=np.float32)
+    noise = rng.standard_normal(queries.shape).astype(np.float32) * (0.2 / np.sqrt(queries.shape[1]))
+    queries = _normalize(queries + noise)
+
+    brute = BruteForceIndex(embeddings)
+    truth, brute_latency = _time_queries(brute, queries, args.k)
+    ivf, build_seconds = _timed("ivf build", lambda: IVFIndex.build(embeddings, nlist=args.nlist, seed=args.seed))
+
+    runs = []
+    for nprobe in args.nprobe:
+        ivf.nprobe = max(1, min(nprobe, ivf.nlist))
+        found, latency = _time_queries(ivf, queries, args.k)
+        runs.append({"nprobe": ivf.nprobe, f"recall@{args.k}": _recall(truth, found), **latency})
+
+    report = {
+        "source": source,
+        "rows": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "queries": int(queries.shape[0]),
+        "k": args.k,
+        "brute_force": brute_latency,
+        "ivf": {"nlist": ivf.nlist, "build_seconds": build_seconds, "runs": runs},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.ingredient_parser import parse_ingredient, parse_ingredient_blocks
+
+
+@pytest.mark.parametrize(
+    ("text", "leaves"),
+    [
+        ("Vitamins (A, D, E)", ["Vitamins"]),
+        ("milk (1,5% fat)", ["milk"]),
+        ("beef gelatine (halal)", ["beef gelatine"]),
+        ("cocoa butter (min. 30%)", ["cocoa butter"]),
+        ("chocolate (cocoa, sugar, organic)", ["chocolate", "cocoa", "sugar"]),
+        ("emulsifier (E471, soy lecithin [E322])", ["E471", "soy lecithin", "E322"]),
+    ],
+)
+def test_leaves_skip_brackets_that_only_describe_the_parent(text: str, leaves: list) -> None:
+    assert [leaf.name for leaf in parse_ingredient(text).leaves()] == leaves
+
+
+def test_bare_header_word_in_prose_does_not_open_a_block() -> None:
+    text = "Ingredients: sugar, cocoa butter, milk powder. Store cool and dry; for allergens see ingredients in bold."
+
+    blocks = parse_ingredient_blocks(text)
+
+    assert [block.item_texts() for block in blocks] == [["sugar", "cocoa butter", "milk powder"]]
+
+
+def test_bare_header_word_at_line_start_opens_a_block() -> None:
+    blocks = parse_ingredient_blocks("Nutrition per 100 g\nINGREDIENTS sugar, salt.")
+
+    assert [block.item_texts() for block in blocks] == [["sugar", "salt"]]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from app.services.ingredient_parser import FUNCTIONAL_CLASSES
+from app.services.lexical_index import LexicalIndex
+
+# Lower ranks are more severe, as in ``VERDICT_PRIORITY`` (haram=0 ... halal=4).
+ROWS = [
+    ("contains e100 curcumin and e120 carmine", 4),
+    ("e100 curcumin", 4),
+    ("e120 carmine", 0),
+    ("beef fat", 0),
+    ("sugar", 4),
+]
+
+
+def _index() -> LexicalIndex:
+    return LexicalIndex(
+        [text for text, _ in ROWS],
+        severity=[rank for _, rank in ROWS],
+        code_labels=FUNCTIONAL_CLASSES,
+    )
+
+
+def test_each_code_resolves_to_its_own_entry_most_severe_first() -> None:
+    hit = _index().lookup_e_codes("colours e100 e120")
+
+    assert hit is not None
+    assert hit.tier == "ecode"
+    assert hit.rows == [2, 1]
+
+
+def test_passing_mention_does_not_decide_a_code() -> None:
+    assert _index().e_code_rows == {"e100": 1, "e120": 2}
+
+
+def test_text_naming_more_than_codes_skips_the_ecode_tier() -> None:
+    assert _index().lookup_e_codes("pork gelatin e120") is None
+
+
+def test_unknown_code_is_not_a_hit() -> None:
+    assert _index().lookup_e_codes("e100, e999") is None
+
+
+def test_fuzzy_tier_never_corrects_a_short_word() -> None:
+    index = _index()
+
+    assert index.lookup_fuzzy("beet fat") is None
+    assert index.lookup_fuzzy("suger").rows == [4]